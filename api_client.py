@@ -0,0 +1,155 @@
+"""
+HTTP client the dashboard uses to talk to the tracker service.
+
+One pooled session is shared by every request, every call has strict connect and read
+timeouts, and /status is polled by a background thread so rendering a page only ever
+reads the last known value instead of waiting on the network. Live gaze, gestures and FPS
+arrive the same way, pushed over the /telemetry event stream to a listener thread.
+"""
+import collections
+import json
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+CONNECT_TIMEOUT = 0.5  # Seconds to wait for the tracker service to accept a connection
+READ_TIMEOUT = 3.0  # Seconds to wait for a response once connected
+POOL_SIZE = 4  # Keep-alive connections kept open to the tracker service
+STATUS_REFRESH_INTERVAL = 1.0  # Seconds between background /status polls
+STATUS_MAX_AGE = 5.0  # Seconds after which a cached /status no longer counts as known
+STATUS_IDLE_AFTER = 30.0  # Stop polling when no page has asked for /status for this long
+TELEMETRY_READ_TIMEOUT = 15.0  # Seconds without even a keep-alive before the stream counts as dead
+TELEMETRY_RETRY = 2.0  # Seconds before reconnecting a stream that ended or failed
+TELEMETRY_MAX_AGE = 2.0  # Seconds after which the last frame sample no longer counts as live
+RECENT_GESTURES = 10  # Gestures kept for display
+
+
+class TrackerClient:
+    """
+    Pooled, time-limited access to the tracker service with a background-refreshed /status.
+    """
+    def __init__(self, base_url, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.lock = threading.Lock()
+        self.refresh_now = threading.Event()
+        self.poller = None
+        self.cached_status = None
+        self.status_fetched_at = None  # monotonic time of the last successful /status
+        self.status_requested_at = 0.0
+        self.status_error = None
+
+        self.listener = None
+        self.live_requested_at = 0.0
+        self.live_state = None  # Last lifecycle snapshot pushed by the service
+        self.live_sample = None
+        self.sample_received_at = None
+        self.gestures = collections.deque(maxlen=RECENT_GESTURES)
+        self.telemetry_connected = False
+
+    def call(self, endpoint, method="POST", payload=None):
+        """
+        The decoded JSON response; raises requests.exceptions.RequestException on any failure.
+        """
+        response = self.session.request(method, f"{self.base_url}{endpoint}", json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        if endpoint in ('/start', '/stop'):
+            self.refresh_now.set()  # Tracking state just changed, don't show the old one for a whole interval
+        return response.json()
+
+    def status(self):
+        """
+        The most recent /status response, or None if the service has not answered recently.
+        Never blocks on the network.
+        """
+        with self.lock:
+            self.status_requested_at = time.monotonic()
+            if self.poller is None or not self.poller.is_alive():
+                self.poller = threading.Thread(target=self.poll_status, name="status-poller", daemon=True)
+                self.poller.start()
+            if self.status_fetched_at is None or time.monotonic() - self.status_fetched_at > STATUS_MAX_AGE:
+                return None
+            return self.cached_status
+
+    def poll_status(self):
+        """
+        Background loop refreshing the cached /status until no page has asked for it in a while.
+        """
+        while time.monotonic() - self.status_requested_at < STATUS_IDLE_AFTER:
+            try:
+                status = self.call("/status", method="GET")
+            except (requests.exceptions.RequestException, ValueError) as e:
+                with self.lock:
+                    self.status_error = str(e)
+            else:
+                with self.lock:
+                    self.cached_status = status
+                    self.status_fetched_at = time.monotonic()
+                    self.status_error = None
+            self.refresh_now.wait(STATUS_REFRESH_INTERVAL)
+            self.refresh_now.clear()
+
+    def live(self):
+        """
+        What the tracker pushed most recently: {'connected', 'state', 'sample', 'gestures'}, with
+        sample None once it is older than TELEMETRY_MAX_AGE. Never blocks on the network.
+        """
+        with self.lock:
+            self.live_requested_at = time.monotonic()
+            if self.listener is None or not self.listener.is_alive():
+                self.listener = threading.Thread(target=self.listen_telemetry, name="telemetry-listener", daemon=True)
+                self.listener.start()
+            fresh = self.sample_received_at is not None and time.monotonic() - self.sample_received_at <= TELEMETRY_MAX_AGE
+            return {
+                'connected': self.telemetry_connected,
+                'state': self.live_state,
+                'sample': self.live_sample if fresh else None,
+                'gestures': list(self.gestures),
+            }
+
+    def listen_telemetry(self):
+        """
+        Background loop reading /telemetry, reconnecting when the stream ends, until no page has
+        asked for live data in a while.
+        """
+        while time.monotonic() - self.live_requested_at < STATUS_IDLE_AFTER:
+            try:
+                with self.session.get(
+                    f"{self.base_url}/telemetry", stream=True, timeout=(self.timeout[0], TELEMETRY_READ_TIMEOUT)
+                ) as response:
+                    response.raise_for_status()
+                    with self.lock:
+                        self.telemetry_connected = True
+                    kind = None
+                    for line in response.iter_lines(decode_unicode=True):
+                        if line.startswith("event:"):
+                            kind = line[6:].strip()
+                        elif line.startswith("data:") and kind:
+                            self.receive(kind, json.loads(line[5:]))
+                        if time.monotonic() - self.live_requested_at >= STATUS_IDLE_AFTER:
+                            break
+            except (requests.exceptions.RequestException, ValueError):
+                pass
+            with self.lock:
+                self.telemetry_connected = False
+            time.sleep(TELEMETRY_RETRY)
+
+    def receive(self, kind, data):
+        with self.lock:
+            if kind == 'frame':
+                self.live_sample = data
+                self.sample_received_at = time.monotonic()
+            elif kind == 'gesture':
+                self.gestures.appendleft(data)
+            elif kind == 'state':
+                self.live_state = data
+
+    def close(self):
+        self.session.close()
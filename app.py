@@ -4,54 +4,63 @@ import os
 import hashlib
 import requests
 
+from api_client import TrackerClient
+from translations import TranslationCatalog
+from user_store import open_user_store
+
 # File paths
-USER_DATA_FILE = "user_data.json"
+USER_DATA_FILE = "user_data.json"  # Old account file, imported into USER_DB_FILE on first run
+USER_DB_FILE = "users.db"
 LANGUAGE_DATA_FILE = "language_data.json"
 LANGUAGE_DATABASE_FILE = "language_database.json"  # New file
 
 # API URL
 API_URL = "http://172.20.10.8:5000"
+TRACKING_PANEL_REFRESH = 2  # Seconds between redraws of the live tracking panel; they only read pushed data
+GAZE_ARROWS = {"center": "●", "left": "←", "right": "→", "up": "↑", "down": "↓"}
+
+# One catalog per server process, shared by every session and rerun
+@st.cache_resource
+def get_translation_catalog():
+    return TranslationCatalog(LANGUAGE_DATABASE_FILE)
 
-# Function to load translations from the database file
+# Function to load translations from the database file, parsed again only when it changes
 def load_translations():
-    if os.path.exists(LANGUAGE_DATABASE_FILE):
-        try:
-            with open(LANGUAGE_DATABASE_FILE, "r", encoding="utf-8") as f:  # Explicit UTF-8
-                data = json.load(f)
-                if isinstance(data, dict):
-                    return data
-        except (json.JSONDecodeError, UnicodeDecodeError):
-            st.error("Failed to load or decode language database file. Check format and encoding.")
-            return {}
-    return {}
+    catalog = get_translation_catalog()
+    catalog.refresh()
+    if catalog.error:
+        st.error("Failed to load or decode language database file. Check format and encoding.")
+    return catalog.languages
 
 # Load language database when app initializes
 TRANSLATIONS = load_translations()
 
 
-# Function to load user data
-def load_user_data():
-    if os.path.exists(USER_DATA_FILE):
-        try:
-            with open(USER_DATA_FILE, "r") as f:
-                data = json.load(f)
-                if isinstance(data, dict):
-                    return data
-        except json.JSONDecodeError:
-            pass
-    return {}
+# Parsed JSON file keyed by its mtime and size, so reruns skip the disk until the file changes.
+# st.cache_data hands every caller its own copy, so callers may modify the result.
+@st.cache_data(max_entries=4)
+def read_json_file(path, version):
+    with open(path, "r") as f:
+        return json.load(f)
 
-# Function to save user data
-def save_user_data(data):
-    with open(USER_DATA_FILE, "w") as f:
-        json.dump(data, f)
+def file_version(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+# One account store per server process; every session borrows from its shared pool of SQLite connections
+@st.cache_resource
+def get_user_store():
+    return open_user_store(USER_DB_FILE, USER_DATA_FILE)
 
 # Function to load language data
 def load_language_data():
-    if os.path.exists(LANGUAGE_DATA_FILE):
+    version = file_version(LANGUAGE_DATA_FILE)
+    if version is not None:
         try:
-            with open(LANGUAGE_DATA_FILE, "r") as f:
-                return json.load(f)
+            return read_json_file(LANGUAGE_DATA_FILE, version)
         except json.JSONDecodeError:
             pass
     return {}
@@ -86,17 +95,18 @@ if "language" not in st.session_state:
     st.session_state.language = "en"  # Default language
 
 
-# Load user data
-user_data = load_user_data()
+# Account store
+user_store = get_user_store()
 # Load language data
 language_data = load_language_data()
 
 
 # Auto-login if data exists for this device
-if user_data.get("logged_in"):
+remembered_user = user_store.remembered_user()
+if remembered_user:
     st.session_state.logged_in = True
-    st.session_state.user_name = user_data.get("name", "")
-    st.session_state.email = user_data.get("email", "")
+    st.session_state.user_name = remembered_user["name"]
+    st.session_state.email = remembered_user["email"]
     st.session_state.first_visit = False
     st.session_state.show_modal = False
 
@@ -105,9 +115,13 @@ if "language" in language_data:
     st.session_state.language = language_data["language"]
 
 
+# Strings of the current language, looked up once per rerun rather than on every translate_text call.
+# Changing the language always triggers a rerun, so this never goes stale within one.
+LANGUAGE_STRINGS = get_translation_catalog().strings(st.session_state.language)
+
 # Function to translate text
 def translate_text(key):
-    return TRANSLATIONS.get(st.session_state.language, {}).get(key, key)
+    return LANGUAGE_STRINGS.get(key, key)
 
 
 # Set page configuration
@@ -186,26 +200,17 @@ if st.session_state.show_modal:
 
             if st.button(translate_text("signup")):
                 if name and email and password:
-                    if email not in [
-                        user_info.get("email")
-                        for user_info in user_data.values()
-                        if isinstance(user_info, dict)
-                    ]:
-                        hashed_password = hash_password(password)
-                        user_data[name] = {
-                            "password": hashed_password,
-                            "email": email,
-                            "logged_in": True,
-                        }
+                    # The unique email index rejects duplicates inside the insert itself
+                    new_user = user_store.create_user(name, email, hash_password(password))
+                    if new_user:
                         st.session_state.logged_in = True
                         st.session_state.user_name = name
                         st.session_state.email = email
                         st.session_state.show_modal = False
-                        user_data.update({"logged_in": True, "name": name, "email": email})
+                        user_store.remember(new_user["id"])
                         #save language in language data json
                         language_data.update({"language":st.session_state.language})
                         save_language_data(language_data)
-                        save_user_data(user_data)
                         st.rerun()
                     else:
                         st.warning(translate_text("account_exists"))
@@ -221,18 +226,16 @@ if st.session_state.show_modal:
             password = st.text_input(translate_text("enter_password"), type="password")
 
             if st.button(translate_text("login")):
-                hashed_password = hash_password(password)
-                for name, user_info in user_data.items():
-                    if isinstance(user_info,dict) and user_info.get('email')==email and  user_info.get('password') == hashed_password:
-                        st.session_state.logged_in = True
-                        st.session_state.user_name = name
-                        st.session_state.email = email
-                        st.session_state.show_modal = False
-                        #save language in language data json
-                        language_data.update({"language":st.session_state.language})
-                        save_language_data(language_data)
-                        st.rerun()
-                        break
+                user = user_store.authenticate(email, hash_password(password))
+                if user:
+                    st.session_state.logged_in = True
+                    st.session_state.user_name = user["name"]
+                    st.session_state.email = email
+                    st.session_state.show_modal = False
+                    #save language in language data json
+                    language_data.update({"language":st.session_state.language})
+                    save_language_data(language_data)
+                    st.rerun()
                 else:
                     st.warning(
                         translate_text("invalid_credentials")
@@ -267,19 +270,79 @@ if st.session_state.show_modal:
         unsafe_allow_html=True,
     )
 
-# Function to make API calls
-def make_api_call(endpoint, method="POST"):
+# One pooled client per server process, shared by every session and rerun
+@st.cache_resource
+def get_api_client():
+    return TrackerClient(API_URL)
+
+# Tracking button callback. It runs before the panel reruns, so the button is drawn with its new
+# label straight away and no extra st.rerun() is needed. Messages are kept for the panel to show,
+# since elements drawn from a callback would land at the top of the page.
+def toggle_tracking():
+    notices = []
+    endpoint = "/stop" if st.session_state.tracking_enabled else "/start"
+    # The tracker loads this user's saved tuning profile; without one it keeps its current settings
+    payload = {"profile": st.session_state.email} if endpoint == "/start" and st.session_state.email else None
     try:
-        url = f"{API_URL}{endpoint}"
-        if method == "POST":
-            response = requests.post(url)
-        elif method == "GET":
-            response = requests.get(url)
-        response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        st.error(f"API Error: {e}")
-        return None
+        response = get_api_client().call(endpoint, payload=payload)
+    except (requests.exceptions.RequestException, ValueError) as e:
+        notices.append(("error", f"API Error: {e}"))
+        response = None
+
+    if endpoint == "/start":
+        if response and response.get("message") == "Tracking started":
+            st.session_state.tracking_enabled = True
+            notices.append(("success", translate_text("tracking_is_on")))
+        else:
+            notices.append(("error", translate_text("failed_start")))
+    else:
+        if response and response.get("message") == "Tracking stopped":
+            st.session_state.tracking_enabled = False
+            notices.append(("success", translate_text("tracking_is_off")))
+        else:
+            notices.append(("error", translate_text("failed_stop")))
+    st.session_state.tracking_notices = notices
+
+# Iris Tracking Control panel. As a fragment it reruns alone: its button and its timed status
+# refresh never re-execute the sidebar, CSS and the rest of the dashboard.
+@st.fragment(run_every=TRACKING_PANEL_REFRESH)
+def tracking_panel():
+    st.subheader(translate_text("iris_tracking"))
+    col8, col9 = st.columns(2)
+    with col8:
+        st.button(
+            translate_text("turn_on") if not st.session_state.tracking_enabled else translate_text("turn_off"),
+            use_container_width=True,
+            on_click=toggle_tracking,
+        )
+        for kind, text in st.session_state.pop("tracking_notices", []):  # Shown once, right after the click
+            if kind == "success":
+                st.success(text)
+            else:
+                st.error(text)
+    with col9:
+        live = get_api_client().live()  # Pushed by the tracker over /telemetry, never waits on the API
+        if live["connected"] and live["state"]:
+            tracking_status = live["state"]["state"] in ("starting", "running")
+        else:
+            status_response = get_api_client().status()  # Cached by a background poller while the stream is down
+            tracking_status = status_response.get("tracking_enabled", False) if status_response else None
+        if tracking_status is None:
+            st.write(f"**{translate_text('tracking_status')}** {translate_text('unknown_status')}")
+        else:
+            st.write(f"**{translate_text('tracking_status')}** {'ON' if tracking_status else 'OFF'}")
+
+        sample = live["sample"]
+        if sample:
+            if sample.get("direction"):
+                gaze = " ".join(GAZE_ARROWS[direction] for direction in sample["direction"])
+                st.write(f"**{translate_text('live_gaze')}** {gaze}")
+                st.write(f"**{translate_text('live_eyes')}** {sample['ear'][0]:.2f} / {sample['ear'][1]:.2f}")
+            else:
+                st.write(translate_text("no_face"))
+            st.write(f"**{translate_text('live_fps')}** {sample['fps']:.1f}")
+        if live["gestures"]:
+            st.write(f"**{translate_text('last_gesture')}** {translate_text('gesture_' + live['gestures'][0]['gesture'])}")
 
 # Sidebar navigation section
 with st.sidebar:
@@ -338,36 +401,8 @@ if st.session_state.logged_in:
         with col7:
             st.metric(translate_text("literature"), "68%", delta=translate_text("focus_analysis"))
 
-        # Tracking Control
-        st.subheader(translate_text("iris_tracking"))
-        col8, col9 = st.columns(2)
-        with col8:
-            if st.button(
-                translate_text("turn_on") if not st.session_state.tracking_enabled else translate_text("turn_off"),
-                use_container_width=True,
-            ):
-                if not st.session_state.tracking_enabled:
-                    response = make_api_call("/start")
-                    if response and response.get("message") == "Tracking started":
-                        st.session_state.tracking_enabled = True
-                        st.success(translate_text("tracking_is_on"))
-                    else:
-                        st.error(translate_text("failed_start"))
-                else:
-                    response = make_api_call("/stop")
-                    if response and response.get("message") == "Tracking stopped":
-                        st.session_state.tracking_enabled = False
-                        st.success(translate_text("tracking_is_off"))
-                    else:
-                        st.error(translate_text("failed_stop"))
-                st.rerun()
-        with col9:
-            status_response = make_api_call("/status", method="GET")
-            if status_response:
-                tracking_status = status_response.get("tracking_enabled", False)
-                st.write(f"**{translate_text('tracking_status')}** {'ON' if tracking_status else 'OFF'}")
-            else:
-                st.write(f"**{translate_text('tracking_status')}** {translate_text('unknown_status')}")
+        # Tracking Control, rerun on its own so toggles and status refreshes skip the rest of the page
+        tracking_panel()
 
     elif st.session_state.current_page == "study":
         st.title(translate_text("study_section_title"))
@@ -407,9 +442,8 @@ if st.session_state.logged_in:
                 st.session_state.show_modal = True
                 st.session_state.show_login_form = False
 
-                # Update user data to reflect logout
-                user_data.update({"logged_in": False})
-                save_user_data(user_data)
+                # Forget the login remembered on this device
+                user_store.forget()
                 st.rerun()
 
 
@@ -0,0 +1,1539 @@
+"""
+Benchmarks for the tracker service and the dashboard.
+
+Usage:
+    python benchmark.py landmarks [--frames 5000]
+    python benchmark.py replay FOOTAGE [--max-frames N] [--roi]
+    python benchmark.py inference FOOTAGE [--seconds 10] [--fps 30] [--gil-load 2] [--roi]
+    python benchmark.py governor FOOTAGE [--seconds 20] [--fps 30] [--target 20] [--gil-load 3]
+    python benchmark.py sweep [--hours 1] [--fps 30] [--check-frames 20000]
+    python benchmark.py frames VIDEO [--frames 300]
+    python benchmark.py dashboard [--app app.py] [--page all] [--reruns 50]
+    python benchmark.py dashboard --live [--app app.py] [--window 60]
+    python benchmark.py users [--sizes 10 1000 100000] [--logins 2000]
+    python benchmark.py auth [--app app.py] [--sizes 10 1000 100000] [--attempts 20]
+    python benchmark.py api FOOTAGE [--clients 8] [--cycles 10] [--hold 1.0] [--server waitress]
+    python benchmark.py telemetry FOOTAGE [--clients 3] [--seconds 10]
+    python benchmark.py recorder FOOTAGE [--seconds 15] [--fps 30] [--frames 27000] [--window 10]
+    python benchmark.py profile FOOTAGE [--seconds 10] [--fps 30]
+    python benchmark.py config FOOTAGE [--seconds 10] [--fps 30] [--updates 20] [--inference thread]
+    python benchmark.py startup [--runs 3] [--source synthetic]
+    python benchmark.py capture SOURCE [--frames 300] [--width W] [--height H] [--fps F] [--fourcc MJPG] [--buffer-size 1]
+    python benchmark.py suite FOOTAGE
+
+FOOTAGE is a video file or a directory of images; replays need no camera or desktop.
+The dashboard and auth benchmarks run app.py headless through Streamlit's AppTest.
+dashboard --live serves it with `streamlit run` and drives one session over its websocket instead.
+Add --output FILE before the command to also save the results, with the commit and machine
+they came from, as JSON for comparing runs.
+"""
+import argparse
+import collections
+import hashlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import types
+import cv2
+import numpy as np
+from mediapipe.framework.formats import landmark_pb2
+
+import gesture_analysis
+import iris_api
+import landmark_recorder
+import user_store
+
+
+def fake_face_landmarks(rng):
+    """
+    A stand-in for a Mediapipe NormalizedLandmarkList with plausible, open-eyed geometry.
+    """
+    points = rng.uniform(0.3, 0.7, size=(iris_api.NUM_LANDMARKS, 3))
+    for eye, iris, center_x in (
+        (iris_api.LEFT_EYE_LANDMARKS, iris_api.IRIS_LEFT_LANDMARKS, 0.4),
+        (iris_api.RIGHT_EYE_LANDMARKS, iris_api.IRIS_RIGHT_LANDMARKS, 0.6),
+    ):
+        points[eye[0], :2] = (center_x - 0.05, 0.5)
+        points[eye[1], :2] = (center_x + 0.05, 0.5)
+        points[eye[2], :2] = (center_x, 0.48)
+        points[eye[3], :2] = (center_x, 0.52)
+        points[iris, :2] = (center_x + rng.uniform(-0.02, 0.02), 0.5 + rng.uniform(-0.01, 0.01))
+    face_landmarks = landmark_pb2.NormalizedLandmarkList()
+    for x, y, z in points.tolist():
+        face_landmarks.landmark.add(x=x, y=y, z=z)
+    return face_landmarks
+
+
+def legacy_eye_metrics(face_landmarks, frame_shape):
+    """
+    The per-point list extraction the tracker used before landmarks were batched into one array.
+    """
+    def extract(indices):
+        return [(face_landmarks.landmark[point].x, face_landmarks.landmark[point].y) for point in indices]
+
+    frame_height, frame_width = frame_shape[:2]
+    iris_left, iris_right = extract(iris_api.IRIS_LEFT_LANDMARKS), extract(iris_api.IRIS_RIGHT_LANDMARKS)
+    left_eye, right_eye = extract(iris_api.LEFT_EYE_LANDMARKS), extract(iris_api.RIGHT_EYE_LANDMARKS)
+    iris_left_pixel = [(x * frame_width, y * frame_height) for x, y in iris_left]
+    iris_right_pixel = [(x * frame_width, y * frame_height) for x, y in iris_right]
+    left_eye_pixel = [(x * frame_width, y * frame_height) for x, y in left_eye]
+    right_eye_pixel = [(x * frame_width, y * frame_height) for x, y in right_eye]
+    return (
+        iris_api.calculate_position_ratio(iris_left_pixel, left_eye_pixel),
+        iris_api.calculate_position_ratio(iris_right_pixel, right_eye_pixel),
+        iris_api.detect_blink_or_close(left_eye_pixel),
+        iris_api.detect_blink_or_close(right_eye_pixel),
+    )
+
+
+def vectorized_eye_metrics(face_landmarks, frame_shape, points):
+    return iris_api.compute_eye_metrics(iris_api.landmarks_to_array(face_landmarks, points), frame_shape)
+
+
+def time_per_call(function, inputs):
+    start = time.perf_counter()
+    for item in inputs:
+        function(item)
+    return (time.perf_counter() - start) / len(inputs)
+
+
+def bench_landmarks(args):
+    """
+    Per-frame CPU cost of turning a face mesh result into eye ratios, before and after batching.
+    """
+    rng = np.random.default_rng(0)
+    frame_shape = (480, 640, 3)
+    faces = [fake_face_landmarks(rng) for _ in range(args.frames)]
+    points = np.zeros((iris_api.NUM_LANDMARKS, 3))
+
+    # Both paths must agree before their timings mean anything
+    for face in faces[:100]:
+        (hl, vl), (hr, vr), ear_left, ear_right = legacy_eye_metrics(face, frame_shape)
+        horizontal, vertical, ears = vectorized_eye_metrics(face, frame_shape, points)
+        assert np.allclose([hl, hr, vl, vr, ear_left, ear_right], [*horizontal, *vertical, *ears])
+
+    legacy = time_per_call(lambda face: legacy_eye_metrics(face, frame_shape), faces)
+    vectorized = time_per_call(lambda face: vectorized_eye_metrics(face, frame_shape, points), faces)
+    return {
+        'frames': args.frames,
+        'legacy_us_per_frame': round(legacy * 1e6, 2),
+        'vectorized_us_per_frame': round(vectorized * 1e6, 2),
+        'speedup': round(legacy / vectorized, 2),
+    }
+
+
+def summarize_durations(durations):
+    """
+    p50/p95/p99 and mean of a list of durations in seconds, reported in milliseconds.
+    """
+    if not durations:
+        return {}
+    values = np.array(durations) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        'p50_ms': round(p50, 3),
+        'p95_ms': round(p95, 3),
+        'p99_ms': round(p99, 3),
+        'mean_ms': round(values.mean(), 3),
+    }
+
+
+def bench_replay(args):
+    """
+    Replay recorded footage through detection and gestures, reporting FPS and time per stage.
+    """
+    sink = iris_api.RecordingSink()
+    start = time.perf_counter()
+    timings, frames = iris_api.replay(args.footage, sink=sink, max_frames=args.max_frames, use_roi=args.roi)
+    elapsed = time.perf_counter() - start
+    return {
+        'footage': args.footage,
+        'roi': args.roi,
+        'frames': frames,
+        'fps': round(frames / elapsed, 2) if elapsed else None,
+        'stages': {stage: summarize_durations(timings[stage]) for stage in iris_api.PIPELINE_STAGES},
+        'actions': sink.counts(),
+    }
+
+
+class LoopingCapture:
+    """
+    Plays preloaded frames in a loop at a fixed rate for a fixed time, like a camera that never runs dry.
+    """
+    def __init__(self, frames, fps, seconds):
+        self.frames = frames
+        self.interval = 1.0 / fps
+        self.seconds = seconds
+        self.started = None
+        self.index = 0
+
+    def read(self):
+        now = time.perf_counter()
+        if self.started is None:
+            self.started = now
+        if now - self.started >= self.seconds:
+            return False, None
+        wait = self.started + self.index * self.interval - now
+        if wait > 0:
+            time.sleep(wait)
+        frame = self.frames[self.index % len(self.frames)]
+        self.index += 1
+        return True, frame
+
+    def get(self, prop):
+        return 0.0
+
+    def set(self, prop, value):
+        return False
+
+    def release(self):
+        pass
+
+
+def load_frames(footage, limit):
+    cap = iris_api.open_capture(footage)
+    frames = []
+    while len(frames) < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    if not frames:
+        raise SystemExit(f"No frames could be read from {footage}")
+    return frames
+
+
+def busy_python(stop, done=None):
+    """
+    Pure-Python work that holds the GIL, standing in for Flask request threads and gesture math.
+    Adds the number of work units finished to done[0] when a list is passed.
+    """
+    units = 0
+    while not stop.is_set():
+        sum(range(10000))
+        units += 1
+    if done is not None:
+        done[0] += units
+
+
+def bench_inference(args):
+    """
+    Throughput and latency of the live pipeline with face_mesh on a thread versus in a shared-memory worker.
+    The timed window opens once the first frame has gone through, so spawning the worker process
+    and loading its models (seconds) is reported as startup instead of counting against its throughput.
+    """
+    frames = load_frames(args.footage, 300)
+    results = {}
+    for mode in iris_api.INFERENCE_MODES:
+        pipeline = iris_api.TrackingPipeline(
+            LoopingCapture(frames, args.fps, float('inf')),
+            sink=iris_api.NullSink(),
+            use_roi=args.roi,
+            inference_mode=mode,
+        )
+        stop = threading.Event()
+        load = [threading.Thread(target=busy_python, args=(stop,), daemon=True) for _ in range(args.gil_load)]
+        for thread in load:
+            thread.start()
+        launched = time.perf_counter()
+        runner = threading.Thread(target=pipeline.run, daemon=True)
+        runner.start()
+        while not pipeline.frames_acted:
+            if not runner.is_alive() or time.perf_counter() - launched > 120:
+                raise RuntimeError(f"No frame got through the pipeline in {mode} mode")
+            time.sleep(0.01)
+        startup = time.perf_counter() - launched
+        # Frames already in flight when the first came back were captured during startup as well
+        drained = pipeline.frames_acted + iris_api.shm_inference.RING_SLOTS
+        while pipeline.frames_acted < drained and runner.is_alive():
+            time.sleep(0.01)
+
+        # Counters at the start of the window; the latency peak of startup is left out too
+        inferred, captured, dropped = pipeline.frames_inferred, pipeline.frames_captured, pipeline.frame_slot.dropped
+        acted, latency = pipeline.frames_acted, pipeline.total_latency
+        pipeline.max_latency = 0.0
+        start = time.perf_counter()
+        time.sleep(args.seconds)
+        elapsed = time.perf_counter() - start
+        inferred, captured, dropped = pipeline.frames_inferred - inferred, pipeline.frames_captured - captured, pipeline.frame_slot.dropped - dropped
+        acted, latency = pipeline.frames_acted - acted, pipeline.total_latency - latency
+        max_latency = pipeline.max_latency
+        pipeline.stop()
+        runner.join()
+        stop.set()
+        for thread in load:
+            thread.join()
+
+        results[mode] = {
+            'startup_ms': round(startup * 1000, 1),
+            'inferred_fps': round(inferred / elapsed, 2),
+            'frames_captured': captured,
+            'frames_inferred': inferred,
+            'dropped_before_inference': dropped,
+            'mean_latency_ms': round(latency / acted * 1000, 2) if acted else None,
+            'max_latency_ms': round(max_latency * 1000, 2),
+            'inference_fallback': pipeline.inference_fallback,
+        }
+    return {
+        'footage': args.footage,
+        'seconds': args.seconds,
+        'source_fps': args.fps,
+        'gil_load_threads': args.gil_load,
+        'roi': args.roi,
+        'modes': results,
+    }
+
+
+def bench_governor(args):
+    """
+    The live pipeline with the quality governor off and on, with busy Python threads standing in
+    for a slower machine. Reports the frame rate and per-inference time each run settled at, and
+    how much work the busy threads got done alongside it.
+    """
+    frames = load_frames(args.footage, 300)
+    results = {}
+    for name, target in (('fixed_quality', 0), ('governed', args.target)):
+        pipeline = iris_api.TrackingPipeline(
+            LoopingCapture(frames, args.fps, args.seconds),
+            sink=iris_api.NullSink(),
+            use_roi=args.roi,
+        )
+        pipeline.governor.target_fps = target
+        stop = threading.Event()
+        background = [0]
+        load = [threading.Thread(target=busy_python, args=(stop, background), daemon=True) for _ in range(args.gil_load)]
+        for thread in load:
+            thread.start()
+        start = time.perf_counter()
+        pipeline.run()
+        elapsed = time.perf_counter() - start
+        stop.set()
+        for thread in load:
+            thread.join()
+
+        stats = pipeline.stats()
+        results[name] = {
+            'inferred_fps': round(stats['frames_inferred'] / elapsed, 2),
+            'frames_captured': stats['frames_captured'],
+            'dropped_before_inference': stats['dropped_before_inference'],
+            'mean_latency_ms': stats['mean_latency_ms'],
+            'background_units_per_second': round(background[0] / elapsed, 1),
+            'governor': stats['governor'],
+        }
+    return {
+        'footage': args.footage,
+        'seconds': args.seconds,
+        'source_fps': args.fps,
+        'target_fps': args.target,
+        'gil_load_threads': args.gil_load,
+        'roi': args.roi,
+        'runs': results,
+        'face_tracked_check': check_governor_with_face(args.seconds, args.fps, args.target),
+    }
+
+
+class SlowFaceMesh:
+    """
+    A face_mesh stand-in that finds the same face in every image and takes `seconds` per call.
+    In a face crop the face fills the middle half, where FaceRoi's padding puts it, so the crop
+    settles instead of shrinking around it.
+    """
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.full = fake_face_landmarks(np.random.default_rng(0))  # Spans 0.3-0.7 of the frame
+        self.crop = landmark_pb2.NormalizedLandmarkList()
+        for point in self.full.landmark:
+            self.crop.landmark.add(x=0.5 + (point.x - 0.5) * 1.25, y=0.5 + (point.y - 0.5) * 1.25, z=point.z)
+
+    def process(self, image):
+        time.sleep(self.seconds)
+        face = self.crop if image.shape[:2] == (iris_api.ROI_INPUT_SIZE, iris_api.ROI_INPUT_SIZE) else self.full
+        return types.SimpleNamespace(multi_face_landmarks=[face])
+
+    def close(self):
+        pass
+
+
+def check_governor_with_face(seconds, fps, target):
+    """
+    A face tracked the whole run, so every inference after the first is on a face crop. Inference
+    first takes 1.5x the budget, then a fifth of it. The governor has to step down and skip crops
+    while it is slow and come back to full quality once it is fast. Raises RuntimeError otherwise.
+    """
+    budget = 1.0 / target
+    face_mesh = SlowFaceMesh(1.5 * budget)
+    pipeline = iris_api.TrackingPipeline(
+        LoopingCapture([np.zeros((480, 640, 3), dtype=np.uint8)], fps, seconds),
+        sink=iris_api.NullSink(),
+        use_roi=True,
+        face_mesh=face_mesh,
+        inference_mode='thread',
+    )
+    pipeline.governor.target_fps = target
+    runner = threading.Thread(target=pipeline.run, daemon=True)
+    runner.start()
+    time.sleep(seconds / 2)
+    slow = pipeline.governor.stats()
+    face_mesh.seconds = 0.2 * budget
+    runner.join()
+    fast = pipeline.governor.stats()
+    roi = pipeline.roi.stats()
+    if roi['frames_full'] > 1:
+        raise RuntimeError(f"Face was lost during the governor check: {roi}")
+    if slow['tier'] == 0 or not slow['crops_skipped']:
+        raise RuntimeError(f"Governor did not act on face crops over budget: {slow}")
+    if fast['tier'] != 0:
+        raise RuntimeError(f"Governor did not return to full quality on fast face crops: {fast}")
+    return {'while_slow': slow, 'after_fast': fast, 'roi': roi}
+
+
+def synthetic_gaze_series(rng, frames, fps):
+    """
+    A landmark series of a face glancing around, blinking, winking for up to five seconds and
+    now and then leaving the frame. Only the eye and iris landmarks are filled in.
+    """
+    points = np.zeros((frames, iris_api.NUM_LANDMARKS, 3), dtype=np.float32)
+    # Gaze wanders smoothly, with a jump to a new spot about every two seconds
+    jumps = rng.random(frames) < 1 / (2 * fps)
+    targets = rng.uniform(-0.045, 0.045, size=(frames, 2))
+    gaze = targets[np.maximum.accumulate(np.where(jumps, np.arange(frames), 0))]
+    gaze += rng.normal(0, 0.003, size=(frames, 2))
+    # Lid openings per eye: blinks close both for a few frames, winks one for up to five seconds
+    opening = np.full((frames, 2), 0.025)
+    for start in np.flatnonzero(rng.random(frames) < 0.25 / fps):
+        opening[start:start + rng.integers(3, 8)] = 0.002
+    for start in np.flatnonzero(rng.random(frames) < 1 / (60 * fps)):
+        opening[start:start + rng.integers(5, int(5 * fps)), rng.integers(2)] = 0.002
+
+    for eye, (corners, iris, center_x) in enumerate((
+        (iris_api.LEFT_EYE_LANDMARKS, iris_api.IRIS_LEFT_LANDMARKS, 0.4),
+        (iris_api.RIGHT_EYE_LANDMARKS, iris_api.IRIS_RIGHT_LANDMARKS, 0.6),
+    )):
+        points[:, corners[0], 0], points[:, corners[0], 1] = center_x - 0.05, 0.5
+        points[:, corners[1], 0], points[:, corners[1], 1] = center_x + 0.05, 0.5
+        points[:, corners[2], 0], points[:, corners[2], 1] = center_x, 0.5 - opening[:, eye]
+        points[:, corners[3], 0], points[:, corners[3], 1] = center_x, 0.5 + opening[:, eye]
+        for landmark, (dx, dy) in zip(iris, ((-0.005, 0), (0, -0.005), (0.005, 0), (0, 0.005))):
+            points[:, landmark, 0] = center_x + gaze[:, 0] + dx
+            points[:, landmark, 1] = 0.5 + gaze[:, 1] * 0.4 + dy
+
+    # The face leaves the frame now and then
+    for start in np.flatnonzero(rng.random(frames) < 0.5 / (60 * fps)):
+        points[start:start + rng.integers(10, 60)] = np.nan
+    return points
+
+
+def bench_sweep(args):
+    """
+    Offline threshold sweep over a synthetic recording: time to compute the eye metrics, time to
+    count events for every configuration of the default grids, and what replaying the recording
+    through GestureEngine once per configuration would cost instead.
+    """
+    rng = np.random.default_rng(0)
+    frames = int(args.hours * 3600 * args.fps)
+    frame_shape = (480, 640, 3)
+    points = synthetic_gaze_series(rng, frames, args.fps)
+    timestamps = np.arange(frames) / args.fps
+
+    start = time.perf_counter()
+    metrics = gesture_analysis.series_metrics(points, frame_shape, timestamps)
+    metrics_seconds = time.perf_counter() - start
+    grids = {name: gesture_analysis.parse_grid(grid) for name, grid in gesture_analysis.DEFAULT_GRIDS.items()}
+    start = time.perf_counter()
+    table = gesture_analysis.sweep(metrics, **grids)
+    sweep_seconds = time.perf_counter() - start
+
+    # The counts only mean something if they are the engine's own, so check a slice of the recording
+    check = slice(0, min(frames, args.check_frames))
+    start = time.perf_counter()
+    engine = gesture_analysis.engine_counts(points[check], frame_shape, timestamps[check])
+    engine_seconds = time.perf_counter() - start
+    sliced = gesture_analysis.series_metrics(points[check], frame_shape, timestamps[check])
+    current = gesture_analysis.sweep(sliced, **gesture_analysis.current_thresholds())
+    configurations = len(table['clicks'])
+    return {
+        'frames': frames,
+        'hours': args.hours,
+        'configurations': configurations,
+        'metrics_seconds': round(metrics_seconds, 3),
+        'sweep_seconds': round(sweep_seconds, 3),
+        'sweep_us_per_configuration': round(sweep_seconds / configurations * 1e6, 2),
+        'engine_us_per_frame': round(engine_seconds / (check.stop or 1) * 1e6, 2),
+        'engine_replay_hours_estimate': round(engine_seconds / (check.stop or 1) * frames * configurations / 3600, 1),
+        'matches_engine': all(int(current[name][0]) == count for name, count in engine.items()),
+    }
+
+
+def gesture_decisions(points, frame_shape):
+    """
+    Per-eye direction and closed-eye flags, the inputs every gesture is decided from.
+    """
+    horizontal, vertical, ears = iris_api.compute_eye_metrics(points, frame_shape)
+    return (
+        iris_api.detect_movement(horizontal[0], vertical[0]),
+        iris_api.detect_movement(horizontal[1], vertical[1]),
+        bool(ears[0] < iris_api.BLINK_THRESHOLD),
+        bool(ears[1] < iris_api.BLINK_THRESHOLD),
+    )
+
+
+def bench_frames(args):
+    """
+    Bytes allocated and time per frame for the old flip-and-convert path versus reused buffers
+    with landmark-space mirroring, plus how often both paths reach the same gesture decisions.
+    """
+    def read_frames(step):
+        cap = cv2.VideoCapture(args.video)
+        timings, allocated = [], []
+        for _ in range(args.frames):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            start = time.perf_counter()
+            if not step(cap):
+                break
+            timings.append(time.perf_counter() - start)
+            allocated.append(tracemalloc.get_traced_memory()[1] - before)
+        cap.release()
+        return timings, allocated
+
+    def legacy_step(cap):
+        ret, frame = cap.read()
+        if ret:
+            cv2.cvtColor(cv2.flip(frame, 1), cv2.COLOR_BGR2RGB)
+        return ret
+
+    buffers = {'frame': None, 'rgb': None}
+
+    def reused_step(cap):
+        ret, frame = cap.read(buffers['frame'])
+        if ret:
+            buffers['frame'] = frame
+            if buffers['rgb'] is None:
+                buffers['rgb'] = np.empty_like(frame)
+            iris_api.prepare_frame(frame, out=buffers['rgb'])
+        return ret
+
+    tracemalloc.start()
+    paths = {}
+    for name, step in (('flip_and_convert', legacy_step), ('reused_buffers', reused_step)):
+        read_frames(step)  # Warm-up pass so one-time buffer allocations are not counted
+        timings, allocated = read_frames(step)
+        paths[name] = {
+            'frames': len(timings),
+            'bytes_allocated_per_frame': int(np.mean(allocated)) if allocated else None,
+            'us_per_frame': round(float(np.mean(timings)) * 1e6, 1) if timings else None,
+        }
+    tracemalloc.stop()
+
+    # Same footage through face_mesh both ways: flipped pixels against mirrored landmarks
+    flipped_mesh, mirrored_mesh = iris_api.create_face_mesh(), iris_api.create_face_mesh()
+    points = np.zeros((iris_api.NUM_LANDMARKS, 3))
+    cap = cv2.VideoCapture(args.video)
+    compared = agreed = 0
+    for _ in range(args.frames):
+        ret, frame = cap.read()
+        if not ret:
+            break
+        flipped = flipped_mesh.process(cv2.cvtColor(cv2.flip(frame, 1), cv2.COLOR_BGR2RGB))
+        mirrored = mirrored_mesh.process(iris_api.prepare_frame(frame))
+        if not (flipped.multi_face_landmarks and mirrored.multi_face_landmarks):
+            continue
+        expected = gesture_decisions(iris_api.landmarks_to_array(flipped.multi_face_landmarks[0], points), frame.shape)
+        actual = gesture_decisions(
+            iris_api.mirror_points(iris_api.landmarks_to_array(mirrored.multi_face_landmarks[0], points)), frame.shape
+        )
+        compared += 1
+        agreed += expected == actual
+    cap.release()
+
+    return {
+        'video': args.video,
+        'paths': paths,
+        'frames_with_face': compared,
+        'gesture_decisions_agreeing': round(agreed / compared, 3) if compared else None,
+    }
+
+
+DASHBOARD_PAGES = ('home', 'study', 'profile', 'call_help')
+
+
+def time_dashboard_page(app_path, page, reruns):
+    """
+    Script execution time of one dashboard page per rerun, as a logged-in user.
+    The first run pays for imports and cold caches and is reported on its own.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(app_path, default_timeout=30)
+    app.session_state.logged_in = True
+    app.session_state.show_modal = False
+    app.session_state.current_page = page
+
+    start = time.perf_counter()
+    app.run()
+    first_run = time.perf_counter() - start
+    if app.exception:
+        raise RuntimeError(f"Dashboard raised: {app.exception[0].message}")
+
+    durations = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        app.run()
+        durations.append(time.perf_counter() - start)
+    return {
+        'first_run_ms': round(first_run * 1000, 3),
+        'rerun': summarize_durations(durations),
+    }
+
+
+def free_port():
+    import socket
+
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def serve_dashboard(app_path, workdir, port, timeout=60):
+    """
+    `streamlit run app_path` headless on port from workdir; returns the process once it answers.
+    """
+    import requests
+
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'streamlit', 'run', app_path, '--server.headless', 'true',
+         '--server.port', str(port), '--browser.gatherUsageStats', 'false'],
+        cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/_stcore/health", timeout=1).ok:
+                return server
+        except requests.exceptions.ConnectionError:
+            pass
+        if server.poll() is not None:
+            break
+        time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("Streamlit server did not come up")
+
+
+def watch_dashboard_runs(url, seconds, full_reruns):
+    """
+    Open one session on a running dashboard and act as its browser for `seconds`: every fragment
+    the server asks to rerun on a timer (st.fragment(run_every=...)) is rerun at that interval, as
+    the frontend would. Then the timers stop and full_reruns whole-page reruns are requested one
+    after another, for a warm full run to compare with. Returns the durations of every run, from
+    its new_session to its script_finished message, keyed by 'first', 'fragment' and 'full'.
+    """
+    from websockets.sync.client import connect
+    from streamlit.proto.BackMsg_pb2 import BackMsg
+    from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+    durations = {'first': [], 'fragment': [], 'full': []}
+    timers = {}  # fragment id -> [interval, next due time]
+    page_script_hash = ''
+    running = None  # (kind, start) of the run in progress
+    with connect(url, subprotocols=['streamlit'], max_size=None) as websocket:
+        def rerun(fragment_id=''):
+            message = BackMsg()
+            message.rerun_script.page_script_hash = page_script_hash
+            message.rerun_script.fragment_id = fragment_id
+            message.rerun_script.is_auto_rerun = bool(fragment_id)
+            websocket.send(message.SerializeToString())
+
+        rerun()
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline or running is not None or full_reruns:
+            if time.perf_counter() >= deadline:
+                timers.clear()
+                if running is None:  # One at a time, so none is cut short by the next
+                    full_reruns -= 1
+                    running = ('full', None)
+                    rerun()
+            now = time.perf_counter()
+            for fragment_id, timer in timers.items():
+                if now >= timer[1]:
+                    timer[1] = now + timer[0]
+                    rerun(fragment_id)
+            wake = min([timer[1] for timer in timers.values()] + [max(deadline, now + 1)])
+            try:
+                raw = websocket.recv(timeout=max(0.001, wake - time.perf_counter()))
+            except TimeoutError:
+                continue
+            message = ForwardMsg.FromString(raw)
+            kind = message.WhichOneof('type')
+            if kind == 'new_session':
+                page_script_hash = message.new_session.page_script_hash or page_script_hash
+                if message.new_session.fragment_ids_this_run:
+                    running = ('fragment', time.perf_counter())
+                else:
+                    running = ('full' if time.perf_counter() >= deadline else 'first', time.perf_counter())
+            elif kind == 'auto_rerun':
+                interval = message.auto_rerun.interval
+                timers.setdefault(message.auto_rerun.fragment_id, [interval, time.perf_counter() + interval])
+            elif kind == 'stop_auto_rerun':
+                for fragment_id in message.stop_auto_rerun.fragment_ids:
+                    timers.pop(fragment_id, None)
+            elif kind == 'script_finished' and running is not None and running[1] is not None:
+                if message.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    durations[running[0]].append(time.perf_counter() - running[1])
+                running = None
+    return durations
+
+
+def bench_dashboard_live(args):
+    """
+    Full-script versus fragment-only runs of the home page over a fixed window, served by a real
+    Streamlit server to one logged-in session. Every fragment run is a tracking panel refresh that
+    would otherwise have been a full rerun of the page.
+    """
+    app_path = os.path.abspath(args.app)
+    translations = os.path.join(os.path.dirname(app_path), 'language_database.json')
+    with tempfile.TemporaryDirectory() as workdir:
+        if os.path.exists(translations):
+            shutil.copy(translations, workdir)
+        store = user_store.UserStore(os.path.join(workdir, 'users.db'))
+        store.remember(store.create_user('Benchmark', 'benchmark@example.com', 'x')['id'])  # Lands on the home page
+        store.close()
+        port = free_port()
+        server = serve_dashboard(app_path, workdir, port)
+        try:
+            durations = watch_dashboard_runs(f"ws://127.0.0.1:{port}/_stcore/stream", args.window, args.reruns)
+        finally:
+            server.terminate()
+            server.wait()
+    per_minute = 60 / args.window
+    full, fragment = durations['full'], durations['fragment']
+    return {
+        'app': args.app,
+        'window_seconds': args.window,
+        'full_runs_in_window': len(durations['first']),
+        'fragment_runs_in_window': len(fragment),
+        'full_script_runs_avoided_per_minute': round(len(fragment) * per_minute, 1),
+        'first_run': summarize_durations(durations['first']),
+        'warm_full_run': summarize_durations(full),
+        'fragment_run': summarize_durations(fragment),
+        'script_ms_saved_per_minute': round(
+            len(fragment) * per_minute * (np.median(full) - np.median(fragment)) * 1000, 1
+        ) if full and fragment else None,
+    }
+
+
+def bench_dashboard(args):
+    if args.live:
+        return bench_dashboard_live(args)
+    pages = DASHBOARD_PAGES if args.page == 'all' else (args.page,)
+    return {
+        'app': args.app,
+        'reruns': args.reruns,
+        'pages': {page: time_dashboard_page(os.path.abspath(args.app), page, args.reruns) for page in pages},
+    }
+
+
+def legacy_login(user_data, email, hashed_password):
+    """
+    The old app.py login: a scan over every record of user_data.json.
+    """
+    for name, user_info in user_data.items():
+        if isinstance(user_info, dict) and user_info.get('email') == email and user_info.get('password') == hashed_password:
+            return name
+    return None
+
+
+def fill_user_store(path, size, password):
+    """
+    A UserStore at path holding accounts user0..user{size-1}@example.com, all with one password hash.
+    Returns the store and the (name, email) of every account.
+    """
+    accounts = [(f"user{index}", f"user{index}@example.com") for index in range(size)]
+    store = user_store.UserStore(path)
+    with store.connection() as conn:
+        conn.executemany(
+            "INSERT INTO users (name, email, password, created_at) VALUES (?, ?, ?, 0)",
+            [(name, email, password) for name, email in accounts],
+        )
+    return store, accounts
+
+
+def bench_users(args):
+    """
+    Login and signup latency against account stores of growing size, SQLite store versus the
+    old JSON scan. Logins look up random existing accounts; signups reuse a taken email so
+    nothing is written and the store stays the same size.
+    """
+    rng = np.random.default_rng(0)
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            password = hashlib.sha256(b'password').hexdigest()
+            store, accounts = fill_user_store(os.path.join(directory, f"users-{size}.db"), size, password)
+            user_data = {name: {'email': email, 'password': password, 'logged_in': True} for name, email in accounts}
+
+            emails = [accounts[index][1] for index in rng.integers(0, size, args.logins)]
+            logins, signups, legacy_logins = [], [], []
+            for email in emails:
+                start = time.perf_counter()
+                user = store.authenticate(email, password)
+                logins.append(time.perf_counter() - start)
+                assert user is not None
+                start = time.perf_counter()
+                store.create_user('someone', email, password)
+                signups.append(time.perf_counter() - start)
+            for email in emails[:max(1, args.logins // 10)]:  # The scan gets slow, a tenth of the logins is plenty
+                start = time.perf_counter()
+                legacy_login(user_data, email, password)
+                legacy_logins.append(time.perf_counter() - start)
+            store.close()
+            results.append({
+                'accounts': size,
+                'login': summarize_durations(logins),
+                'signup_duplicate_email': summarize_durations(signups),
+                'legacy_json_login': summarize_durations(legacy_logins),
+            })
+    return {'logins_per_size': args.logins, 'results': results}
+
+
+def bench_auth(args):
+    """
+    Login and signup through the dashboard script itself, timed from the button click to the end of
+    the rerun it triggers, against account stores of growing size. Each store gets its own
+    working directory, since app.py opens users.db relative to it.
+    """
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    app_path = os.path.abspath(args.app)
+    translations = os.path.join(os.path.dirname(app_path), 'language_database.json')
+    password = 'password'
+    rng = np.random.default_rng(0)
+    results = []
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        try:
+            for size in args.sizes:
+                workdir = os.path.join(directory, str(size))
+                os.makedirs(workdir)
+                if os.path.exists(translations):
+                    shutil.copy(translations, workdir)
+                os.chdir(workdir)
+                store, accounts = fill_user_store('users.db', size, hashlib.sha256(password.encode()).hexdigest())
+                st.cache_resource.clear()  # The app's cached store still points at the previous directory
+
+                logins, signups = [], []
+                for attempt in range(args.attempts):
+                    app = AppTest.from_file(app_path, default_timeout=30)
+                    app.session_state.show_login_form = True
+                    app.run()
+                    app.text_input[0].input(accounts[rng.integers(0, size)][1])
+                    app.text_input[1].input(password)
+                    start = time.perf_counter()
+                    app.main.button[0].click().run()
+                    logins.append(time.perf_counter() - start)
+                    if not app.session_state.logged_in:
+                        raise RuntimeError("Login through the dashboard failed")
+
+                    app = AppTest.from_file(app_path, default_timeout=30)
+                    app.run()
+                    app.text_input[0].input(f"new{attempt}")
+                    app.text_input[1].input(f"new{attempt}@example.com")
+                    app.text_input[2].input(password)
+                    start = time.perf_counter()
+                    app.main.button[0].click().run()
+                    signups.append(time.perf_counter() - start)
+                    if not app.session_state.logged_in:
+                        raise RuntimeError("Signup through the dashboard failed")
+                    store.forget()  # Signup remembers the device; the next attempt has to see the login form
+                store.close()
+                results.append({
+                    'accounts': size,
+                    'login': summarize_durations(logins),
+                    'signup': summarize_durations(signups),
+                })
+        finally:
+            os.chdir(cwd)
+            st.cache_resource.clear()
+    return {'app': args.app, 'attempts_per_size': args.attempts, 'results': results}
+
+
+def serve_api(server_kind):
+    """
+    Serve iris_api.app on a free local port from a background thread; returns (base_url, shutdown).
+    """
+    if server_kind == 'waitress':
+        from waitress import create_server
+
+        server = create_server(iris_api.app, host='127.0.0.1', port=0, threads=iris_api.SERVER_THREADS)
+        threading.Thread(target=server.run, name="api-server", daemon=True).start()
+        return f"http://127.0.0.1:{server.effective_port}", server.close
+    from werkzeug.serving import make_server
+
+    server = make_server('127.0.0.1', 0, iris_api.app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="api-server", daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", server.shutdown
+
+
+def bench_api(args):
+    """
+    /start and /stop latency and /status throughput of the Flask API while concurrent clients poll
+    /status, with looped footage standing in for the camera and actions dropped. Control calls
+    return before the pipeline has changed state, so the time until /state reports running or
+    stopped is measured separately.
+    """
+    import requests
+
+    frames = load_frames(args.footage, args.max_frames)
+    iris_api.create_service()  # The API's own globals, then the parts this benchmark replaces
+    iris_api.pipeline = iris_api.TrackingPipeline(
+        LoopingCapture(frames, args.fps, float('inf')),
+        sink=iris_api.NullSink(),
+    )
+    iris_api.lifecycle = iris_api.TrackerLifecycle(iris_api.pipeline)
+    base_url, shutdown_server = serve_api(args.server)
+
+    done = threading.Event()
+    status_latencies = [[] for _ in range(args.clients)]
+    failures = [0] * (args.clients + 1)  # One per status client, the last for control calls
+
+    def status_client(index):
+        session = requests.Session()
+        while not done.is_set():
+            start = time.perf_counter()
+            response = session.get(f"{base_url}/status", timeout=10)
+            status_latencies[index].append(time.perf_counter() - start)
+            failures[index] += not response.ok
+
+    def control(session, endpoint, latencies, settle_latencies, settled_state):
+        start = time.perf_counter()
+        response = session.post(f"{base_url}{endpoint}", timeout=30)
+        latencies.append(time.perf_counter() - start)
+        failures[-1] += not response.ok
+        state = response.json()
+        while state['state'] != settled_state:
+            state = session.get(f"{base_url}/state", params={'since': state['version']}, timeout=60).json()
+        settle_latencies.append(time.perf_counter() - start)
+
+    clients = [threading.Thread(target=status_client, args=(index,), daemon=True) for index in range(args.clients)]
+    start_latencies, stop_latencies = [], []
+    running_latencies, stopped_latencies = [], []
+    started = time.perf_counter()
+    try:
+        for client in clients:
+            client.start()
+        session = requests.Session()
+        for _ in range(args.cycles):
+            control(session, '/start', start_latencies, running_latencies, 'running')
+            time.sleep(args.hold)
+            control(session, '/stop', stop_latencies, stopped_latencies, 'stopped')
+            time.sleep(args.hold)
+    finally:
+        done.set()
+        for client in clients:
+            client.join()
+        elapsed = time.perf_counter() - started
+        iris_api.lifecycle.request('stopped')
+        with iris_api.lifecycle.changed:
+            iris_api.lifecycle.changed.wait_for(lambda: iris_api.lifecycle.state == 'stopped', 30)
+        iris_api.lifecycle.shutdown()
+        shutdown_server()
+
+    latencies = [latency for client_latencies in status_latencies for latency in client_latencies]
+    return {
+        'footage': args.footage,
+        'clients': args.clients,
+        'cycles': args.cycles,
+        'server': args.server,
+        'start': summarize_durations(start_latencies),
+        'stop': summarize_durations(stop_latencies),
+        'start_to_running': summarize_durations(running_latencies),
+        'stop_to_stopped': summarize_durations(stopped_latencies),
+        'status': {
+            'requests': len(latencies),
+            'requests_per_second': round(len(latencies) / elapsed, 1),
+            **summarize_durations(latencies),
+        },
+        'failed_requests': sum(failures),
+    }
+
+
+def bench_telemetry(args):
+    """
+    The /telemetry stream with looped footage as the camera: the tracker's frame rate with no
+    subscribers and with several, how many samples each stream client receives per second and how
+    old they are on arrival, and whether a subscriber that never reads gets dropped.
+    """
+    import requests
+
+    frames = load_frames(args.footage, args.max_frames)
+    iris_api.create_service()  # The API's own globals, then the parts this benchmark replaces
+    hub = iris_api.telemetry.TelemetryHub(max_subscribers=args.clients + 1)
+    iris_api.telemetry_hub = hub
+    iris_api.pipeline = iris_api.TrackingPipeline(
+        LoopingCapture(frames, args.fps, float('inf')),
+        sink=iris_api.NullSink(),
+        telemetry=hub,
+    )
+    iris_api.lifecycle = iris_api.TrackerLifecycle(iris_api.pipeline)
+    base_url, shutdown_server = serve_api('waitress')
+
+    def tracked_fps():
+        before, start = iris_api.pipeline.frames_acted, time.perf_counter()
+        time.sleep(args.seconds)
+        return round((iris_api.pipeline.frames_acted - before) / (time.perf_counter() - start), 2)
+
+    done = threading.Event()
+    received = [collections.Counter() for _ in range(args.clients)]
+    sample_ages = [[] for _ in range(args.clients)]
+
+    def stream_client(index):
+        with requests.get(f"{base_url}/telemetry", stream=True, timeout=(1, 30)) as response:
+            kind = None
+            for line in response.iter_lines(decode_unicode=True):
+                if done.is_set():
+                    break
+                if line.startswith('event:'):
+                    kind = line[6:].strip()
+                elif line.startswith('data:'):
+                    received[index][kind] += 1
+                    if kind == 'frame':
+                        sample_ages[index].append(time.time() - json.loads(line[5:])['time'])
+
+    try:
+        iris_api.lifecycle.request('running')
+        with iris_api.lifecycle.changed:
+            iris_api.lifecycle.changed.wait_for(lambda: iris_api.lifecycle.state == 'running', 60)
+        time.sleep(1.0)  # Let the frame rate settle
+        without = tracked_fps()
+
+        stalled = hub.subscribe()  # Never read from
+        clients = [threading.Thread(target=stream_client, args=(index,), daemon=True) for index in range(args.clients)]
+        for client in clients:
+            client.start()
+        time.sleep(0.5)
+        started = time.perf_counter()
+        with_subscribers = tracked_fps()
+        elapsed = time.perf_counter() - started
+        done.set()
+        for client in clients:
+            client.join(timeout=5)
+    finally:
+        iris_api.lifecycle.request('stopped')
+        with iris_api.lifecycle.changed:
+            iris_api.lifecycle.changed.wait_for(lambda: iris_api.lifecycle.state == 'stopped', 30)
+        iris_api.lifecycle.shutdown()
+        shutdown_server()
+
+    ages = [age for client_ages in sample_ages for age in client_ages]
+    return {
+        'footage': args.footage,
+        'clients': args.clients,
+        'tracker_fps_without_subscribers': without,
+        'tracker_fps_with_subscribers': with_subscribers,
+        'frame_samples_per_client_per_second': round(sum(r['frame'] for r in received) / args.clients / elapsed, 2),
+        'gestures_per_client': round(sum(r['gesture'] for r in received) / args.clients, 1),
+        'sample_age': summarize_durations(ages),
+        'stalled_subscriber_dropped': stalled.dropped,
+        'hub': hub.stats(),
+    }
+
+
+def bench_recorder(args):
+    """
+    Flight recorder cost: the live pipeline over looped footage with the recorder off and on,
+    how fast the writer thread drains frames into segments, disk use per hour, and how long
+    reading a short window back takes next to reading the whole recording.
+    """
+    frames = load_frames(args.footage, 300)
+    directory = tempfile.mkdtemp(prefix='iris-recorder-')
+    try:
+        runs = {}
+        for name in ('off', 'on'):
+            recorder = landmark_recorder.LandmarkRecorder(directory) if name == 'on' else None
+            pipeline = iris_api.TrackingPipeline(
+                LoopingCapture(frames, args.fps, args.seconds),
+                sink=iris_api.NullSink(),
+                recorder=recorder,
+            )
+            start = time.perf_counter()
+            pipeline.run()
+            elapsed = time.perf_counter() - start
+            stats = pipeline.stats()
+            runs[name] = {
+                'acted_fps': round(stats['frames_acted'] / elapsed, 2),
+                'mean_latency_ms': stats['mean_latency_ms'],
+                'max_latency_ms': stats['max_latency_ms'],
+            }
+            if recorder:
+                recorder.close()
+                runs[name]['recorder'] = recorder.stats()
+
+        # Bulk write in ring-sized batches to time the writer on its own
+        recorder = landmark_recorder.LandmarkRecorder(directory)
+        points = np.random.default_rng(0).random((iris_api.NUM_LANDMARKS, 3))
+        now = time.time()
+        start = time.perf_counter()
+        for batch in range(0, args.frames, landmark_recorder.RING_FRAMES):
+            for index in range(batch, min(batch + landmark_recorder.RING_FRAMES, args.frames)):
+                recorder.record_frame(now + index / args.fps, points, (480, 640, 3))
+            recorder.flush()
+        write_seconds = time.perf_counter() - start
+        frames_written = recorder.frames_written
+        recorder.close()
+
+        reader = landmark_recorder.RecordingReader(directory)
+        first, last = reader.time_range()
+        middle = (first + last) / 2
+        start = time.perf_counter()
+        window, _, _ = reader.series(middle, middle + args.window)
+        window_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        everything, _, _ = reader.series()
+        full_seconds = time.perf_counter() - start
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    layout = landmark_recorder.segment_layout(landmark_recorder.SEGMENT_FRAMES, landmark_recorder.SEGMENT_EVENTS)
+    frame_bytes = layout.itemsize / landmark_recorder.SEGMENT_FRAMES
+    return {
+        'footage': args.footage,
+        'source_fps': args.fps,
+        'pipeline': runs,
+        'writer_frames_per_second': round(frames_written / write_seconds, 1),
+        'segment_bytes_per_frame': round(frame_bytes, 1),
+        'disk_mb_per_hour': round(frame_bytes * args.fps * 3600 / 1e6, 1),
+        'read_window': {'seconds': args.window, 'frames': len(window), 'ms': round(window_seconds * 1000, 2)},
+        'read_all': {'frames': len(everything), 'ms': round(full_seconds * 1000, 2)},
+    }
+
+
+def bench_profile(args):
+    """
+    POST /profile against a tracker replaying looped footage: the frame rate before, during and
+    after a window of each mode, how long each request takes, and what it returns.
+    """
+    import requests
+
+    frames = load_frames(args.footage, args.max_frames)
+    iris_api.create_service()  # The API's own globals, then the parts this benchmark replaces
+    iris_api.pipeline = iris_api.TrackingPipeline(
+        LoopingCapture(frames, args.fps, float('inf')),
+        sink=iris_api.NullSink(),
+    )
+    iris_api.lifecycle = iris_api.TrackerLifecycle(iris_api.pipeline)
+    base_url, shutdown_server = serve_api('waitress')
+
+    def tracked_fps():
+        before, start = iris_api.pipeline.frames_acted, time.perf_counter()
+        time.sleep(args.seconds)
+        return round((iris_api.pipeline.frames_acted - before) / (time.perf_counter() - start), 2)
+
+    results = {}
+    try:
+        iris_api.lifecycle.request('running')
+        with iris_api.lifecycle.changed:
+            iris_api.lifecycle.changed.wait_for(lambda: iris_api.lifecycle.state == 'running', 60)
+        time.sleep(1.0)  # Let the frame rate settle
+        results['fps_without_profiling'] = tracked_fps()
+        for mode in iris_api.tracker_profiler.PROFILE_MODES:
+            start = time.perf_counter()
+            response = requests.post(f"{base_url}/profile", params={'seconds': args.seconds, 'mode': mode}, timeout=args.seconds + 30)
+            elapsed = time.perf_counter() - start
+            response.raise_for_status()
+            window = response.json()
+            profile = window.pop('profile')
+            results[mode] = {
+                'request_seconds': round(elapsed, 3),
+                'fps_while_profiling': window['fps'],
+                'stages': window['stages'],
+                'profile_lines': profile.count('\n'),
+                'profile_bytes': len(profile),
+                **{key: window[key] for key in ('samples', 'threads', 'incomplete_threads') if key in window},
+            }
+        dump = requests.post(f"{base_url}/profile", params={'seconds': 1, 'mode': 'cprofile', 'format': 'pstats'}, timeout=30)
+        results['pstats_dump_bytes'] = len(dump.content)
+        results['profiler_removed'] = iris_api.pipeline.profiler is None and iris_api.pipeline.dispatcher.profiler is None
+        results['fps_after_profiling'] = tracked_fps()
+    finally:
+        iris_api.lifecycle.request('stopped')
+        with iris_api.lifecycle.changed:
+            iris_api.lifecycle.changed.wait_for(lambda: iris_api.lifecycle.state == 'stopped', 30)
+        iris_api.lifecycle.shutdown()
+        shutdown_server()
+    return {'footage': args.footage, 'seconds': args.seconds, **results}
+
+
+def bench_config(args):
+    """
+    PUT /config against a tracker replaying looped footage: the frame rate while thresholds are
+    swapped many times a second, then how long a face_mesh confidence change holds up the action
+    stage while the camera keeps capturing.
+    """
+    import requests
+
+    frames = load_frames(args.footage, args.max_frames)
+    iris_api.create_service()  # The API's own globals, then the parts this benchmark replaces
+    iris_api.tracker_settings = iris_api.tracker_config.ConfigStore(iris_api.DEFAULT_CONFIG)  # No profiles file
+    iris_api.pipeline = iris_api.TrackingPipeline(
+        LoopingCapture(frames, args.fps, float('inf')),
+        sink=iris_api.NullSink(),
+        inference_mode=args.inference,
+        settings=iris_api.tracker_settings,
+    )
+    iris_api.lifecycle = iris_api.TrackerLifecycle(iris_api.pipeline)
+    base_url, shutdown_server = serve_api('waitress')
+    pipeline = iris_api.pipeline
+
+    def tracked_fps():
+        before, start = pipeline.frames_acted, time.perf_counter()
+        time.sleep(args.seconds)
+        return round((pipeline.frames_acted - before) / (time.perf_counter() - start), 2)
+
+    results = {}
+    try:
+        iris_api.lifecycle.request('running')
+        with iris_api.lifecycle.changed:
+            iris_api.lifecycle.changed.wait_for(lambda: iris_api.lifecycle.state == 'running', 60)
+        time.sleep(1.0)  # Let the frame rate settle
+        results['fps_without_updates'] = tracked_fps()
+
+        stop = threading.Event()
+        put_seconds = []
+
+        def update_thresholds():
+            session = requests.Session()
+            step = 0
+            while not stop.is_set():
+                step += 1
+                start = time.perf_counter()
+                session.put(f"{base_url}/config", json={'blink_threshold': 0.2 + 0.01 * (step % 5), 'scroll_amount': 20 + step % 10}, timeout=5).raise_for_status()
+                put_seconds.append(time.perf_counter() - start)
+                stop.wait(1.0 / args.updates)
+
+        versions_before = iris_api.tracker_settings.version
+        updater = threading.Thread(target=update_thresholds, daemon=True)
+        updater.start()
+        results['fps_with_updates'] = tracked_fps()
+        stop.set()
+        updater.join()
+        results['threshold_updates'] = iris_api.tracker_settings.version - versions_before
+        results['put_latency'] = summarize_durations(put_seconds)
+
+        # Watch the action stage through a face_mesh rebuild
+        acted, captured = [], []
+        watching = threading.Event()
+
+        def watch():
+            while not watching.is_set():
+                acted.append((time.perf_counter(), pipeline.frames_acted))
+                captured.append(pipeline.frames_captured)
+                time.sleep(0.002)
+
+        watcher = threading.Thread(target=watch, daemon=True)
+        watcher.start()
+        time.sleep(0.5)
+        rebuilds_before = pipeline.face_mesh_rebuilds
+        requests.put(f"{base_url}/config", json={'min_detection_confidence': 0.6, 'min_tracking_confidence': 0.6}, timeout=5).raise_for_status()
+        time.sleep(3.0)
+        watching.set()
+        watcher.join()
+        longest_gap, last_change = 0.0, acted[0][0]
+        for (when, count), (_, previous) in zip(acted[1:], acted):
+            if count != previous:
+                longest_gap = max(longest_gap, when - last_change)
+                last_change = when
+        results['rebuild'] = {
+            'rebuilds': pipeline.face_mesh_rebuilds - rebuilds_before,
+            'rebuild_ms': pipeline.last_rebuild_ms,
+            'longest_action_gap_ms': round(longest_gap * 1000, 1),
+            'frames_captured_meanwhile': captured[-1] - captured[0],
+        }
+        results['fps_after_rebuild'] = tracked_fps()
+    finally:
+        iris_api.lifecycle.request('stopped')
+        with iris_api.lifecycle.changed:
+            iris_api.lifecycle.changed.wait_for(lambda: iris_api.lifecycle.state == 'stopped', 30)
+        iris_api.lifecycle.shutdown()
+        shutdown_server()
+    return {'footage': args.footage, 'inference': args.inference, 'updates_per_second': args.updates, **results}
+
+
+def bench_startup(args):
+    """
+    Cold start of the tracker service in fresh interpreters: how long importing iris_api takes, how
+    soon after launch iris_api.py answers /status, and how soon a /start sent right then gets its
+    first frame through the pipeline.
+    """
+    import requests
+
+    script_dir = os.path.dirname(os.path.abspath(iris_api.__file__))
+    base_url = f"http://127.0.0.1:{iris_api.SERVER_PORT}"
+    session = requests.Session()
+    try:
+        session.get(f"{base_url}/status", timeout=1)
+        raise RuntimeError(f"Something is already serving {base_url}; stop it first")
+    except requests.exceptions.ConnectionError:
+        pass
+
+    import_seconds = []
+    for _ in range(args.runs):
+        output = subprocess.run(
+            [sys.executable, '-c', "import time; start = time.perf_counter(); import iris_api; print(time.perf_counter() - start)"],
+            cwd=script_dir, capture_output=True, text=True, check=True,
+        ).stdout
+        import_seconds.append(float(output.split()[-1]))
+
+    api_up, first_frame, reports = [], [], []
+    for _ in range(args.runs):
+        launched = time.perf_counter()
+        server = subprocess.Popen([sys.executable, 'iris_api.py'], cwd=script_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            while True:
+                if server.poll() is not None:
+                    raise RuntimeError("iris_api.py exited during startup")
+                try:
+                    session.get(f"{base_url}/status", timeout=5).raise_for_status()
+                    break
+                except requests.exceptions.ConnectionError:
+                    time.sleep(0.005)
+            api_up.append(time.perf_counter() - launched)
+
+            session.post(f"{base_url}/start", json={'source': args.source}, timeout=5).raise_for_status()
+            while True:
+                status = session.get(f"{base_url}/status", timeout=5).json()
+                if status['pipeline']['frames_acted']:
+                    break
+                if time.perf_counter() - launched > 120:
+                    raise RuntimeError("No frame reached the action stage within 120s of launch")
+                time.sleep(0.005)
+            first_frame.append(time.perf_counter() - launched)
+            reports.append(status.get('startup'))
+            session.post(f"{base_url}/stop", timeout=5)
+        finally:
+            server.terminate()
+            server.wait(10)
+    return {
+        'runs': args.runs,
+        'import': summarize_durations(import_seconds),
+        'launch_to_api_up': summarize_durations(api_up),
+        'launch_to_first_frame': summarize_durations(first_frame),
+        'service_reports': reports,  # The service's own /status startup report of each launch
+    }
+
+
+def bench_capture(args):
+    """
+    Read latency and frame rate a frame source actually delivers with the given capture settings,
+    next to what it reports. SOURCE is a camera index, a video file, an image directory or 'synthetic'.
+    """
+    options = {key: getattr(args, key) for key in ('width', 'height', 'fps', 'buffer_size') if getattr(args, key)}
+    if args.fourcc is not None:
+        options['fourcc'] = args.fourcc or None
+    source, settings = iris_api.capture_options({'source': args.source, **options})
+    cap = iris_api.open_capture(source, settings)
+    reported = iris_api.describe_capture(cap)
+    reads = []
+    shape = None
+    started = time.perf_counter()
+    try:
+        for _ in range(args.frames):
+            start = time.perf_counter()
+            ret, frame = cap.read()
+            if not ret:
+                break
+            reads.append(time.perf_counter() - start)
+            shape = frame.shape
+    finally:
+        cap.release()
+    elapsed = time.perf_counter() - started
+    return {
+        'source': args.source,
+        'requested': {**iris_api.CAPTURE_SETTINGS, **(settings or {})},
+        'reported': reported,
+        'frame_shape': shape,
+        'frames': len(reads),
+        'fps': round(len(reads) / elapsed, 2) if elapsed else None,
+        'read': summarize_durations(reads),
+    }
+
+
+def bench_suite(args):
+    """
+    Every dashboard and API benchmark with its default settings, for a before/after comparison.
+    """
+    parser = build_parser()
+    runs = {
+        'dashboard': ['dashboard'],
+        'users': ['users'],
+        'auth': ['auth'],
+        'api': ['api', args.footage],
+    }
+    results = {}
+    for name, argv in runs.items():
+        run_args = parser.parse_args(argv)
+        results[name] = run_args.run(run_args)
+    return results
+
+
+def run_metadata():
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', help='Also write the results and run metadata to this JSON file')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    landmarks = subparsers.add_parser('landmarks', help='Landmark extraction and eye metric cost per frame')
+    landmarks.add_argument('--frames', type=int, default=5000)
+    landmarks.set_defaults(run=bench_landmarks)
+
+    replay = subparsers.add_parser('replay', help='FPS and per-stage latency over recorded footage')
+    replay.add_argument('footage', help='Video file or directory of images')
+    replay.add_argument('--max-frames', type=int, default=None)
+    replay.add_argument('--roi', action='store_true', help='Crop inference input to the last face')
+    replay.set_defaults(run=bench_replay)
+
+    inference = subparsers.add_parser('inference', help='In-thread versus shared-memory worker inference')
+    inference.add_argument('footage', help='Video file or directory of images, played in a loop')
+    inference.add_argument('--seconds', type=float, default=10.0)
+    inference.add_argument('--fps', type=float, default=30.0, help='Rate the looped footage is fed at')
+    inference.add_argument('--gil-load', type=int, default=2, help='Busy Python threads running alongside')
+    inference.add_argument('--roi', action='store_true', help='Crop inference input to the last face')
+    inference.set_defaults(run=bench_inference)
+
+    governor = subparsers.add_parser('governor', help='Pipeline frame rate with the quality governor off and on')
+    governor.add_argument('footage', help='Video file or directory of images, played in a loop')
+    governor.add_argument('--seconds', type=float, default=20.0)
+    governor.add_argument('--fps', type=float, default=30.0, help='Rate the looped footage is fed at')
+    governor.add_argument('--target', type=float, default=iris_api.TARGET_FPS, help='Frame rate the governor aims for')
+    governor.add_argument('--gil-load', type=int, default=3, help='Busy Python threads running alongside')
+    governor.add_argument('--roi', action='store_true', help='Crop inference input to the last face')
+    governor.set_defaults(run=bench_governor)
+
+    sweep = subparsers.add_parser('sweep', help='Offline gesture threshold sweep over a synthetic recording')
+    sweep.add_argument('--hours', type=float, default=1.0, help='Length of the synthetic recording')
+    sweep.add_argument('--fps', type=float, default=30.0)
+    sweep.add_argument('--check-frames', type=int, default=20000, help='Frames replayed through GestureEngine to check the counts')
+    sweep.set_defaults(run=bench_sweep)
+
+    frames = subparsers.add_parser('frames', help='Allocation and time of the camera-to-RGB frame path')
+    frames.add_argument('video', help='Video file standing in for the camera')
+    frames.add_argument('--frames', type=int, default=300)
+    frames.set_defaults(run=bench_frames)
+
+    dashboard = subparsers.add_parser('dashboard', help='Streamlit script execution time per rerun')
+    dashboard.add_argument('--app', default='app.py')
+    dashboard.add_argument('--page', default='all', choices=('all',) + DASHBOARD_PAGES)
+    dashboard.add_argument('--reruns', type=int, default=50)
+    dashboard.add_argument('--live', action='store_true', help='Count full-script versus fragment runs on a served home page instead')
+    dashboard.add_argument('--window', type=float, default=60.0, help='Seconds to watch with --live, before --reruns full reruns')
+    dashboard.set_defaults(run=bench_dashboard)
+
+    users = subparsers.add_parser('users', help='Login and signup latency against account stores of growing size')
+    users.add_argument('--sizes', type=int, nargs='+', default=[10, 1000, 100000])
+    users.add_argument('--logins', type=int, default=2000)
+    users.set_defaults(run=bench_users)
+
+    auth = subparsers.add_parser('auth', help='Dashboard login and signup time against account stores of growing size')
+    auth.add_argument('--app', default='app.py')
+    auth.add_argument('--sizes', type=int, nargs='+', default=[10, 1000, 100000])
+    auth.add_argument('--attempts', type=int, default=20)
+    auth.set_defaults(run=bench_auth)
+
+    api = subparsers.add_parser('api', help='Flask control latency and status throughput under concurrent clients')
+    api.add_argument('footage', help='Video file or directory of images, played in a loop as the camera')
+    api.add_argument('--max-frames', type=int, default=300, help='Frames of footage to loop')
+    api.add_argument('--fps', type=float, default=30.0, help='Rate the looped footage is fed at')
+    api.add_argument('--clients', type=int, default=8, help='Threads polling /status')
+    api.add_argument('--cycles', type=int, default=10, help='/start and /stop pairs')
+    api.add_argument('--hold', type=float, default=1.0, help='Seconds between control calls')
+    api.add_argument('--server', choices=('waitress', 'werkzeug'), default='waitress')
+    api.set_defaults(run=bench_api)
+
+    telemetry = subparsers.add_parser('telemetry', help='Live telemetry stream rate, freshness and tracker overhead')
+    telemetry.add_argument('footage', help='Video file or directory of images, played in a loop as the camera')
+    telemetry.add_argument('--max-frames', type=int, default=300, help='Frames of footage to loop')
+    telemetry.add_argument('--fps', type=float, default=30.0, help='Rate the looped footage is fed at')
+    telemetry.add_argument('--clients', type=int, default=3, help='Stream clients reading /telemetry')
+    telemetry.add_argument('--seconds', type=float, default=10.0, help='Measurement time with and without clients')
+    telemetry.set_defaults(run=bench_telemetry)
+
+    recorder = subparsers.add_parser('recorder', help='Flight recorder overhead, write rate, disk use and read time')
+    recorder.add_argument('footage', help='Video file or directory of images, played in a loop')
+    recorder.add_argument('--seconds', type=float, default=15.0, help='Pipeline run time with the recorder off and on')
+    recorder.add_argument('--fps', type=float, default=30.0, help='Rate the looped footage is fed at')
+    recorder.add_argument('--frames', type=int, default=27000, help='Frames written in bulk afterwards')
+    recorder.add_argument('--window', type=float, default=10.0, help='Seconds of recording read back')
+    recorder.set_defaults(run=bench_recorder)
+
+    profile = subparsers.add_parser('profile', help='Tracker frame rate while /profile samples or runs cProfile')
+    profile.add_argument('footage', help='Video file or directory of images, played in a loop as the camera')
+    profile.add_argument('--max-frames', type=int, default=300, help='Frames of footage to loop')
+    profile.add_argument('--fps', type=float, default=30.0, help='Rate the looped footage is fed at')
+    profile.add_argument('--seconds', type=float, default=10.0, help='Length of each profile window and fps measurement')
+    profile.set_defaults(run=bench_profile)
+
+    config = subparsers.add_parser('config', help='Tracker frame rate through live /config threshold swaps and a face_mesh rebuild')
+    config.add_argument('footage', help='Video file or directory of images, played in a loop as the camera')
+    config.add_argument('--max-frames', type=int, default=300, help='Frames of footage to loop')
+    config.add_argument('--fps', type=float, default=30.0, help='Rate the looped footage is fed at')
+    config.add_argument('--seconds', type=float, default=10.0, help='Measurement time with and without updates')
+    config.add_argument('--updates', type=float, default=20.0, help='Threshold updates per second')
+    config.add_argument('--inference', choices=iris_api.INFERENCE_MODES, default='thread', help='Where face_mesh runs')
+    config.set_defaults(run=bench_config)
+
+    startup = subparsers.add_parser('startup', help='iris_api import time and how soon a launched service answers and tracks')
+    startup.add_argument('--runs', type=int, default=3, help='Fresh interpreters to time')
+    startup.add_argument('--source', default=iris_api.SYNTHETIC_SOURCE, help='Frame source for the first /start')
+    startup.set_defaults(run=bench_startup)
+
+    capture = subparsers.add_parser('capture', help='Read latency and frame rate a source delivers with given settings')
+    capture.add_argument('source', help="Camera index, video file, image directory or 'synthetic'")
+    capture.add_argument('--frames', type=int, default=300)
+    capture.add_argument('--width', type=int)
+    capture.add_argument('--height', type=int)
+    capture.add_argument('--fps', type=float)
+    capture.add_argument('--fourcc', help="Four-character code, or '' for the driver default")
+    capture.add_argument('--buffer-size', type=int)
+    capture.set_defaults(run=bench_capture)
+
+    suite = subparsers.add_parser('suite', help='dashboard, users, auth and api benchmarks with default settings')
+    suite.add_argument('footage', help='Footage for the api benchmark')
+    suite.set_defaults(run=bench_suite)
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    results = args.run(args)
+    if args.output:
+        options = {key: value for key, value in vars(args).items() if key not in ('run', 'output')}
+        with open(args.output, 'w') as f:
+            json.dump({'benchmark': options, 'run': run_metadata(), 'results': results}, f, indent=2)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,385 @@
+"""
+Offline gesture analysis over recorded landmark series.
+
+A series is every frame's face mesh as an (N, 478, 3) array of normalized landmarks, mirrored
+as GestureEngine receives them, with NaN rows for frames where no face was found. The eye
+metrics of all frames are computed in one NumPy pass, then whole grids of thresholds are swept
+at once to count the scrolls, blinks and clicks GestureEngine would have produced with each
+setting, instead of trying values live.
+
+Usage:
+    python gesture_analysis.py events SERIES [--fps 30] [--frame-size 640x480] [--check]
+    python gesture_analysis.py sweep SERIES [--horizontal 0.05:0.3:0.025] [--vertical 0.05:0.3:0.05]
+        [--blink 0.1:0.3:0.02] [--close-click 1:5:0.5] [--stable 2:8:1] [--output sweep.csv]
+
+SERIES is a .npy landmark array, or a .npz holding 'points' and optionally 'timestamps'
+(seconds) and 'frame_shape'. Without timestamps, frames are --fps apart.
+A grid is start:stop:step (stop included) or a comma-separated list of values.
+"""
+import argparse
+import csv
+import json
+import time
+
+import numpy as np
+
+import iris_api
+
+METRICS_CHUNK = 65536  # Frames converted per step, so hours of memmapped footage never sit in memory as float64
+STABLE_MOVEMENT = 0.5  # Iris position change GestureEngine still treats as holding still
+DEFAULT_FPS = 30.0
+DEFAULT_FRAME_SIZE = (640, 480)  # width, height
+
+# Grids swept when none is given, centred on the shipped thresholds
+DEFAULT_GRIDS = {
+    'horizontal': '0.05:0.3:0.025',
+    'vertical': '0.05:0.3:0.05',
+    'blink': '0.1:0.3:0.02',
+    'close_click': '1:5:0.5',
+    'stable': '2:8:1',
+}
+COUNT_COLUMNS = (
+    'scroll_up', 'scroll_down', 'look_up_frames', 'look_down_frames',
+    'left_blinks', 'right_blinks', 'closure_clicks', 'dwell_clicks', 'clicks',
+)
+
+
+def position_ratios(gaze):
+    """
+    calculate_position_ratio for many frames: gaze is (N, 2 eyes, 8, xy) in pixels, ordered like
+    GAZE_INDEX. Returns (horizontal, vertical) ratios, each (N, 2) indexed [frame, left/right eye].
+    """
+    iris_centers = gaze[:, :, 4:].mean(axis=2)
+    left, right, top, bottom = gaze[:, :, 0], gaze[:, :, 1], gaze[:, :, 2], gaze[:, :, 3]
+    horizontal = (iris_centers[..., 0] - left[..., 0]) / (right[..., 0] - left[..., 0])
+    vertical = (iris_centers[..., 1] - top[..., 1]) / (bottom[..., 1] - top[..., 1])
+    return horizontal, vertical
+
+
+def eye_aspect_ratios(gaze):
+    """
+    detect_blink_or_close for many frames: the (N, 2) eye aspect ratios of both eyes.
+    """
+    spans = gaze[:, :, 0:4:2] - gaze[:, :, 1:4:2]  # left - right, top - bottom
+    lengths = np.sqrt((spans * spans).sum(axis=3))
+    return lengths[..., 1] / lengths[..., 0]
+
+
+def movement_directions(horizontal, vertical, sensitivity_horizontal=None, sensitivity_vertical=None):
+    """
+    detect_movement for many frames: DIRECTIONS codes shaped like the ratios.
+    Thresholds default to the ones the tracker runs with.
+    """
+    if sensitivity_horizontal is None:
+        sensitivity_horizontal = iris_api.SENSITIVITY_HORIZONTAL
+    if sensitivity_vertical is None:
+        sensitivity_vertical = iris_api.SENSITIVITY_VERTICAL
+    return np.select(
+        [
+            horizontal < 0.5 - sensitivity_horizontal,
+            horizontal > 0.5 + sensitivity_horizontal,
+            vertical < 0.5 - sensitivity_vertical,
+            vertical > 0.5 + sensitivity_vertical,
+        ],
+        [iris_api.DIRECTIONS['left'], iris_api.DIRECTIONS['right'], iris_api.DIRECTIONS['up'], iris_api.DIRECTIONS['down']],
+        default=iris_api.DIRECTIONS['center'],
+    ).astype(np.int8)
+
+
+def series_metrics(points, frame_shape, timestamps):
+    """
+    Eye metrics of every frame with a face. Returns a dict of (N, 2) 'horizontal', 'vertical'
+    and 'ear' arrays plus the matching 'timestamps'; frames without a face are dropped, as the
+    tracker never runs gestures on them.
+    """
+    frame_height, frame_width = frame_shape[:2]
+    scale = np.array([frame_width, frame_height], dtype=np.float64)
+    columns = iris_api.GAZE_INDEX.ravel()
+    horizontal, vertical, ear, keep = [], [], [], []
+    for start in range(0, len(points), METRICS_CHUNK):
+        chunk = np.asarray(points[start:start + METRICS_CHUNK, columns, :2], dtype=np.float64)
+        found = ~np.isnan(chunk).any(axis=(1, 2))
+        gaze = chunk[found].reshape(-1, 2, columns.size // 2, 2) * scale
+        h, v = position_ratios(gaze)
+        horizontal.append(h)
+        vertical.append(v)
+        ear.append(eye_aspect_ratios(gaze))
+        keep.append(found)
+    keep = np.concatenate(keep) if keep else np.zeros(0, dtype=bool)
+    empty = np.zeros((0, 2))
+    return {
+        'horizontal': np.concatenate(horizontal) if horizontal else empty,
+        'vertical': np.concatenate(vertical) if vertical else empty,
+        'ear': np.concatenate(ear) if ear else empty,
+        'timestamps': np.asarray(timestamps, dtype=np.float64)[keep],
+    }
+
+
+def load_series(path, fps=DEFAULT_FPS, frame_size=DEFAULT_FRAME_SIZE):
+    """
+    (points, frame_shape, timestamps) of a saved series. .npy files are memory-mapped.
+    """
+    if path.endswith('.npz'):
+        data = np.load(path)
+        points = data['points']
+        timestamps = data['timestamps'] if 'timestamps' in data else np.arange(len(points)) / fps
+        frame_shape = tuple(data['frame_shape'].tolist()) if 'frame_shape' in data else (frame_size[1], frame_size[0])
+    else:
+        points = np.load(path, mmap_mode='r')
+        timestamps = np.arange(len(points)) / fps
+        frame_shape = (frame_size[1], frame_size[0])
+    if points.ndim != 3 or points.shape[1:] != (iris_api.NUM_LANDMARKS, 3):
+        raise ValueError(f"expected an (N, {iris_api.NUM_LANDMARKS}, 3) landmark array, got {points.shape}")
+    return points, frame_shape, timestamps
+
+
+def dwell_fires(timestamps, positions, duration):
+    """
+    Indices of the frames where GestureEngine's dwell timer reaches `duration`, clicking or not.
+    The timer only depends on the iris position, so this is shared by every other threshold.
+    """
+    if len(positions) == 0:
+        return np.zeros(0, dtype=np.intp)
+    stable = np.abs(np.diff(positions, prepend=positions[0])) < STABLE_MOVEMENT
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], stable.view(np.int8), [0]))))
+    fires = []
+    for run_start, run_end in zip(edges[::2], edges[1::2]):  # Runs of stable frames, end exclusive
+        start = run_start
+        while start < run_end - 1:
+            fire = max(np.searchsorted(timestamps, timestamps[start] + duration), start + 1)
+            # Land on the same frame as the engine's `now - start >= duration` despite rounding
+            while fire < run_end and timestamps[fire] - timestamps[start] < duration:
+                fire += 1
+            while fire - 1 > start and timestamps[fire - 1] - timestamps[start] >= duration:
+                fire -= 1
+            if fire >= run_end:
+                break
+            fires.append(fire)
+            start = fire + 1  # The timer restarts on the next stable frame
+    return np.array(fires, dtype=np.intp)
+
+
+def reopen_events(timestamps, closed):
+    """
+    Frames where GestureEngine settles an eye closure, and how long it measured.
+    closed is (N, 2) eyes below the blink threshold. The engine times a closure from the first
+    frame of a one-eyed blink and settles it on the next frame without one; a frame with both
+    eyes shut starts and settles its own zero-length closure.
+    """
+    one_eye = closed[:, 0] != closed[:, 1]
+    after_one_eye = np.concatenate(([False], one_eye[:-1]))
+    settled = ~one_eye & (after_one_eye | closed[:, 0])
+    frames = np.arange(len(one_eye))
+    run_start = np.maximum.accumulate(np.where(one_eye & ~after_one_eye, frames, 0))
+    previous_start = np.concatenate(([0], run_start[:-1]))
+    durations = np.where(after_one_eye, timestamps - timestamps[previous_start], 0.0)
+    return frames[settled], durations[settled]
+
+
+def count_clicks(reopen_frames, reopen_durations, fire_frames, close_click):
+    """
+    Closure and dwell clicks for each closure duration in close_click, replaying only the frames
+    where the shared click_triggered flag can change instead of every frame.
+    Returns (closure_clicks, dwell_clicks), each shaped like close_click.
+    """
+    close_click = np.asarray(close_click, dtype=np.float64)
+    shortest = close_click.min() if close_click.size else 0.0
+    frames = np.concatenate((reopen_frames, fire_frames))
+    durations = np.concatenate((reopen_durations, np.full(len(fire_frames), np.nan)))
+    # Within a frame the engine settles a closure before checking the dwell timer
+    order = np.lexsort((np.isnan(durations), frames))
+    durations = durations[order]
+    # Closures shorter than every close_click only clear the flag; a row of them acts as one
+    short = durations < shortest
+    durations = durations[~(short & np.concatenate(([False], short[:-1])))]
+
+    triggered = np.zeros(close_click.shape, dtype=bool)
+    closure_clicks = np.zeros(close_click.shape, dtype=np.int64)
+    dwell_clicks = np.zeros(close_click.shape, dtype=np.int64)
+    for duration in durations.tolist():
+        if duration != duration:  # NaN marks a dwell timer firing
+            dwell_clicks += ~triggered
+            triggered[:] = True
+        elif duration < shortest:
+            triggered[:] = False
+        else:
+            click = (duration >= close_click) & ~triggered
+            closure_clicks += click
+            triggered = (triggered | click) & (duration >= close_click)
+    return closure_clicks, dwell_clicks
+
+
+def sweep(metrics, horizontal, vertical, blink, close_click, stable):
+    """
+    Event counts for every combination of the threshold grids: sensitivity_horizontal,
+    sensitivity_vertical, blink_threshold, close_eye_click and stable_click durations.
+    Returns a dict of equal-length 1-D arrays, one row per configuration, with the thresholds
+    followed by COUNT_COLUMNS.
+    """
+    grids = [np.atleast_1d(np.asarray(grid, dtype=np.float64)) for grid in (horizontal, vertical, blink, close_click, stable)]
+    horizontal, vertical, blink, close_click, stable = grids
+    ratios_h, ratios_v, ear = metrics['horizontal'], metrics['vertical'], metrics['ear']
+    timestamps = metrics['timestamps']
+
+    # Scrolls: any eye past the horizontal threshold, looking left first. Up and down trigger
+    # no action yet, but are what sensitivity_vertical decides
+    left, right = iris_api.DIRECTIONS['left'], iris_api.DIRECTIONS['right']
+    scroll_up = np.zeros(len(horizontal), dtype=np.int64)
+    scroll_down = np.zeros_like(scroll_up)
+    look_up = np.zeros((len(horizontal), len(vertical)), dtype=np.int64)
+    look_down = np.zeros_like(look_up)
+    for i, sensitivity in enumerate(horizontal):
+        directions = movement_directions(ratios_h, ratios_v, sensitivity, vertical[:, None, None])  # (vertical, N, eyes)
+        # Left and right win over up and down, so every vertical threshold agrees on them
+        looks_left = (directions[0] == left).any(axis=1)
+        scroll_up[i] = looks_left.sum()
+        scroll_down[i] = (~looks_left & (directions[0] == right).any(axis=1)).sum()
+        look_up[i] = (directions == iris_api.DIRECTIONS['up']).any(axis=2).sum(axis=1)
+        look_down[i] = (directions == iris_api.DIRECTIONS['down']).any(axis=2).sum(axis=1)
+
+    positions = ((ratios_h[:, 0] + ratios_v[:, 0]) / 2 + (ratios_h[:, 1] + ratios_v[:, 1]) / 2) / 2
+    fires = [dwell_fires(timestamps, positions, duration) for duration in stable]
+
+    left_blinks = np.zeros(len(blink), dtype=np.int64)
+    right_blinks = np.zeros_like(left_blinks)
+    closure_clicks = np.zeros((len(blink), len(close_click), len(stable)), dtype=np.int64)
+    dwell_clicks = np.zeros_like(closure_clicks)
+    for i, threshold in enumerate(blink):
+        closed = ear < threshold
+        left_blinks[i] = (closed[:, 0] & ~closed[:, 1]).sum()
+        right_blinks[i] = (closed[:, 1] & ~closed[:, 0]).sum()
+        reopen_frames, reopen_durations = reopen_events(timestamps, closed)
+        for j, fire_frames in enumerate(fires):
+            closure_clicks[i, :, j], dwell_clicks[i, :, j] = count_clicks(reopen_frames, reopen_durations, fire_frames, close_click)
+
+    # Broadcast everything onto the full (horizontal, vertical, blink, close_click, stable) grid
+    shape = tuple(len(grid) for grid in grids)
+    columns = dict(zip(
+        ('sensitivity_horizontal', 'sensitivity_vertical', 'blink_threshold', 'close_eye_click', 'stable_click'),
+        np.meshgrid(*grids, indexing='ij'),
+    ))
+    columns.update(
+        scroll_up=scroll_up[:, None, None, None, None],
+        scroll_down=scroll_down[:, None, None, None, None],
+        look_up_frames=look_up[:, :, None, None, None],
+        look_down_frames=look_down[:, :, None, None, None],
+        left_blinks=left_blinks[None, None, :, None, None],
+        right_blinks=right_blinks[None, None, :, None, None],
+        closure_clicks=closure_clicks[None, None],
+        dwell_clicks=dwell_clicks[None, None],
+        clicks=(closure_clicks + dwell_clicks)[None, None],
+    )
+    return {name: np.broadcast_to(values, shape).ravel() for name, values in columns.items()}
+
+
+def current_thresholds():
+    """
+    The thresholds the tracker runs with, as one-value grids for sweep().
+    """
+    return {
+        'horizontal': [iris_api.SENSITIVITY_HORIZONTAL],
+        'vertical': [iris_api.SENSITIVITY_VERTICAL],
+        'blink': [iris_api.BLINK_THRESHOLD],
+        'close_click': [iris_api.CLOSE_EYE_DURATION_CLICK],
+        'stable': [iris_api.STABLE_DURATION_CLICK],
+    }
+
+
+def engine_counts(points, frame_shape, timestamps):
+    """
+    Event counts from running the real GestureEngine frame by frame, to check sweep() against.
+    """
+    sink = iris_api.RecordingSink()
+    gestures = iris_api.GestureEngine(sink)
+    frame = np.zeros((iris_api.NUM_LANDMARKS, 3))
+    for index, now in enumerate(np.asarray(timestamps).tolist()):
+        frame[:] = points[index]
+        if not np.isnan(frame[iris_api.GAZE_INDEX]).any():
+            gestures.process(frame, frame_shape, now)
+    counts = {'scroll_up': 0, 'scroll_down': 0, 'left_blinks': 0, 'right_blinks': 0, 'clicks': 0}
+    for action, args in sink.actions:
+        if action == 'scroll':
+            counts['scroll_up' if args[0] > 0 else 'scroll_down'] += 1
+        elif action == 'move_rel':
+            counts['left_blinks' if args[0] < 0 else 'right_blinks'] += 1
+        else:
+            counts['clicks'] += 1
+    return counts
+
+
+def parse_grid(text):
+    """
+    start:stop:step with stop included, or a comma-separated list of values.
+    """
+    try:
+        if ':' in text:
+            start, stop, step = (float(part) for part in text.split(':'))
+            if step <= 0:
+                raise ValueError
+            return np.round(np.arange(start, stop + step / 2, step), 10)
+        return np.array([float(value) for value in text.split(',')])
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a grid: {text!r}")
+
+
+def parse_frame_size(text):
+    try:
+        width, height = (int(part) for part in text.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got {text!r}")
+    return width, height
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    events = subparsers.add_parser('events', help='Event counts with the thresholds the tracker runs with')
+    events.add_argument('--check', action='store_true', help='Also replay the series through GestureEngine and compare')
+    grid = subparsers.add_parser('sweep', help='Event counts for every combination of threshold grids')
+    for name, default in DEFAULT_GRIDS.items():
+        grid.add_argument('--' + name.replace('_', '-'), type=parse_grid, default=parse_grid(default))
+    grid.add_argument('--output', help='Write every configuration to this CSV file instead of printing them')
+    for command in (events, grid):
+        command.add_argument('series', help='.npy landmark array or .npz recording')
+        command.add_argument('--fps', type=float, default=DEFAULT_FPS, help='Frame rate of series without timestamps')
+        command.add_argument('--frame-size', type=parse_frame_size, default=DEFAULT_FRAME_SIZE, help='WIDTHxHEIGHT the landmarks were detected at')
+    args = parser.parse_args()
+
+    points, frame_shape, timestamps = load_series(args.series, args.fps, args.frame_size)
+    started = time.perf_counter()
+    metrics = series_metrics(points, frame_shape, timestamps)
+    metrics_seconds = time.perf_counter() - started
+    summary = {
+        'frames': len(points),
+        'face_frames': len(metrics['timestamps']),
+        'seconds': round(float(timestamps[-1] - timestamps[0]), 3) if len(timestamps) else 0.0,
+        'metrics_seconds': round(metrics_seconds, 3),
+    }
+
+    if args.command == 'events':
+        table = sweep(metrics, **current_thresholds())
+        summary['events'] = {name: int(table[name][0]) for name in COUNT_COLUMNS}
+        if args.check:
+            engine = engine_counts(points, frame_shape, timestamps)
+            summary['engine'] = engine
+            summary['matches_engine'] = all(summary['events'][name] == count for name, count in engine.items())
+        print(json.dumps(summary, indent=2))
+        return
+
+    started = time.perf_counter()
+    table = sweep(metrics, args.horizontal, args.vertical, args.blink, args.close_click, args.stable)
+    summary['configurations'] = len(table['clicks'])
+    summary['sweep_seconds'] = round(time.perf_counter() - started, 3)
+    if args.output:
+        with open(args.output, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(table.keys())
+            writer.writerows(zip(*(values.tolist() for values in table.values())))
+    else:
+        rows = zip(*(values.tolist() for values in table.values()))
+        summary['results'] = [dict(zip(table.keys(), row)) for row in rows]
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,33 @@
-from flask import Flask, jsonify
+import time
+import_started = time.perf_counter()  # Start of the startup report at /status
+
+from flask import Flask, Response, jsonify, request
 import cv2
-import mediapipe as mp
 import numpy as np
-import pyautogui
-import time
+import atexit
+import collections
+import os
+import queue
 import threading
 
+import landmark_recorder
+import shm_inference
+import telemetry
+import tracker_config
+import tracker_metrics
+import tracker_profiler
+from tracker_manager import TrackerManager
+
 app = Flask(__name__)
 
-# Initialize Mediapipe modules
-mp_face_mesh = mp.solutions.face_mesh
-face_mesh = mp_face_mesh.FaceMesh(static_image_mode=False, max_num_faces=1, refine_landmarks=True, min_detection_confidence=0.7, min_tracking_confidence=0.7)
+FACE_DETECTION_CONFIDENCE = 0.7
+FACE_TRACKING_CONFIDENCE = 0.7
+
+def create_face_mesh(min_detection_confidence=FACE_DETECTION_CONFIDENCE, min_tracking_confidence=FACE_TRACKING_CONFIDENCE):
+    # Mediapipe takes about a second to import, so only code that builds a model loads it
+    import mediapipe as mp
+
+    return mp.solutions.face_mesh.FaceMesh(static_image_mode=False, max_num_faces=1, refine_landmarks=True, min_detection_confidence=min_detection_confidence, min_tracking_confidence=min_tracking_confidence)
 
 # Iris and eye landmarks
 LEFT_EYE_LANDMARKS = [33, 133, 159, 145, 160]  # Key points for left eye
@@ -18,8 +35,35 @@ RIGHT_EYE_LANDMARKS = [362, 263, 386, 374, 387]  # Key points for right eye
 IRIS_LEFT_LANDMARKS = [469, 470, 471, 472]  # Landmarks for left iris
 IRIS_RIGHT_LANDMARKS = [474, 475, 476, 477]  # Landmarks for right iris
 NOSE_LANDMARK = 1  # Landmark for nose tip
+NUM_LANDMARKS = 478  # Face mesh points with refine_landmarks=True
+# Rows: left eye, right eye. Columns: eye left/right/top/bottom corners, then the four iris points
+GAZE_INDEX = np.array([
+    LEFT_EYE_LANDMARKS[:4] + IRIS_LEFT_LANDMARKS,
+    RIGHT_EYE_LANDMARKS[:4] + IRIS_RIGHT_LANDMARKS,
+])
+
+# Landmarks that swap roles when the face is mirrored: eye corners and lids, iris centers and iris edges
+MIRROR_PAIRS = [
+    (33, 263), (133, 362), (159, 386), (145, 374), (160, 387),
+    (468, 473), (469, 476), (470, 475), (471, 474), (472, 477),
+]
+MIRROR_FROM = [a for a, b in MIRROR_PAIRS] + [b for a, b in MIRROR_PAIRS]
+MIRROR_TO = [b for a, b in MIRROR_PAIRS] + [a for a, b in MIRROR_PAIRS]
+
+# Wire layout of one serialized NormalizedLandmark holding x, y and z: message tag and length,
+# then each coordinate as a field tag followed by a little-endian float32
+LANDMARK_RECORD = np.dtype([
+    ('tag', 'u1'), ('length', 'u1'),
+    ('x_tag', 'u1'), ('x', '<f4'), ('y_tag', 'u1'), ('y', '<f4'), ('z_tag', 'u1'), ('z', '<f4'),
+])
+LANDMARK_TAG_RUNS = [
+    (column, bytes([tag]) * NUM_LANDMARKS)
+    for column, tag in ((0, 0x0A), (1, 15), (2, 0x0D), (7, 0x15), (12, 0x1D))
+]
+
 # Map for tracking directions
 DIRECTIONS = {"center": 0, "left": 1, "right": 2, "up": 3, "down": 4}
+DIRECTION_NAMES = {code: name for name, code in DIRECTIONS.items()}
 
 STABLE_DURATION_CLICK = 5.0
 SENSITIVITY_HORIZONTAL = 0.1  # Sensitivity for horizontal movements
@@ -29,15 +73,88 @@ BLINK_DURATION = 0.2
 CLOSE_EYE_DURATION_DISABLE = 2.0  # For disabling tracking
 CLOSE_EYE_DURATION_BACK = 5.0 # For enabling/disabling scrolling and navigation
 CLOSE_EYE_DURATION_CLICK = 3.0
+SCROLL_AMOUNT = 25  # Scroll steps per frame while looking left or right
+BLINK_MOVE = 40  # Pixels the cursor moves on a single-eye blink
+# The values above are the defaults; the live ones can be changed at /config while tracking
+DEFAULT_CONFIG = tracker_config.TrackerConfig(
+    sensitivity_horizontal=SENSITIVITY_HORIZONTAL,
+    sensitivity_vertical=SENSITIVITY_VERTICAL,
+    blink_threshold=BLINK_THRESHOLD,
+    close_eye_duration_click=CLOSE_EYE_DURATION_CLICK,
+    close_eye_duration_disable=CLOSE_EYE_DURATION_DISABLE,
+    close_eye_duration_back=CLOSE_EYE_DURATION_BACK,
+    stable_duration_click=STABLE_DURATION_CLICK,
+    scroll_amount=SCROLL_AMOUNT,
+    blink_move=BLINK_MOVE,
+    min_detection_confidence=FACE_DETECTION_CONFIDENCE,
+    min_tracking_confidence=FACE_TRACKING_CONFIDENCE,
+)
+PROFILES_FILE = 'tracker_profiles.json'  # Saved per-user tuning profiles
+STAGE_POLL_INTERVAL = 0.1  # Seconds a pipeline stage waits for input before re-checking the stop flag
 
-# Global variables for tracking state
-tracking_enabled = False
-last_movement = DIRECTIONS["center"]
-tracking_thread = None
-stable_start_time = None
-last_iris_position = None
-click_triggered = False
-eye_close_start = None
+ACTION_TICK = 0.05  # Seconds between coalesced action flushes
+CLICK_MIN_INTERVAL = 1.0  # Seconds between two synthetic clicks
+ROI_ENABLED = True  # Crop face_mesh input to the face found in the previous frame
+ROI_PADDING = 0.5  # Fraction of the face box size added on every side of the crop
+ROI_INPUT_SIZE = 256  # Side of the square the crop is resized to before inference
+ROI_MAX_MISSES = 2  # Consecutive cropped frames without a face before falling back to the full frame
+ROI_RESIZE_TOLERANCE = 0.2  # Relative change in face size that moves the crop
+IDLE_AFTER = 10.0  # Seconds without a face before the tracker drops to idle sampling
+IDLE_SAMPLE_INTERVAL = 0.5  # Seconds between captured frames while idle
+IDLE_FRAME_SIZE = (320, 240)  # Capture resolution while idle
+TARGET_FPS = 20.0  # Frame rate the governor keeps inference within; 0 always uses the best quality tier
+QUALITY_TIERS = (1.0, 0.75, 0.5)  # Scales of full-frame inference input, best first
+GOVERNOR_WINDOW = 20  # Inferences averaged before the governor may change tier
+GOVERNOR_HEADROOM = 0.6  # Try the next better tier once frames use less than this share of the budget
+GOVERNOR_MAX_BACKOFF = 32  # Most windows to wait before trying a better tier that failed last time
+INFERENCE_MODES = ('thread', 'process')
+INFERENCE_MODE = 'thread'  # 'process' runs face_mesh in a worker fed through shared memory
+WARM_STANDBY_TIMEOUT = 0.0  # Seconds a stopped tracker keeps camera (and its LED) on for a fast restart; 0 releases it at once
+REPLAY_IMAGE_FPS = 30.0  # Frame rate assumed when replaying a directory of still images
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+CAPTURE_SETTINGS = {  # Applied to cameras when they are opened; None keeps the driver's choice
+    'width': None,
+    'height': None,
+    'fps': 30,
+    'fourcc': 'MJPG',  # Compressed frames let USB webcams reach full frame rate instead of slow raw YUYV
+    'buffer_size': 1,  # Frames the driver queues up; 1 means each read gets the newest frame, not an old one
+}
+SYNTHETIC_SOURCE = 'synthetic'  # Source name for generated frames, to run without a camera
+SYNTHETIC_FRAME_SIZE = (640, 480)
+STATE_WAIT_MAX = 30.0  # Longest a /state request may wait for the lifecycle to change
+SERVER_HOST = '127.0.0.1'
+SERVER_PORT = 5000
+SERVER_THREADS = 8  # Request threads, so control calls never queue behind slow /status or /state waits
+WARMUP_ON_START = True  # Load mediapipe and the face_mesh models in the background as soon as the server starts
+PROFILE_DEFAULT_SECONDS = 10.0  # Window of a /profile request without ?seconds=
+PROFILE_MAX_SECONDS = 60.0  # Longest window a /profile request may ask for
+PROFILE_FORMATS = ('json', 'collapsed', 'pstats')
+PROFILE_THREAD_PREFIX = 'iris-'  # Threads the sampling profiler follows
+
+PIPELINE_STAGES = ('capture', 'convert', 'inference', 'gesture', 'action')
+
+# Metrics served at /metrics
+STAGE_SECONDS = {
+    stage: tracker_metrics.Histogram('iris_stage_duration_seconds', 'Time spent in each pipeline stage per frame', labels={'stage': stage})
+    for stage in PIPELINE_STAGES
+}
+FRAMES_PROCESSED = tracker_metrics.Counter('iris_frames_processed_total', 'Frames that went through face_mesh')
+FRAMES_WITHOUT_FACE = tracker_metrics.Counter('iris_frames_without_face_total', 'Processed frames with no face found')
+FRAMES_DROPPED = {
+    handoff: tracker_metrics.Counter('iris_frames_dropped_total', 'Stale frames replaced before a stage picked them up', labels={'handoff': handoff})
+    for handoff in ('before_inference', 'before_action')
+}
+
+BLINKS = tracker_metrics.Counter('iris_blinks_total', 'Single-eye blinks that moved the cursor')
+CLICKS = tracker_metrics.Counter('iris_clicks_total', 'Click gestures')
+SCROLLS = tracker_metrics.Counter('iris_scrolls_total', 'Scroll gestures')
+FPS = tracker_metrics.Gauge('iris_fps', 'Frames per second reaching the action stage, smoothed')
+LOOP_LAG = tracker_metrics.Gauge('iris_loop_lag_seconds', 'Glass-to-action latency of the last frame')
+QUALITY_TIER = tracker_metrics.Gauge('iris_quality_tier', 'Active governor quality tier, 0 is full quality')
+FPS_SMOOTHING = 0.1  # Weight of the newest frame interval in the FPS average
+TELEMETRY_INTERVAL = 0.1  # Seconds between frame samples pushed to /telemetry subscribers
+RECORDER_ENABLED = True  # Keep a rolling recording of landmarks and gestures for replaying complaints
+RECORDER_DIR = 'recordings'
 
 def calculate_position_ratio(iris_landmarks, eye_landmarks):
     """
@@ -58,17 +175,17 @@ def calculate_position_ratio(iris_landmarks, eye_landmarks):
 
     return float(horizontal_ratio), float(vertical_ratio)
 
-def detect_movement(horizontal_ratio, vertical_ratio):
+def detect_movement(horizontal_ratio, vertical_ratio, sensitivity_horizontal=SENSITIVITY_HORIZONTAL, sensitivity_vertical=SENSITIVITY_VERTICAL):
     """
     Detect the movement direction based on iris position ratios with adjusted sensitivity.
     """
-    if horizontal_ratio < 0.5 - SENSITIVITY_HORIZONTAL:
+    if horizontal_ratio < 0.5 - sensitivity_horizontal:
         return DIRECTIONS["left"]
-    elif horizontal_ratio > 0.5 + SENSITIVITY_HORIZONTAL:
+    elif horizontal_ratio > 0.5 + sensitivity_horizontal:
         return DIRECTIONS["right"]
-    elif vertical_ratio < 0.5 - SENSITIVITY_VERTICAL:
+    elif vertical_ratio < 0.5 - sensitivity_vertical:
         return DIRECTIONS["up"]
-    elif vertical_ratio > 0.5 + SENSITIVITY_VERTICAL:
+    elif vertical_ratio > 0.5 + sensitivity_vertical:
         return DIRECTIONS["down"]
     else:
         return DIRECTIONS["center"]
@@ -77,6 +194,8 @@ def perform_action_based_on_movement(movement):
     """
     Perform scrolling based on detected eye movement (no cursor movement).
     """
+    import pyautogui
+
     if movement == DIRECTIONS["down"]:
         pyautogui.scroll(-100)  # Scroll down
     elif movement == DIRECTIONS["up"]:
@@ -96,146 +215,1950 @@ def detect_blink_or_close(eye_landmarks):
 
     return vertical_distance / horizontal_distance
 
-def tracking_loop():
-    global tracking_enabled, last_movement, stable_start_time, last_iris_position, click_triggered, eye_close_start
-    cap = cv2.VideoCapture(0)
-
-    while tracking_enabled:
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        # Flip the frame for a mirror-like view
-        frame = cv2.flip(frame, 1)
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        result = face_mesh.process(rgb_frame)
-
-        if result.multi_face_landmarks:
-            for face_landmarks in result.multi_face_landmarks:
-                # Extract iris, eye, and nose landmarks
-                iris_left = [
-                    (face_landmarks.landmark[point].x, face_landmarks.landmark[point].y)
-                    for point in IRIS_LEFT_LANDMARKS
-                ]
-                iris_right = [
-                    (face_landmarks.landmark[point].x, face_landmarks.landmark[point].y)
-                    for point in IRIS_RIGHT_LANDMARKS
-                ]
-                left_eye = [
-                    (face_landmarks.landmark[point].x, face_landmarks.landmark[point].y)
-                    for point in LEFT_EYE_LANDMARKS
-                ]
-                right_eye = [
-                    (face_landmarks.landmark[point].x, face_landmarks.landmark[point].y)
-                    for point in RIGHT_EYE_LANDMARKS
-                ]
-                nose = (
-                    face_landmarks.landmark[NOSE_LANDMARK].x,
-                    face_landmarks.landmark[NOSE_LANDMARK].y
-                )
+def landmarks_to_array(face_landmarks, out):
+    """
+    Copy the x, y, z of every Mediapipe landmark into a preallocated (NUM_LANDMARKS, 3) array.
+    Reading 478 protobuf messages attribute by attribute costs far more than the gesture math,
+    so the serialized list is decoded with a single NumPy view when it has the usual wire layout.
+    """
+    data = face_landmarks.SerializeToString()
+    stride = LANDMARK_RECORD.itemsize
+    if len(out) == NUM_LANDMARKS and len(data) == stride * NUM_LANDMARKS and all(
+        data[column::stride] == run for column, run in LANDMARK_TAG_RUNS
+    ):
+        records = np.frombuffer(data, dtype=LANDMARK_RECORD)
+        out[:, 0] = records['x']
+        out[:, 1] = records['y']
+        out[:, 2] = records['z']
+        return out
+
+    out[:len(face_landmarks.landmark)] = [(point.x, point.y, point.z) for point in face_landmarks.landmark]
+    return out
+
+def compute_eye_metrics(points, frame_shape):
+    """
+    Iris position ratios and eye aspect ratios of both eyes in one batched pass.
+    Returns (horizontal_ratios, vertical_ratios, eye_aspect_ratios), each indexed [left, right].
+    """
+    frame_height, frame_width = frame_shape[:2]
+    gaze = points[GAZE_INDEX, :2]  # (2 eyes, left/right/top/bottom + 4 iris points, xy)
+    gaze[..., 0] *= frame_width
+    gaze[..., 1] *= frame_height
+
+    iris_centers = gaze[:, 4:].mean(axis=1)
+    left, right, top, bottom = gaze[:, 0], gaze[:, 1], gaze[:, 2], gaze[:, 3]
+    horizontal_ratios = (iris_centers[:, 0] - left[:, 0]) / (right[:, 0] - left[:, 0])
+    vertical_ratios = (iris_centers[:, 1] - top[:, 1]) / (bottom[:, 1] - top[:, 1])
+
+    spans = gaze[:, 0:4:2] - gaze[:, 1:4:2]  # left - right, top - bottom
+    lengths = np.sqrt((spans * spans).sum(axis=2))
+    eye_aspect_ratios = lengths[:, 1] / lengths[:, 0]
+    return horizontal_ratios, vertical_ratios, eye_aspect_ratios
+
+class PyAutoGuiSink:
+    """
+    Sends gesture actions to the desktop. pyautogui is imported with the first action, on the
+    dispatcher thread: it is slow to import and fails outright without a display, neither of
+    which should hold up or break the API.
+    """
+    def __init__(self):
+        self.pyautogui = None  # False once the import has failed
+
+    def desktop(self):
+        if self.pyautogui is None:
+            try:
+                import pyautogui
+            except Exception as e:  # KeyError for a missing DISPLAY, Xlib and platform errors otherwise
+                print(f"Desktop actions disabled, pyautogui failed to load: {e!r}")
+                pyautogui = False
+            self.pyautogui = pyautogui
+        return self.pyautogui
+
+    def scroll(self, amount):
+        desktop = self.desktop()
+        if desktop:
+            desktop.scroll(amount)
+
+    def move_rel(self, dx, dy):
+        desktop = self.desktop()
+        if desktop:
+            desktop.moveRel(dx, dy)
+
+    def click(self):
+        desktop = self.desktop()
+        if desktop:
+            desktop.click()
+
+class NullSink:
+    """
+    Swallows gesture actions, for headless replays and benchmarks.
+    """
+    def scroll(self, amount):
+        pass
+
+    def move_rel(self, dx, dy):
+        pass
+
+    def click(self):
+        pass
+
+class RecordingSink:
+    """
+    Keeps every gesture action as (action, args) so replays can be compared run to run.
+    """
+    def __init__(self):
+        self.actions = []
+
+    def scroll(self, amount):
+        self.actions.append(('scroll', (amount,)))
+
+    def move_rel(self, dx, dy):
+        self.actions.append(('move_rel', (dx, dy)))
+
+    def click(self):
+        self.actions.append(('click', ()))
+
+    def counts(self):
+        counts = {}
+        for action, _ in self.actions:
+            counts[action] = counts.get(action, 0) + 1
+        return counts
+
+class MetricsSink:
+    """
+    Counts gestures into the /metrics counters before passing them on.
+    """
+    def __init__(self, sink):
+        self.sink = sink
+
+    def scroll(self, amount):
+        SCROLLS.inc()
+        self.sink.scroll(amount)
+
+    def move_rel(self, dx, dy):
+        BLINKS.inc()
+        self.sink.move_rel(dx, dy)
+
+    def click(self):
+        CLICKS.inc()
+        self.sink.click()
+
+class RecorderSink:
+    """
+    Writes every call to the flight recorder before passing it on. `stage` is 'gesture' for
+    what GestureEngine asked for and 'action' for what reached the desktop.
+    """
+    def __init__(self, sink, recorder, stage):
+        self.sink = sink
+        self.recorder = recorder
+        self.stage = stage
+
+    def scroll(self, amount):
+        self.recorder.record_event(time.time(), f'{self.stage}_scroll', amount)
+        self.sink.scroll(amount)
+
+    def move_rel(self, dx, dy):
+        self.recorder.record_event(time.time(), 'gesture_blink' if self.stage == 'gesture' else 'action_move', dx, dy)
+        self.sink.move_rel(dx, dy)
+
+    def click(self):
+        self.recorder.record_event(time.time(), f'{self.stage}_click')
+        self.sink.click()
+
+class TelemetrySink:
+    """
+    Publishes every gesture to /telemetry subscribers before passing it on.
+    """
+    def __init__(self, sink, hub):
+        self.sink = sink
+        self.hub = hub
+
+    def scroll(self, amount):
+        if self.hub.active:
+            self.hub.publish('gesture', {'gesture': 'scroll', 'amount': amount, 'time': time.time()})
+        self.sink.scroll(amount)
+
+    def move_rel(self, dx, dy):
+        if self.hub.active:
+            self.hub.publish('gesture', {'gesture': 'blink', 'dx': dx, 'dy': dy, 'time': time.time()})
+        self.sink.move_rel(dx, dy)
+
+    def click(self):
+        if self.hub.active:
+            self.hub.publish('gesture', {'gesture': 'click', 'time': time.time()})
+        self.sink.click()
+
+class ActionDispatcher:
+    """
+    Sink that queues gesture intents for its own thread, which merges consecutive scroll and cursor
+    deltas into at most one event of each kind per tick and rate-limits clicks, so slow synthetic
+    input never blocks the frame loop.
+    """
+    def __init__(self, sink, tick=ACTION_TICK, click_interval=CLICK_MIN_INTERVAL):
+        self.sink = sink
+        self.tick = tick
+        self.click_interval = click_interval
+        self.intents = queue.SimpleQueue()
+        self.running = False
+        self.thread = None
+        self.next_flush = 0.0
+        self.last_click = None
+        self.intents_received = 0
+        self.events_emitted = 0
+        self.clicks_suppressed = 0
+        self.profiler = None  # tracker_profiler.ThreadProfiles while /profile runs in cprofile mode
+
+    def scroll(self, amount):
+        self.intents.put(('scroll', amount))
+
+    def move_rel(self, dx, dy):
+        self.intents.put(('move_rel', (dx, dy)))
+
+    def click(self):
+        self.intents.put(('click', None))
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.dispatch_loop, name="iris-actions", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread and self.thread.is_alive():
+            self.thread.join()
+        self.thread = None
+
+    def dispatch_loop(self):
+        while self.running:
+            if self.profiler:
+                self.profiler.poll()
+            try:
+                first = self.intents.get(timeout=STAGE_POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            # Anything arriving before the tick is up joins the same flush
+            wait = self.next_flush - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+            start = time.perf_counter()
+            self.flush([first] + self.drain())
+            STAGE_SECONDS['action'].observe(time.perf_counter() - start)
+            self.next_flush = time.perf_counter() + self.tick
+
+    def drain(self):
+        intents = []
+        while True:
+            try:
+                intents.append(self.intents.get_nowait())
+            except queue.Empty:
+                return intents
+
+    def flush(self, intents):
+        scroll_total = 0
+        move_x = move_y = 0
+        clicked = False
+        for action, value in intents:
+            if action == 'scroll':
+                scroll_total += value
+            elif action == 'move_rel':
+                move_x += value[0]
+                move_y += value[1]
+            else:
+                clicked = True
+        self.intents_received += len(intents)
+
+        # Cursor first, so a click in the same tick lands where the blinks moved it
+        if move_x or move_y:
+            self.sink.move_rel(move_x, move_y)
+            self.events_emitted += 1
+        if scroll_total:
+            self.sink.scroll(scroll_total)
+            self.events_emitted += 1
+        if clicked:
+            now = time.perf_counter()
+            if self.last_click is None or now - self.last_click >= self.click_interval:
+                self.sink.click()
+                self.events_emitted += 1
+                self.last_click = now
+            else:
+                self.clicks_suppressed += 1
+
+    def stats(self):
+        return {
+            'intents_received': self.intents_received,
+            'events_emitted': self.events_emitted,
+            'intents_coalesced': self.intents_received - self.events_emitted - self.clicks_suppressed,
+            'clicks_suppressed': self.clicks_suppressed,
+        }
+
+class GestureEngine:
+    """
+    Blink, scroll and dwell-click gestures for one tracked face.
+    Time comes in through `now` so replays follow video time instead of the wall clock.
+    Thresholds come from `settings`, a tracker_config.ConfigStore, read once per frame.
+    """
+    def __init__(self, sink, settings=None):
+        self.sink = sink
+        self.settings = settings or tracker_config.ConfigStore(DEFAULT_CONFIG)
+        self.last_movement = DIRECTIONS["center"]
+        self.stable_start_time = None
+        self.last_iris_position = None
+        self.click_triggered = False
+        self.eye_close_start = None
+        self.both_closed_since = None  # Both eyes shut, for the power monitor; winks are gestures, not absence
+        self.last_metrics = None  # Ratios and directions of the last frame, for telemetry
+
+    def process(self, points, frame_shape, now):
+        horizontal_ratios, vertical_ratios, eye_aspect_ratios = compute_eye_metrics(points, frame_shape)
+        horizontal_ratio_left, horizontal_ratio_right = horizontal_ratios.tolist()
+        vertical_ratio_left, vertical_ratio_right = vertical_ratios.tolist()
+        left_eye_ratio, right_eye_ratio = eye_aspect_ratios.tolist()
+        config = self.settings.current  # The same values for the whole frame, even if /config swaps them meanwhile
+        blink_threshold = config.blink_threshold
+
+        if left_eye_ratio < blink_threshold and right_eye_ratio < blink_threshold:
+            if self.both_closed_since is None:
+                self.both_closed_since = now
+        else:
+            self.both_closed_since = None
+
+        # Handle Eye Closure and Gestures
+        if left_eye_ratio < blink_threshold or right_eye_ratio < blink_threshold:
+            if self.eye_close_start is None:
+                self.eye_close_start = now
+
+        if left_eye_ratio < blink_threshold and right_eye_ratio >= blink_threshold:
+            self.sink.move_rel(-config.blink_move, 0)  # Move cursor left
+            print("Left eye blink detected: Moving cursor left")
+        elif right_eye_ratio < blink_threshold and left_eye_ratio >= blink_threshold:
+            self.sink.move_rel(config.blink_move, 0)  # Move cursor right
+            print("Right eye blink detected: Moving cursor right")
+
+        else:
+            if self.eye_close_start is not None:
+                eye_close_duration = now - self.eye_close_start
+
+                if eye_close_duration >= config.close_eye_duration_click and not self.click_triggered:
+                    self.sink.click()  # Perform click after 5 seconds of eye closure
+                    print("Eye closure detected for 5 seconds: Performing click")
+                    self.click_triggered = True  # Prevent triggering multiple clicks
+
+                if eye_close_duration < config.close_eye_duration_click:
+                    self.click_triggered = False  # Reset click trigger if not enough duration
+
+                self.eye_close_start = None
+
+        movement_left = detect_movement(horizontal_ratio_left, vertical_ratio_left, config.sensitivity_horizontal, config.sensitivity_vertical)
+        movement_right = detect_movement(horizontal_ratio_right, vertical_ratio_right, config.sensitivity_horizontal, config.sensitivity_vertical)
+        self.last_metrics = (
+            horizontal_ratio_left, horizontal_ratio_right, vertical_ratio_left, vertical_ratio_right,
+            left_eye_ratio, right_eye_ratio, movement_left, movement_right,
+        )
+
+        if movement_left == DIRECTIONS["left"] or movement_right == DIRECTIONS["left"]:
+            self.sink.scroll(config.scroll_amount)  # Scroll up
+        elif movement_left == DIRECTIONS["right"] or movement_right == DIRECTIONS["right"]:
+            self.sink.scroll(-config.scroll_amount)  # Scroll down
+
+        current_iris_position = (
+            (horizontal_ratio_left + vertical_ratio_left) / 2 +
+            (horizontal_ratio_right + vertical_ratio_right) / 2
+        ) / 2
+
+        if self.last_iris_position is None:
+            self.last_iris_position = current_iris_position
+
+        # Check for movement
+        if abs(current_iris_position - self.last_iris_position) < 0.5:  # Adjust threshold as needed
+            if self.stable_start_time is None:
+                self.stable_start_time = now
+            else:
+                stable_duration = now - self.stable_start_time
+                if stable_duration >= config.stable_duration_click:
+                    if not self.click_triggered:
+                        self.sink.click()  # Perform click after 5 seconds of stability
+                        print("Iris stable for 5 seconds: Click action triggered")
+                        self.click_triggered = True  # Prevent multiple clicks
+                    self.stable_start_time = None  # Reset the timer
+        else:
+            self.stable_start_time = None  # Reset stability timer on movement
+
+        self.last_iris_position = current_iris_position
+
+def prepare_frame(frame, out=None):
+    """
+    Convert a BGR camera frame to the RGB input face_mesh expects, into `out` if given.
+    The mirror-like view is applied to the landmarks afterwards instead of flipping pixels.
+    """
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=out)
+
+def mirror_points(points):
+    """
+    Turn landmarks of an unmirrored frame into the ones face_mesh finds on the mirrored frame, in place.
+    Mirroring moves x to 1 - x and makes each eye's landmarks play the other eye's role.
+    """
+    points[:, 0] = 1.0 - points[:, 0]
+    points[MIRROR_FROM] = points[MIRROR_TO]
+    return points
+
+class FaceRoi:
+    """
+    Square region around the last detected face, used to feed face_mesh a small crop instead of the full frame.
+    Boxes are (x, y, side) in pixels of the camera frame; landmarks are normalized to the unmirrored frame.
+    """
+    def __init__(self, padding=ROI_PADDING, input_size=ROI_INPUT_SIZE):
+        self.padding = padding
+        self.input_size = input_size
+        self.crop_buffer = np.empty((input_size, input_size, 3), dtype=np.uint8)  # Every crop is resized into this
+        self.box = None
+        self.misses = 0
+        self.frames_cropped = 0
+        self.frames_full = 0
+
+    def reset(self):
+        self.box = None
+        self.misses = 0
+
+    def crop(self, frame):
+        """
+        Returns the frame to run inference on and the box it was cut from, or None for the full frame.
+        """
+        box = self.box
+        if box is None:
+            self.frames_full += 1
+            return frame, None
+        x, y, side = box
+        self.frames_cropped += 1
+        cv2.resize(frame[y:y + side, x:x + side], (self.input_size, self.input_size), dst=self.crop_buffer, interpolation=cv2.INTER_AREA)
+        return self.crop_buffer, box
+
+    def to_frame(self, points, box, frame_shape):
+        """
+        Map landmarks normalized to the crop back onto the full frame, in place.
+        """
+        if box is None:
+            return points
+        frame_height, frame_width = frame_shape[:2]
+        x, y, side = box
+        points[:, 0] = (x + points[:, 0] * side) / frame_width
+        points[:, 1] = (y + points[:, 1] * side) / frame_height
+        points[:, 2] *= side / frame_width
+        return points
+
+    def update(self, points, frame_shape):
+        """
+        Keep the crop around these full-frame landmarks, or drop back to full frames once the face is lost.
+        """
+        if points is None:
+            self.misses += 1
+            # Give face_mesh one re-detection inside the crop before paying for a full frame
+            if self.misses >= ROI_MAX_MISSES:
+                self.box = None
+            return
+        self.misses = 0
+        frame_height, frame_width = frame_shape[:2]
+        xs = points[:, 0] * frame_width
+        ys = points[:, 1] * frame_height
+        x_min, x_max, y_min, y_max = xs.min(), xs.max(), ys.min(), ys.max()
+        face_size = max(x_max - x_min, y_max - y_min)
+        side = int(min(face_size * (1 + 2 * self.padding), frame_width, frame_height))
+        if side <= 0:
+            self.box = None
+            return
+
+        # face_mesh tracks in crop coordinates, so the crop only moves when the face nears its edge or changes size
+        if self.box is not None:
+            x, y, current_side = self.box
+            margin = face_size * self.padding / 2
+            inside = (
+                x_min - margin >= x and x_max + margin <= x + current_side and
+                y_min - margin >= y and y_max + margin <= y + current_side
+            )
+            if inside and abs(side - current_side) <= ROI_RESIZE_TOLERANCE * current_side:
+                return
+
+        center_x, center_y = (x_min + x_max) / 2, (y_min + y_max) / 2
+        x = int(min(max(center_x - side / 2, 0), frame_width - side))
+        y = int(min(max(center_y - side / 2, 0), frame_height - side))
+        self.box = (x, y, side)
+
+    def stats(self):
+        return {'frames_cropped': self.frames_cropped, 'frames_full': self.frames_full, 'box': self.box}
+
+class PowerMonitor:
+    """
+    Decides between full-rate "active" tracking and low-rate "idle" sampling, and adds up the time spent in each.
+    The tracker idles after IDLE_AFTER seconds without a face, or once the eyes stay closed past every
+    gesture window, and goes back to active on the first frame with an open-eyed face.
+    """
+    def __init__(self, idle_after=IDLE_AFTER, settings=None):
+        self.idle_after = idle_after
+        self.settings = settings or tracker_config.ConfigStore(DEFAULT_CONFIG)  # For the close-eye gesture windows
+        self.mode = 'active'
+        self.mode_since = None
+        self.absent_since = None
+        self.seconds = {'active': 0.0, 'idle': 0.0}
+        self.switches = 0
+
+    @property
+    def idle(self):
+        return self.mode == 'idle'
+
+    def start(self, now):
+        self.mode = 'active'
+        self.mode_since = now
+        self.absent_since = None
+
+    def finish(self, now):
+        if self.mode_since is not None:
+            self.seconds[self.mode] += now - self.mode_since
+            self.mode_since = None
+
+    def observe(self, face_present, eyes_closed_for, now):
+        """
+        Feed one processed frame; returns True when this frame changed the mode.
+        """
+        if face_present and eyes_closed_for < self.settings.current.closed_eyes_limit:
+            self.absent_since = None
+            return self.switch('active', now)
+
+        if not face_present:
+            if self.absent_since is None:
+                self.absent_since = now
+            if now - self.absent_since < self.idle_after:
+                return False
+        return self.switch('idle', now)
+
+    def switch(self, mode, now):
+        if mode == self.mode:
+            return False
+        self.finish(now)
+        self.mode = mode
+        self.mode_since = now
+        self.switches += 1
+        return True
+
+    def stats(self, now):
+        seconds = dict(self.seconds)
+        if self.mode_since is not None:
+            seconds[self.mode] += now - self.mode_since
+        return {
+            'mode': self.mode,
+            'active_seconds': round(seconds['active'], 1),
+            'idle_seconds': round(seconds['idle'], 1),
+            'switches': self.switches,
+        }
+
+class FrameGovernor:
+    """
+    Picks the quality tier that keeps per-frame processing inside the budget of the target FPS.
+    A window of frames over budget steps one tier down; a window with plenty of headroom tries the
+    next better tier, and a try that fails at once doubles the wait before the next one.
+    A tier scales full frames down; face crops have a fixed size, so it sets the share of them
+    that is inferred instead.
+    """
+    def __init__(self, target_fps=TARGET_FPS, tiers=QUALITY_TIERS, window=GOVERNOR_WINDOW):
+        self.target_fps = target_fps
+        self.tiers = tiers
+        self.window = window
+        self.reset()
+
+    def reset(self):
+        self.tier = 0
+        self.samples = []
+        self.mean_seconds = None
+        self.changes = 0
+        self.calm_windows = 0
+        self.backoff = 1
+        self.probing = False  # True during the first window after stepping up
+        self.credit = 0.0  # Share of a crop inference earned by the crops offered so far
+        self.crops_skipped = 0
+        QUALITY_TIER.set(0)
+
+    @property
+    def budget(self):
+        return 1.0 / self.target_fps if self.target_fps else None
+
+    @property
+    def scale(self):
+        return self.tiers[self.tier]
+
+    def observe(self, seconds):
+        """
+        Feed the processing time of one inference; returns True when this frame changed the tier.
+        """
+        if not self.budget:
+            return False
+        self.samples.append(seconds)
+        if len(self.samples) < self.window:
+            return False
+        self.mean_seconds = sum(self.samples) / len(self.samples)
+        self.samples.clear()
+        probing, self.probing = self.probing, False
+
+        if self.mean_seconds > self.budget:
+            self.calm_windows = 0
+            if probing:
+                self.backoff = min(self.backoff * 2, GOVERNOR_MAX_BACKOFF)  # The better tier still doesn't fit
+            return self.step(1) if self.tier < len(self.tiers) - 1 else False
+        if probing:
+            self.backoff = 1
+        if self.tier > 0 and self.mean_seconds < self.budget * GOVERNOR_HEADROOM:
+            self.calm_windows += 1
+            if self.calm_windows >= self.backoff:
+                self.calm_windows = 0
+                self.probing = True
+                return self.step(-1)
+        else:
+            self.calm_windows = 0
+        return False
+
+    def admit(self):
+        """
+        Whether to infer the next face crop. Shrinking a crop barely changes what face_mesh costs,
+        so below the best tier only the tier's share of crops is inferred, spread evenly. A skipped
+        crop counts as a frame that took no time, so the average is per frame offered.
+        """
+        if self.scale >= 1.0:
+            return True
+        self.credit += self.scale
+        if self.credit >= 1.0:
+            self.credit -= 1.0
+            return True
+        self.crops_skipped += 1
+        self.observe(0.0)
+        return False
+
+    def step(self, direction):
+        self.tier += direction
+        self.changes += 1
+        QUALITY_TIER.set(self.tier)
+        return True
+
+    def stats(self):
+        return {
+            'target_fps': self.target_fps,
+            'tier': self.tier,
+            'input_scale': self.scale,
+            'mean_frame_ms': None if self.mean_seconds is None else round(self.mean_seconds * 1000, 2),
+            'tier_changes': self.changes,
+            'crops_skipped': self.crops_skipped,
+        }
+
+class ImageDirectoryCapture:
+    """
+    Reads a directory of still images in name order through the cv2.VideoCapture read()/release() interface.
+    """
+    def __init__(self, directory, fps=REPLAY_IMAGE_FPS):
+        self.paths = sorted(
+            os.path.join(directory, name) for name in os.listdir(directory)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        self.fps = fps
+        self.position = 0
+
+    def read(self):
+        while self.position < len(self.paths):
+            frame = cv2.imread(self.paths[self.position])
+            self.position += 1
+            if frame is not None:
+                return True, frame
+        return False, None
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        return 0.0
+
+    def set(self, prop, value):
+        return False
+
+    def release(self):
+        self.position = len(self.paths)
 
-                frame_height, frame_width, _ = frame.shape
-                iris_left_pixel = [(x * frame_width, y * frame_height) for x, y in iris_left]
-                iris_right_pixel = [(x * frame_width, y * frame_height) for x, y in iris_right]
-                left_eye_pixel = [(x * frame_width, y * frame_height) for x, y in left_eye]
-                right_eye_pixel = [(x * frame_width, y * frame_height) for x, y in right_eye]
-                nose_pixel = (nose[0] * frame_width, nose[1] * frame_height)
-
-                # Detect blink or closed eyes
-                left_eye_ratio = detect_blink_or_close(left_eye_pixel)
-                right_eye_ratio = detect_blink_or_close(right_eye_pixel)
-
-                # Handle Eye Closure and Gestures
-                if left_eye_ratio < BLINK_THRESHOLD or right_eye_ratio < BLINK_THRESHOLD:
-                    if eye_close_start is None:
-                        eye_close_start = time.time()
-
-                if left_eye_ratio < BLINK_THRESHOLD and right_eye_ratio >= BLINK_THRESHOLD:
-                    pyautogui.moveRel(-40, 0)  # Move cursor left
-                    print("Left eye blink detected: Moving cursor left")
-                elif right_eye_ratio < BLINK_THRESHOLD and left_eye_ratio >= BLINK_THRESHOLD:
-                    pyautogui.moveRel(40, 0)  # Move cursor right
-                    print("Right eye blink detected: Moving cursor right")
-
-                else:
-                    if eye_close_start is not None:
-                        eye_close_duration = time.time() - eye_close_start
-
-                        if eye_close_duration >= CLOSE_EYE_DURATION_CLICK and not click_triggered:
-                            pyautogui.click()  # Perform click after 5 seconds of eye closure
-                            print("Eye closure detected for 5 seconds: Performing click")
-                            click_triggered = True  # Prevent triggering multiple clicks
-                        
-                        if eye_close_duration < CLOSE_EYE_DURATION_CLICK:
-                            click_triggered = False  # Reset click trigger if not enough duration
-
-                        eye_close_start = None
-
-                if tracking_enabled:
-                    horizontal_ratio_left, vertical_ratio_left = calculate_position_ratio(iris_left_pixel, left_eye_pixel)
-                    horizontal_ratio_right, vertical_ratio_right = calculate_position_ratio(iris_right_pixel, right_eye_pixel)
-
-                    movement_left = detect_movement(horizontal_ratio_left, vertical_ratio_left)
-                    movement_right = detect_movement(horizontal_ratio_right, vertical_ratio_right)
-
-                    if movement_left == DIRECTIONS["left"] or movement_right == DIRECTIONS["left"]:
-                        pyautogui.scroll(25)  # Scroll up
-                    elif movement_left == DIRECTIONS["right"] or movement_right == DIRECTIONS["right"]:
-                        pyautogui.scroll(-25)  # Scroll down
-                    
-                    current_iris_position = (
-                        np.mean([horizontal_ratio_left, vertical_ratio_left]) +
-                        np.mean([horizontal_ratio_right, vertical_ratio_right])
-                    ) / 2
-
-                    if last_iris_position is None:
-                        last_iris_position = current_iris_position
-
-                    # Check for movement
-                    if abs(current_iris_position - last_iris_position) < 0.5:  # Adjust threshold as needed
-                        if stable_start_time is None:
-                            stable_start_time = time.time()
-                        else:
-                            stable_duration = time.time() - stable_start_time
-                            if stable_duration >= STABLE_DURATION_CLICK:
-                                if not click_triggered:
-                                    pyautogui.click()  # Perform click after 5 seconds of stability
-                                    print("Iris stable for 5 seconds: Click action triggered")
-                                    click_triggered = True  # Prevent multiple clicks
-                                stable_start_time = None  # Reset the timer
+class SyntheticCapture:
+    """
+    Generated frames at a fixed size and rate, a bright square sweeping over a dark background,
+    through the cv2.VideoCapture interface. Stands in for a camera where there is none.
+    """
+    def __init__(self, width=SYNTHETIC_FRAME_SIZE[0], height=SYNTHETIC_FRAME_SIZE[1], fps=REPLAY_IMAGE_FPS):
+        self.width = int(width)
+        self.height = int(height)
+        self.fps = fps
+        self.index = 0
+        self.next_frame_at = None
+
+    def read(self, image=None):
+        now = time.perf_counter()
+        if self.next_frame_at is not None and self.next_frame_at > now:
+            time.sleep(self.next_frame_at - now)
+        self.next_frame_at = max(now, self.next_frame_at or now) + 1.0 / self.fps
+        if image is None or image.shape != (self.height, self.width, 3):
+            image = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        image.fill(32)
+        side = max(1, min(self.width, self.height) // 4)
+        x = self.index * 4 % max(1, self.width - side)
+        top = (self.height - side) // 2
+        image[top:top + side, x:x + side] = 224
+        self.index += 1
+        return True, image
+
+    def get(self, prop):
+        return {
+            cv2.CAP_PROP_FRAME_WIDTH: self.width,
+            cv2.CAP_PROP_FRAME_HEIGHT: self.height,
+            cv2.CAP_PROP_FPS: self.fps,
+        }.get(prop, 0.0)
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            self.width = int(value)
+        elif prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            self.height = int(value)
+        elif prop == cv2.CAP_PROP_FPS:
+            self.fps = value
+        else:
+            return False
+        return True
+
+    def release(self):
+        pass
+
+def configure_camera(cap, settings):
+    # FOURCC goes first: many drivers only offer the higher resolutions and rates once MJPG is selected
+    if settings['fourcc']:
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*settings['fourcc']))
+    if settings['width']:
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, settings['width'])
+    if settings['height']:
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, settings['height'])
+    if settings['fps']:
+        cap.set(cv2.CAP_PROP_FPS, settings['fps'])
+    if settings['buffer_size']:
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, settings['buffer_size'])
+
+def open_capture(source, settings=None):
+    """
+    Open a camera index, a video file, a directory of images or 'synthetic' for reading frames.
+    Cameras get CAPTURE_SETTINGS, overridden by settings. Objects that already have the
+    cv2.VideoCapture read() interface are used as they are.
+    """
+    if hasattr(source, 'read'):
+        return source
+    settings = {**CAPTURE_SETTINGS, **(settings or {})}
+    if source == SYNTHETIC_SOURCE:
+        return SyntheticCapture(
+            settings['width'] or SYNTHETIC_FRAME_SIZE[0],
+            settings['height'] or SYNTHETIC_FRAME_SIZE[1],
+            settings['fps'] or REPLAY_IMAGE_FPS,
+        )
+    if isinstance(source, str) and os.path.isdir(source):
+        return ImageDirectoryCapture(source)
+    if isinstance(source, str) and source.isdigit():
+        source = int(source)
+    cap = cv2.VideoCapture(source)
+    if isinstance(source, int):
+        configure_camera(cap, settings)
+    return cap
+
+def describe_capture(cap):
+    """
+    What a source actually delivers, which can differ from what was asked for.
+    """
+    fourcc = int(cap.get(cv2.CAP_PROP_FOURCC))
+    buffer_size = int(cap.get(cv2.CAP_PROP_BUFFERSIZE))
+    return {
+        'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        'fps': round(cap.get(cv2.CAP_PROP_FPS), 2),
+        'fourcc': fourcc.to_bytes(4, 'little').decode('ascii', 'replace').strip('\x00') if fourcc > 0 else None,
+        'buffer_size': buffer_size if buffer_size > 0 else None,
+    }
+
+def capture_options(options):
+    """
+    The frame source and capture settings of a /start request body, or (None, None) when it names
+    neither. Raises ValueError for values that cannot work.
+    """
+    source = options.get('source')
+    if source is not None:
+        if isinstance(source, bool) or not isinstance(source, (int, str)):
+            raise ValueError("source must be a camera index, a file or directory path, or 'synthetic'")
+        if isinstance(source, int) and source < 0:
+            raise ValueError("source camera index cannot be negative")
+        if isinstance(source, str) and source != SYNTHETIC_SOURCE and not source.isdigit() and not os.path.exists(source):
+            raise ValueError(f"source {source} does not exist")
+        if isinstance(source, str) and source.isdigit():
+            source = int(source)
+
+    settings = {}
+    for key in ('width', 'height', 'fps', 'buffer_size'):
+        value = options.get(key)
+        if value is None:
+            continue
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+            raise ValueError(f"{key} must be a positive number")
+        settings[key] = value if key == 'fps' else int(value)
+    if 'fourcc' in options:
+        fourcc = options['fourcc']
+        if fourcc is not None and not (isinstance(fourcc, str) and len(fourcc) == 4):
+            raise ValueError("fourcc must be a four-character code such as MJPG, or null for the driver default")
+        settings['fourcc'] = fourcc
+    if source is None and not settings:
+        return None, None
+    return source, settings
+
+class TimedSink:
+    """
+    Wraps a sink and adds up the time spent inside its action calls.
+    """
+    def __init__(self, sink):
+        self.sink = sink
+        self.elapsed = 0.0
+
+    def scroll(self, amount):
+        start = time.perf_counter()
+        self.sink.scroll(amount)
+        self.elapsed += time.perf_counter() - start
+
+    def move_rel(self, dx, dy):
+        start = time.perf_counter()
+        self.sink.move_rel(dx, dy)
+        self.elapsed += time.perf_counter() - start
+
+    def click(self):
+        start = time.perf_counter()
+        self.sink.click()
+        self.elapsed += time.perf_counter() - start
+
+def replay(source, sink=None, max_frames=None, use_roi=False):
+    """
+    Run the detection and gesture code over recorded footage, one frame at a time on the calling thread.
+    Gesture timing follows the footage's own frame rate rather than the wall clock.
+    Returns the per-stage durations in seconds, keyed by PIPELINE_STAGES, and the number of frames read.
+    """
+    cap = open_capture(source)
+    fps = cap.get(cv2.CAP_PROP_FPS) or REPLAY_IMAGE_FPS
+    timed_sink = TimedSink(sink or NullSink())
+    gestures = GestureEngine(timed_sink)
+    replay_face_mesh = create_face_mesh()  # Fresh tracking state, independent of a live pipeline
+    roi = FaceRoi() if use_roi else None
+    points = np.zeros((NUM_LANDMARKS, 3))
+    timings = {stage: [] for stage in PIPELINE_STAGES}
+    frames = 0
+
+    try:
+        while max_frames is None or frames < max_frames:
+            start = time.perf_counter()
+            ret, frame = cap.read()
+            captured = time.perf_counter()
+            if not ret:
+                break
+
+            input_frame, box = roi.crop(frame) if roi else (frame, None)
+            rgb_frame = prepare_frame(input_frame)
+            converted = time.perf_counter()
+            result = replay_face_mesh.process(rgb_frame)
+            face_found = bool(result.multi_face_landmarks)
+            if face_found:
+                landmarks_to_array(result.multi_face_landmarks[0], points)
+                if roi:
+                    roi.to_frame(points, box, frame.shape)
+            if roi:
+                roi.update(points if face_found else None, frame.shape)
+            if face_found:
+                mirror_points(points)
+            inferred = time.perf_counter()
+
+            action_before = timed_sink.elapsed
+            if face_found:
+                gestures.process(points, frame.shape, frames / fps)
+            finished = time.perf_counter()
+            action = timed_sink.elapsed - action_before
+
+            timings['capture'].append(captured - start)
+            timings['convert'].append(converted - captured)
+            timings['inference'].append(inferred - converted)
+            timings['gesture'].append(finished - inferred - action)
+            timings['action'].append(action)
+            frames += 1
+    finally:
+        cap.release()
+        replay_face_mesh.close()
+
+    return timings, frames
+
+class LatestFrameSlot:
+    """
+    Single-item handoff between two pipeline stages where the newest item always wins.
+    A put never blocks the producer: an item that was not picked up yet is replaced and counted as dropped.
+    """
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._item = None
+        self.dropped = 0
+
+    def put(self, item):
+        """
+        Returns the stale item this one replaced, or None, so its buffers can be reused.
+        """
+        with self._condition:
+            stale = self._item
+            if stale is not None:
+                self.dropped += 1
+            self._item = item
+            self._condition.notify()
+        return stale
+
+    def get(self, timeout=None):
+        with self._condition:
+            if self._item is None:
+                self._condition.wait(timeout)
+            item, self._item = self._item, None
+            return item
+
+    def clear(self):
+        with self._condition:
+            self._item = None
+
+class TrackingPipeline:
+    """
+    Capture, inference and action stages on their own threads, joined by latest-frame-wins slots.
+    Every item carries the perf_counter() timestamp taken right after cap.read() so the
+    action stage can measure glass-to-action latency.
+    """
+    def __init__(self, camera_index=0, sink=None, use_roi=ROI_ENABLED, face_mesh=None, inference_mode=INFERENCE_MODE, capture_settings=None, telemetry=None, recorder=None, settings=None):
+        self.camera_index = camera_index  # Camera index, video file, image directory, 'synthetic' or a capture object
+        self.capture_settings = capture_settings or {}  # Overrides of CAPTURE_SETTINGS
+        self.capture_info = None  # What the source reported delivering when it was opened
+        self.capture_error = None  # Why the capture stage died in this run, if it raised
+        self.capture_fps = 0.0
+        self.capture_reads = 0
+        self.capture_read_seconds = 0.0
+        self.inference_mode = inference_mode  # 'thread', or 'process' for a shared-memory worker
+        self.settings = settings or tracker_config.ConfigStore(DEFAULT_CONFIG)  # Live tuning values, swappable while running
+        self.face_mesh = face_mesh  # Each pipeline gets its own graph unless one is handed in
+        self.face_mesh_options = DEFAULT_CONFIG.face_mesh_options if face_mesh is not None else None  # What face_mesh was built with
+        self.face_mesh_rebuilds = 0
+        self.last_rebuild_ms = None
+        self.inference_fallback = None  # Why process inference fell back to the inference thread in this run
+        self.roi = FaceRoi() if use_roi else None
+        self.last_frame_shape = None
+        self.power = PowerMonitor(settings=self.settings)
+        self.governor = FrameGovernor()
+        self.fps = 0.0
+        self.wake = threading.Event()  # Cuts an idle capture wait short when the user comes back
+        self.telemetry = telemetry  # TelemetryHub that frame samples and gestures are pushed to, if any
+        self.recorder = recorder  # LandmarkRecorder that every frame, gesture and action is written to, if any
+        self.profiler = None  # tracker_profiler.ThreadProfiles every stage polls while /profile runs in cprofile mode
+        sink = sink or PyAutoGuiSink()
+        self.dispatcher = ActionDispatcher(RecorderSink(sink, recorder, 'action') if recorder else sink)
+        action_sink = RecorderSink(self.dispatcher, recorder, 'gesture') if recorder else self.dispatcher
+        self.action_sink = MetricsSink(TelemetrySink(action_sink, telemetry) if telemetry else action_sink)
+        self.gestures = GestureEngine(self.action_sink, self.settings)
+        self.running = False
+        self.active = threading.Event()  # Cleared while paused in warm standby
+        self.state_lock = threading.Lock()  # Orders resume() against the standby timeout
+        self.prepare_lock = threading.Lock()  # run() waits for a warm-up already building face_mesh
+        self.paused_since = None
+        self.armed = False  # arm() already marked the coming run() as started
+        self.ready = threading.Event()  # Set once the first frame of a run has been captured
+        self.resume_requested_at = None
+        self.resume_kind = None
+        self.startup_ms = {'cold': None, 'warm': None}  # Last request-to-first-action latency of each kind
+        self.frame_slot = LatestFrameSlot()  # capture -> inference: (capture_ts, frame)
+        self.result_slot = LatestFrameSlot()  # inference -> action: (capture_ts, points, frame_shape)
+        self.frames_captured = 0
+        self.frames_inferred = 0
+        self.frames_acted = 0
+        self.last_latency = None
+        self.max_latency = 0.0
+        self.total_latency = 0.0
+        # Landmark arrays cycle between the inference and action stages instead of being allocated per frame
+        self.free_points = queue.SimpleQueue()
+        for _ in range(3):
+            self.free_points.put(np.zeros((NUM_LANDMARKS, 3)))
+        # Camera frames and RGB conversion targets are reused the same way
+        self.free_frames = queue.SimpleQueue()
+        self.recycle_frames = False
+        self.rgb_buffers = {}
+        self.scaled_buffers = {}
+
+    def arm(self):
+        """
+        Mark a run as started before run() is handed to its own thread, so a stop() or pause()
+        that comes in before run() gets going reaches it instead of being overwritten.
+        """
+        with self.state_lock:
+            self.running = True
+            self.active.set()
+            self.paused_since = None
+            self.armed = True
+
+    def run(self):
+        """
+        Run all stages and return once every one of them has exited.
+        """
+        with self.state_lock:
+            if not self.armed:
+                self.running = True
+                self.active.set()
+                self.paused_since = None
+            self.armed = False
+            self.inference_fallback = None
+            self.capture_error = None
+            self.resume_requested_at = time.perf_counter()
+            self.resume_kind = 'cold'
+            self.ready.clear()
+        if self.running:
+            self.prepare()
+        if not self.running:
+            return  # Stopped while face_mesh was loading; a pause() meanwhile leaves the run in standby instead
+        self.gestures = GestureEngine(self.action_sink, self.settings)
+        if self.roi:
+            self.roi.reset()
+        self.governor.reset()
+        self.fps = 0.0
+        self.capture_fps = 0.0
+        self.capture_reads = 0
+        self.capture_read_seconds = 0.0
+        self.dispatcher.start()
+        self.frame_slot.clear()
+        self.result_slot.clear()
+        with self.state_lock:
+            if self.active.is_set():
+                self.power.start(time.perf_counter())
+        stages = [
+            threading.Thread(target=self.capture_stage, name="iris-capture", daemon=True),
+            threading.Thread(target=self.inference_stage, name="iris-inference", daemon=True),
+            threading.Thread(target=self.action_stage, name="iris-action", daemon=True),
+        ]
+        for stage in stages:
+            stage.start()
+        for stage in stages:
+            stage.join()
+        self.dispatcher.stop()
+        self.power.finish(time.perf_counter())
+
+    def stop(self):
+        self.running = False
+        self.active.set()
+        self.wake.set()
+
+    @property
+    def standby(self):
+        return self.running and not self.active.is_set()
+
+    def pause(self):
+        """
+        Stop acting on frames but keep the camera, model and stage threads up for WARM_STANDBY_TIMEOUT.
+        """
+        with self.state_lock:
+            if not self.running or not self.active.is_set():
+                return
+            self.active.clear()
+            now = time.perf_counter()
+            self.paused_since = now
+            self.power.finish(now)
+            self.frame_slot.clear()
+            self.result_slot.clear()
+
+    def resume(self):
+        """
+        Leave warm standby; returns False if the pipeline already shut down and needs a cold run().
+        """
+        with self.state_lock:
+            if not self.running:
+                return False
+            if self.active.is_set():
+                return True
+            now = time.perf_counter()
+            self.resume_requested_at = now
+            self.resume_kind = 'warm'
+            self.gestures = GestureEngine(self.action_sink, self.settings)
+            if self.roi:
+                self.roi.reset()
+            self.power.start(now)
+            self.paused_since = None
+            self.active.set()
+            self.wake.set()
+            return True
+
+    def standby_expired(self):
+        with self.state_lock:
+            if self.active.is_set() or not WARM_STANDBY_TIMEOUT:
+                return False
+            if time.perf_counter() - self.paused_since < WARM_STANDBY_TIMEOUT:
+                return False
+            self.running = False
+            return True
+
+    def capture_stage(self):
+        cap = None
+        try:
+            # Opened inside the try, so a source that cannot be opened stops the other stages too
+            cap = open_capture(self.camera_index, self.capture_settings)
+            self.capture_info = describe_capture(cap)
+            last_capture = None
+            # Real cameras decode into frames that come back from the inference stage instead of new arrays
+            self.recycle_frames = isinstance(cap, cv2.VideoCapture)
+            full_size = (cap.get(cv2.CAP_PROP_FRAME_WIDTH), cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            idle_size_applied = False
+            while self.running:
+                if self.profiler:
+                    self.profiler.poll()
+                if not self.active.is_set():
+                    if self.standby_expired():
+                        break
+                    if hasattr(cap, 'grab'):
+                        # Keep the driver's buffer drained so the first frame after resume is fresh
+                        if not cap.grab():
+                            break  # The file ended or the camera went away; a later start opens it again
                     else:
-                        stable_start_time = None  # Reset stability timer on movement
+                        self.active.wait(STAGE_POLL_INTERVAL)
+                    continue
+
+                idle = self.power.idle
+                if idle != idle_size_applied:
+                    width, height = IDLE_FRAME_SIZE if idle else full_size
+                    cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+                    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+                    idle_size_applied = idle
+
+                start = time.perf_counter()
+                ret, frame = cap.read(self.take_frame_buffer()) if self.recycle_frames else cap.read()
+                if not ret:
+                    if not self.ready.is_set():
+                        self.capture_error = "source delivered no frames"  # Could not be opened, or is empty
+                    break
+                capture_ts = time.perf_counter()
+                STAGE_SECONDS['capture'].observe(capture_ts - start)
+                self.frames_captured += 1
+                self.capture_reads += 1
+                self.capture_read_seconds += capture_ts - start
+                if last_capture is not None and capture_ts > last_capture:
+                    rate = 1.0 / (capture_ts - last_capture)
+                    self.capture_fps = rate if not self.capture_fps else self.capture_fps + FPS_SMOOTHING * (rate - self.capture_fps)
+                last_capture = capture_ts
+                if not self.ready.is_set():
+                    self.ready.set()
+                stale = self.frame_slot.put((capture_ts, frame))
+                if stale is not None:
+                    FRAMES_DROPPED['before_inference'].inc()
+                    self.recycle_frame(stale[1])
+
+                if idle:
+                    self.wake.wait(IDLE_SAMPLE_INTERVAL)
+                    self.wake.clear()
+        except Exception as e:
+            self.capture_error = repr(e)  # Shown in stats(); the traceback still goes to stderr
+            raise
+        finally:
+            self.running = False  # A dead camera stops the whole pipeline, as the single loop did
+            if cap is not None:
+                cap.release()
+
+    def inference_stage(self):
+        if self.inference_mode == 'process':
+            try:
+                self.process_inference_stage()
+                return
+            except (RuntimeError, OSError) as e:
+                # The worker died or never started. Carry on in this process rather than leave
+                # capture running with nothing inferred while the tracker reports itself running.
+                print(f"Inference worker failed, falling back to in-thread inference: {e!r}")
+                self.inference_fallback = repr(e)
+        while self.running:
+            if self.profiler:
+                self.profiler.poll()
+            item = self.frame_slot.get(timeout=STAGE_POLL_INTERVAL)
+            if item is None:
+                continue
+            capture_ts, frame = item
+            config = self.settings.current
+            if config.face_mesh_options != self.face_mesh_options:
+                self.replace_face_mesh(config)  # Capture carries on meanwhile; the slot keeps only its newest frame
+
+            start = time.perf_counter()
+            input_frame, box = self.crop_input(frame)
+            if input_frame is None:
+                self.recycle_frame(frame)  # Skipped by the governor
+                continue
+            rgb_frame = prepare_frame(input_frame, out=self.rgb_buffer(input_frame.shape))
+            self.recycle_frame(frame)
+            converted = time.perf_counter()
+            result = self.face_mesh.process(rgb_frame)
+            points = None
+            if result.multi_face_landmarks:
+                points = landmarks_to_array(result.multi_face_landmarks[0], self.take_points_buffer())
+            self.finish_inference(capture_ts, frame.shape, box, points, start, converted)
+
+    def prepare(self):
+        """
+        Build face_mesh for the current settings and load its models, before the camera is opened.
+        Called by run(), and ahead of it by the service's warm-up thread.
+        """
+        with self.prepare_lock:
+            config = self.settings.current
+            if self.inference_mode == 'thread' and self.face_mesh_options != config.face_mesh_options:
+                self.replace_face_mesh(config)  # Loads the models too
+            elif self.face_mesh is not None:
+                # The first process() call loads the models; pay for it before the camera is open
+                self.face_mesh.process(np.zeros((ROI_INPUT_SIZE, ROI_INPUT_SIZE, 3), dtype=np.uint8))
+
+    def replace_face_mesh(self, config):
+        """
+        Build a face_mesh with the config's confidences, load its models and retire the old one.
+        Runs on the inference stage, so the camera stays open throughout.
+        """
+        start = time.perf_counter()
+        face_mesh = create_face_mesh(config.min_detection_confidence, config.min_tracking_confidence)
+        face_mesh.process(np.zeros((ROI_INPUT_SIZE, ROI_INPUT_SIZE, 3), dtype=np.uint8))
+        old_face_mesh, self.face_mesh = self.face_mesh, face_mesh
+        self.face_mesh_options = config.face_mesh_options
+        if old_face_mesh is not None:
+            old_face_mesh.close()
+        self.face_mesh_rebuilds += 1
+        self.last_rebuild_ms = round((time.perf_counter() - start) * 1000, 1)
+
+    def rgb_buffer(self, shape):
+        """
+        The reused RGB conversion target for frames of this shape (full frames and crops differ).
+        """
+        buffer = self.rgb_buffers.get(shape)
+        if buffer is None:
+            buffer = self.rgb_buffers[shape] = np.empty(shape, dtype=np.uint8)
+        return buffer
+
+    def recycle_frame(self, frame):
+        """
+        Give a camera frame back to the capture stage once nothing reads it any more.
+        """
+        if self.recycle_frames:
+            self.free_frames.put(frame)
+
+    def process_inference_stage(self):
+        """
+        Inference stage variant that hands frames to an out-of-process worker through shared memory.
+        With ROI cropping every crop depends on the previous result, so only one frame is in flight;
+        without it the whole ring is kept busy.
+        """
+        worker = None
+        pending = collections.deque()  # (slot, capture_ts, frame_shape, box, start, converted) in submission order
+        max_in_flight = 1 if self.roi else shm_inference.RING_SLOTS
+        try:
+            while self.running:
+                if self.profiler:
+                    self.profiler.poll()
+                if len(pending) < max_in_flight:
+                    item = self.frame_slot.get(timeout=0 if pending else STAGE_POLL_INTERVAL)
+                    if item is not None:
+                        capture_ts, frame = item
+                        start = time.perf_counter()
+                        input_frame, box = self.crop_input(frame)
+                        if input_frame is None:
+                            self.recycle_frame(frame)  # Skipped by the governor
+                            continue
+                        height, width = input_frame.shape[:2]
+                        options = self.settings.current.face_mesh_options
+                        if worker is None or not worker.fits(height, width):
+                            # First frame, or the capture resolution grew: size the ring for it
+                            if worker is not None:
+                                worker.close()
+                            pending.clear()
+                            worker = shm_inference.InferenceProcess(input_frame.nbytes, NUM_LANDMARKS, options)
+                        elif options != worker.face_mesh_options:
+                            worker.configure(options)  # Frames already submitted finish on the old face_mesh
+                            self.face_mesh_rebuilds += 1
+                        slot = worker.take_slot()
+                        prepare_frame(input_frame, out=worker.frame_buffer(slot, height, width))
+                        self.recycle_frame(frame)
+                        worker.submit(slot, height, width)
+                        pending.append((slot, capture_ts, frame.shape, box, start, time.perf_counter()))
+                        continue
+
+                if pending:
+                    reply = worker.reply(timeout=STAGE_POLL_INTERVAL)
+                    if reply is None:
+                        continue
+                    slot, found = reply
+                    _, capture_ts, frame_shape, box, start, converted = pending.popleft()
+                    points = None
+                    if found:
+                        points = self.take_points_buffer()
+                        points[:] = worker.points[slot]
+                    worker.release(slot)
+                    self.finish_inference(capture_ts, frame_shape, box, points, start, converted)
+        finally:
+            if worker is not None:
+                worker.close()
+
+    def crop_input(self, frame):
+        """
+        The frame or face crop to run inference on and the ROI box it came from, or (None, None)
+        for a crop the governor skips. Full frames are scaled down to the governor's tier.
+        """
+        box = None
+        if self.roi is not None:
+            if self.roi.box is not None and frame.shape != self.last_frame_shape:
+                self.roi.reset()  # Boxes are in pixels of the previous capture resolution
+            self.last_frame_shape = frame.shape
+            if self.roi.box is not None and not self.governor.admit():
+                return None, None
+            frame, box = self.roi.crop(frame)
+        scale = self.governor.scale
+        if box is None and scale < 1.0:
+            height, width = frame.shape[:2]
+            shape = (max(1, int(height * scale)), max(1, int(width * scale)), 3)
+            scaled = self.scaled_buffers.get(shape)
+            if scaled is None:
+                scaled = self.scaled_buffers[shape] = np.empty(shape, dtype=np.uint8)
+            # Landmarks are normalized, so a scaled frame needs no remapping afterwards.
+            # INTER_AREA is many times slower at non-integer factors like 0.75, which would defeat the point.
+            cv2.resize(frame, (shape[1], shape[0]), dst=scaled, interpolation=cv2.INTER_LINEAR)
+            frame = scaled
+        return frame, box
+
+    def finish_inference(self, capture_ts, frame_shape, box, points, start, converted):
+        """
+        Map landmarks back to the full frame, move the ROI and hand the result to the action stage.
+        """
+        self.frames_inferred += 1
+        FRAMES_PROCESSED.inc()
+        if points is not None:
+            if self.roi:
+                self.roi.to_frame(points, box, frame_shape)
+        else:
+            FRAMES_WITHOUT_FACE.inc()
+        if self.roi:
+            self.roi.update(points, frame_shape)
+        if points is not None:
+            mirror_points(points)
+        finished = time.perf_counter()
+        STAGE_SECONDS['convert'].observe(converted - start)
+        STAGE_SECONDS['inference'].observe(finished - converted)
+        self.governor.observe(finished - start)
+
+        stale = self.result_slot.put((capture_ts, points, frame_shape))
+        if stale is not None:
+            FRAMES_DROPPED['before_action'].inc()
+            if stale[1] is not None:
+                self.free_points.put(stale[1])
+
+    def take_frame_buffer(self):
+        try:
+            return self.free_frames.get_nowait()
+        except queue.Empty:
+            return None  # cap.read() allocates a new frame, which joins the pool afterwards
+
+    def take_points_buffer(self):
+        try:
+            return self.free_points.get_nowait()
+        except queue.Empty:
+            return np.zeros((NUM_LANDMARKS, 3))
+
+    def action_stage(self):
+        last_finished = None
+        last_sample = 0.0
+        while self.running:
+            if self.profiler:
+                self.profiler.poll()
+            item = self.result_slot.get(timeout=STAGE_POLL_INTERVAL)
+            if item is None:
+                continue
+            capture_ts, points, frame_shape = item
+            if not self.active.is_set():
+                continue  # Paused after this frame was captured
+            now = time.time()
+            if self.recorder:
+                self.recorder.record_frame(now, points, frame_shape)
+            if points is not None:
+                start = time.perf_counter()
+                self.gestures.process(points, frame_shape, now)
+                STAGE_SECONDS['gesture'].observe(time.perf_counter() - start)
+                self.free_points.put(points)
+
+            both_closed_since = self.gestures.both_closed_since
+            eyes_closed_for = 0.0 if both_closed_since is None else now - both_closed_since
+            if self.power.observe(points is not None, eyes_closed_for, time.perf_counter()) and not self.power.idle:
+                self.wake.set()
+
+            finished = time.perf_counter()
+            latency = finished - capture_ts
+            LOOP_LAG.set(latency)
+            if last_finished is not None and finished > last_finished:
+                rate = 1.0 / (finished - last_finished)
+                self.fps = rate if not self.fps else self.fps + FPS_SMOOTHING * (rate - self.fps)
+                FPS.set(round(self.fps, 2))
+            last_finished = finished
+            if self.telemetry and self.telemetry.active and finished - last_sample >= TELEMETRY_INTERVAL:
+                self.telemetry.publish('frame', self.telemetry_sample(points is not None, now, latency))
+                last_sample = finished
+            if self.resume_requested_at is not None and capture_ts >= self.resume_requested_at:
+                self.startup_ms[self.resume_kind] = round((finished - self.resume_requested_at) * 1000, 1)
+                self.resume_requested_at = None
+            self.frames_acted += 1
+            self.last_latency = latency
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
 
-                    last_iris_position = current_iris_position
+    def set_profiler(self, profiler):
+        """
+        Hand a tracker_profiler.ThreadProfiles to every stage thread, or take it away with None.
+        """
+        self.profiler = profiler
+        self.dispatcher.profiler = profiler
 
-    cap.release()
+    def telemetry_sample(self, face_found, now, latency):
+        """
+        What the tracker sees right now, rounded for a small /telemetry payload.
+        """
+        sample = {'time': now, 'face': face_found, 'fps': round(self.fps, 1), 'latency_ms': round(latency * 1000, 1)}
+        if face_found and self.gestures.last_metrics:
+            h_left, h_right, v_left, v_right, ear_left, ear_right, move_left, move_right = self.gestures.last_metrics
+            sample.update(
+                horizontal=[round(h_left, 3), round(h_right, 3)],
+                vertical=[round(v_left, 3), round(v_right, 3)],
+                ear=[round(ear_left, 3), round(ear_right, 3)],
+                direction=[DIRECTION_NAMES[move_left], DIRECTION_NAMES[move_right]],
+            )
+        return sample
+
+    def stats(self):
+        """
+        Frame counters, stale frames dropped at each handoff and glass-to-action latency in milliseconds.
+        """
+        if not self.running:
+            state = 'stopped'
+        else:
+            state = 'running' if self.active.is_set() else 'standby'
+        return {
+            'state': state,
+            'cold_start_ms': self.startup_ms['cold'],
+            'warm_resume_ms': self.startup_ms['warm'],
+            'frames_captured': self.frames_captured,
+            'frames_inferred': self.frames_inferred,
+            'frames_acted': self.frames_acted,
+            'dropped_before_inference': self.frame_slot.dropped,
+            'dropped_before_action': self.result_slot.dropped,
+            'last_latency_ms': None if self.last_latency is None else round(self.last_latency * 1000, 2),
+            'mean_latency_ms': round(self.total_latency / self.frames_acted * 1000, 2) if self.frames_acted else None,
+            'max_latency_ms': round(self.max_latency * 1000, 2),
+            'fps': round(self.fps, 2),
+            'inference_mode': self.inference_mode,
+            'inference_fallback': self.inference_fallback,
+            'config_version': self.settings.version,
+            'face_mesh_rebuilds': self.face_mesh_rebuilds,
+            'last_rebuild_ms': self.last_rebuild_ms,
+            'capture': {
+                'source': self.camera_index if isinstance(self.camera_index, (int, str)) else type(self.camera_index).__name__,
+                'requested': {**CAPTURE_SETTINGS, **self.capture_settings},
+                'reported': self.capture_info,
+                'fps': round(self.capture_fps, 2),
+                'mean_read_ms': round(self.capture_read_seconds / self.capture_reads * 1000, 2) if self.capture_reads else None,
+                'error': self.capture_error,
+            },
+            'actions': self.dispatcher.stats(),
+            'roi': self.roi.stats() if self.roi else None,
+            'governor': self.governor.stats(),
+            'power': self.power.stats(time.perf_counter()),
+        }
+
+class TrackerLifecycle:
+    """
+    Moves the main pipeline between stopped, starting, running and stopping.
+    Control calls only record the wanted state and return at once; a controller thread does the
+    slow part (loading the model, opening the camera, joining threads). Every state change bumps
+    a version number that clients can wait on.
+    """
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+        self.state = 'stopped'
+        self.version = 0
+        self.target = 'stopped'
+        self.target_mode = pipeline.inference_mode
+        self.target_source = (pipeline.camera_index, pipeline.capture_settings)
+        self.warm = False  # Whether the last start resumed from warm standby
+        self.thread = None  # Runs pipeline.run()
+        self.controller = None
+        self.changed = threading.Condition()
+
+    def snapshot(self):
+        return {'state': self.state, 'version': self.version, 'warm': self.warm}
+
+    def set_state(self, state):
+        # Caller holds self.changed
+        self.state = state
+        self.version += 1
+        self.changed.notify_all()
+        if self.pipeline.telemetry:
+            self.pipeline.telemetry.publish('state', self.snapshot())
+
+    def request(self, target, inference_mode=None, source=None, capture_settings=None):
+        """
+        Ask for 'running' or 'stopped' and return the current snapshot without waiting.
+        Asking for the state that is already wanted changes nothing; a new inference mode or
+        frame source restarts a running pipeline.
+        """
+        with self.changed:
+            self.target = target
+            if inference_mode:
+                self.target_mode = inference_mode
+            if source is not None or capture_settings is not None:
+                current_source, current_settings = self.target_source
+                self.target_source = (
+                    current_source if source is None else source,
+                    current_settings if capture_settings is None else capture_settings,
+                )
+            if self.controller is None or not self.controller.is_alive():
+                self.controller = threading.Thread(target=self.control_loop, name="iris-lifecycle", daemon=True)
+                self.controller.start()
+            self.changed.notify_all()
+            return self.snapshot()
+
+    def wait(self, since, timeout):
+        """
+        Block until the version moves past since or timeout runs out, then return the snapshot.
+        """
+        with self.changed:
+            self.changed.wait_for(lambda: self.version != since, timeout)
+            return self.snapshot()
+
+    def reconfigure(self):
+        return (
+            self.target_mode != self.pipeline.inference_mode
+            or self.target_source != (self.pipeline.camera_index, self.pipeline.capture_settings)
+        )
+
+    def pending(self):
+        if self.target == 'stopped':
+            return self.state != 'stopped'
+        return self.state != 'running' or self.reconfigure()
+
+    def control_loop(self):
+        while True:
+            with self.changed:
+                self.changed.wait_for(self.pending)
+                target = self.target
+                reconfigure = self.reconfigure()
+                mode, (source, capture_settings) = self.target_mode, self.target_source
+                self.set_state('starting' if target == 'running' else 'stopping')
+            if target == 'running':
+                self.bring_up(mode, source, capture_settings, reconfigure)
+            else:
+                self.bring_down()
+
+    def bring_up(self, mode, source, capture_settings, reconfigure):
+        pipeline = self.pipeline
+        alive = self.thread is not None and self.thread.is_alive()
+        warm = alive and not reconfigure and pipeline.resume()
+        if not warm:
+            if alive:
+                pipeline.stop()
+                self.thread.join()
+            pipeline.inference_mode = mode
+            pipeline.camera_index = source
+            pipeline.capture_settings = capture_settings
+            pipeline.ready.clear()
+            pipeline.arm()  # A stop or pause from here on reaches the run even while face_mesh loads
+            self.thread = threading.Thread(target=self.run_pipeline, name="iris-pipeline", daemon=True)
+            self.thread.start()
+            # Running means frames are flowing. A stop that comes in meanwhile stops the run at once
+            # rather than waiting on a camera that may take long to open or never deliver.
+            while not pipeline.ready.wait(STAGE_POLL_INTERVAL):
+                if not self.thread.is_alive():
+                    break
+                if self.target == 'stopped':
+                    pipeline.stop()  # The run exits by itself once open() or read() returns
+                    break
+        with self.changed:
+            self.warm = warm
+            if self.thread.is_alive() and pipeline.running:
+                self.set_state('running')
+            else:
+                if self.target == 'running':
+                    self.target = 'stopped'  # The source failed before its first frame; retrying at once would spin
+                self.set_state('stopped')
+
+    def bring_down(self):
+        alive = self.thread is not None and self.thread.is_alive()
+        if alive and WARM_STANDBY_TIMEOUT:
+            self.pipeline.pause()  # Camera and model stay open until the standby timeout
+        elif alive:
+            self.pipeline.stop()
+            self.thread.join()
+        with self.changed:
+            self.set_state('stopped')
+
+    def run_pipeline(self):
+        self.pipeline.run()
+        with self.changed:
+            # The camera gave out while running; standby expiring after a stop changes nothing
+            if self.thread is threading.current_thread() and self.state == 'running':
+                self.target = 'stopped'
+                self.set_state('stopped')
+
+    def shutdown(self):
+        self.pipeline.stop()
+
+
+# What the routes control. Built by create_service() on the first request, or at launch when run as
+# a script; tracker and inference worker processes import this module only for its classes and
+# never serve a request, so they never build these.
+telemetry_hub = None
+tracker_settings = None
+recorder = None
+pipeline = None
+lifecycle = None
+tracker_manager = None  # Assigned last, so once it is set everything else is too
+service_lock = threading.Lock()
+profile_lock = threading.Lock()  # One /profile window at a time
+
+def create_service():
+    """
+    Build the API's tracker with its settings, telemetry, recorder and worker manager, and
+    register their cleanup for exit. Does nothing if they are already built.
+    """
+    global telemetry_hub, tracker_settings, recorder, pipeline, lifecycle, tracker_manager
+    with service_lock:
+        if tracker_manager is not None:
+            return
+        telemetry_hub = telemetry.TelemetryHub()
+        tracker_settings = tracker_config.ConfigStore(DEFAULT_CONFIG, PROFILES_FILE)
+        recorder = landmark_recorder.LandmarkRecorder(RECORDER_DIR) if RECORDER_ENABLED else None  # Starts writing with the first frame
+        pipeline = TrackingPipeline(telemetry=telemetry_hub, recorder=recorder, settings=tracker_settings)  # face_mesh is built by warm_up() or the first run
+        lifecycle = TrackerLifecycle(pipeline)
+        if recorder:
+            atexit.register(recorder.close)  # Registered first so it runs last, after the pipeline stops
+        manager = TrackerManager()
+        atexit.register(manager.shutdown)
+        atexit.register(lifecycle.shutdown)
+        tracker_manager = manager
+
+# Any WSGI server (waitress-serve iris_api:app, flask run, a test client) gets the service on its
+# first request, without having to run this file's __main__ block
+@app.before_request
+def ensure_service():
+    if tracker_manager is None:
+        create_service()
+
+def request_options():
+    """
+    The request's JSON object, {} without a body, or None for a body that is not an object.
+    """
+    options = request.get_json(silent=True)
+    if options is None:
+        return {}  # No body, or not JSON: the current settings
+    return options if isinstance(options, dict) else None
 
 @app.route('/start', methods=['POST'])
 def start_tracking():
-    global tracking_enabled, tracking_thread
-    if not tracking_enabled:
-        tracking_enabled = True
-        tracking_thread = threading.Thread(target=tracking_loop)
-        tracking_thread.start()
-        return jsonify({'message': 'Tracking started'}), 200
-    else:
-        return jsonify({'message': 'Tracking is already running'}), 400
+    options = request_options()
+    if options is None:
+        return jsonify({'message': 'options must be a JSON object'}), 400
+    inference_mode = options.get('inference')
+    if inference_mode is not None and inference_mode not in INFERENCE_MODES:
+        return jsonify({'message': f"inference must be one of {', '.join(INFERENCE_MODES)}"}), 400
+    try:
+        source, capture_settings = capture_options(options)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    profile = options.get('profile')
+    profile_applied = False
+    if profile is not None:
+        if not isinstance(profile, str):
+            return jsonify({'message': 'profile must be a string'}), 400
+        # No saved profile by that name keeps the live values, including any set through PUT /config
+        profile_applied = tracker_settings.apply_profile(profile) is not None
+    # Returns straight away; wait on /state?since=<version> to see it reach running
+    state = lifecycle.request('running', inference_mode, source, capture_settings)
+    return jsonify({'message': 'Tracking started', 'profile_applied': profile_applied, **state}), 202
 
 @app.route('/stop', methods=['POST'])
 def stop_tracking():
-    global tracking_enabled, tracking_thread
-    if tracking_enabled:
-        tracking_enabled = False
-        if tracking_thread and tracking_thread.is_alive():
-            tracking_thread.join()  # Wait for the thread to finish
-        return jsonify({'message': 'Tracking stopped'}), 200
+    return jsonify({'message': 'Tracking stopped', **lifecycle.request('stopped')}), 202
+
+@app.route('/state', methods=['GET'])
+def get_state():
+    """
+    The lifecycle state. With ?since=<version> the request waits, up to ?timeout= seconds,
+    for the state to move past that version.
+    """
+    since = request.args.get('since', type=int)
+    if since is None:
+        with lifecycle.changed:
+            return jsonify(lifecycle.snapshot()), 200
+    timeout = min(request.args.get('timeout', default=STATE_WAIT_MAX, type=float), STATE_WAIT_MAX)
+    return jsonify(lifecycle.wait(since, timeout)), 200
+
+@app.route('/config', methods=['GET'])
+def get_config():
+    return jsonify(tracker_settings.snapshot()), 200
+
+@app.route('/config', methods=['PUT'])
+def update_config():
+    """
+    Change some of the live settings; the rest keep their values. A running tracker picks them up
+    on its next frame, and new face_mesh confidences rebuild the model without closing the camera.
+    """
+    try:
+        tracker_settings.update(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    return jsonify(tracker_settings.snapshot()), 200
+
+@app.route('/config', methods=['DELETE'])
+def reset_config():
+    tracker_settings.reset()
+    return jsonify(tracker_settings.snapshot()), 200
+
+@app.route('/config/profiles', methods=['GET'])
+def list_profiles():
+    return jsonify(tracker_settings.profiles), 200
+
+@app.route('/config/profiles/<name>', methods=['PUT'])
+def save_profile(name):
+    """
+    Save the settings a profile changes from the defaults, replacing the profile if it exists.
+    """
+    try:
+        overrides = tracker_settings.save_profile(name, request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    return jsonify({'message': 'Profile saved', 'name': name, 'settings': overrides}), 200
+
+@app.route('/config/profiles/<name>', methods=['DELETE'])
+def delete_profile(name):
+    if not tracker_settings.delete_profile(name):
+        return jsonify({'message': 'Unknown profile'}), 404
+    return jsonify({'message': 'Profile deleted', 'name': name}), 200
+
+@app.route('/config/profiles/<name>/apply', methods=['POST'])
+def apply_profile(name):
+    if tracker_settings.apply_profile(name) is None:
+        return jsonify({'message': 'Unknown profile'}), 404
+    return jsonify(tracker_settings.snapshot()), 200
+
+@app.route('/trackers', methods=['GET'])
+def list_trackers():
+    return jsonify(tracker_manager.list()), 200
+
+@app.route('/trackers/<tracker_id>/start', methods=['POST'])
+def start_tracker(tracker_id):
+    options = request_options()
+    if options is None:
+        return jsonify({'message': 'options must be a JSON object'}), 400
+    try:
+        # Checked here like /start, since a bad source would only fail inside the worker
+        source, capture_settings = capture_options(options)
+        tracker_manager.start(
+            tracker_id,
+            source=0 if source is None else source,
+            actions=options.get('actions', 'desktop'),
+            capture_settings=capture_settings,
+        )
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    return jsonify({'message': 'Tracker started', 'id': tracker_id}), 200
+
+@app.route('/trackers/<tracker_id>/stop', methods=['POST'])
+def stop_tracker(tracker_id):
+    if not tracker_manager.stop(tracker_id):
+        return jsonify({'message': 'Unknown tracker'}), 404
+    return jsonify({'message': 'Tracker stopped', 'id': tracker_id}), 200
+
+@app.route('/trackers/<tracker_id>/status', methods=['GET'])
+def tracker_status(tracker_id):
+    status = tracker_manager.status(tracker_id)
+    if status is None:
+        return jsonify({'message': 'Unknown tracker'}), 404
+    return jsonify(status), 200
+
+@app.route('/trackers/<tracker_id>', methods=['DELETE'])
+def remove_tracker(tracker_id):
+    if not tracker_manager.remove(tracker_id):
+        return jsonify({'message': 'Unknown tracker'}), 404
+    return jsonify({'message': 'Tracker removed', 'id': tracker_id}), 200
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    return Response(tracker_metrics.REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/telemetry', methods=['GET'])
+def stream_telemetry():
+    """
+    Server-Sent Events: the lifecycle state on connect and on every change, a frame sample every
+    TELEMETRY_INTERVAL while tracking, and each gesture as it fires. A client that falls behind
+    is sent a 'dropped' event and disconnected rather than slowing the tracker down.
+    """
+    subscription = telemetry_hub.subscribe()
+    if subscription is None:
+        return jsonify({'message': 'Too many telemetry subscribers'}), 503
+    with lifecycle.changed:
+        subscription.push(telemetry.encode_event('state', lifecycle.snapshot()))
+    return Response(
+        subscription.stream(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},  # No proxy buffering either
+    )
+
+def stage_totals():
+    """
+    Observations and seconds recorded so far by each pipeline stage.
+    """
+    totals = {}
+    for stage in PIPELINE_STAGES:
+        counts, seconds = STAGE_SECONDS[stage].snapshot()
+        totals[stage] = (sum(counts), seconds)
+    return totals
+
+def profile_window(mode, seconds):
+    """
+    Profile the running tracker for `seconds`. Returns the profiler output (a Counter of collapsed
+    stacks, or pstats.Stats) and what each stage did over the same window.
+    Raises ValueError if cProfile cannot be switched on because another profiler is active.
+    """
+    stages_before = stage_totals()
+    frames_before = pipeline.stats()
+    started = time.perf_counter()
+    details = {}
+    if mode == 'sampling':
+        result, details['samples'] = tracker_profiler.sample_stacks(seconds, PROFILE_THREAD_PREFIX)
+    else:
+        profiles = tracker_profiler.ThreadProfiles()
+        pipeline.set_profiler(profiles)
+        try:
+            time.sleep(seconds)
+        finally:
+            incomplete = profiles.finish()
+            if not incomplete:
+                pipeline.set_profiler(None)  # Otherwise a stuck thread still has to poll to switch its profile off
+        result = profiles.stats()
+        # One interpreter-wide profile covers every thread on Python 3.12 and later
+        details['threads'] = 'all' if profiles.shared else sorted(set(profiles.profiles) - set(incomplete))
+        details['incomplete_threads'] = incomplete
+        if profiles.errors:
+            details['thread_errors'] = profiles.errors
+    elapsed = time.perf_counter() - started
+    stages_after = stage_totals()
+    frames_after = pipeline.stats()
+
+    stages = {}
+    for stage in PIPELINE_STAGES:
+        count = stages_after[stage][0] - stages_before[stage][0]
+        total = stages_after[stage][1] - stages_before[stage][1]
+        stages[stage] = {
+            'count': count,
+            'total_ms': round(total * 1000, 1),
+            'mean_ms': round(total / count * 1000, 3) if count else None,
+            'busy': round(total / elapsed, 3),  # Share of the window the stage spent working
+        }
+    frames = {key: frames_after[key] - frames_before[key] for key in ('frames_captured', 'frames_inferred', 'frames_acted')}
+    window = {
+        'mode': mode,
+        'seconds': round(elapsed, 3),
+        'fps': round(frames['frames_acted'] / elapsed, 2),
+        'frames': frames,
+        'stages': stages,
+        **details,
+    }
+    return result, window
+
+@app.route('/profile', methods=['POST'])
+def profile_tracker():
+    """
+    Profile the live tracker threads for ?seconds= (default PROFILE_DEFAULT_SECONDS) and return
+    the result with a per-stage timing breakdown of the same window.
+    ?mode=sampling reads thread stacks from outside and gives collapsed stacks for a flamegraph;
+    ?mode=cprofile has every stage thread run cProfile and gives a pstats report.
+    ?format=collapsed returns the bare collapsed stacks, ?format=pstats the binary pstats dump.
+    Nothing is installed in the tracker outside a request.
+    """
+    mode = request.args.get('mode', 'sampling')
+    output = request.args.get('format', 'json')
+    seconds = request.args.get('seconds', default=PROFILE_DEFAULT_SECONDS, type=float)
+    if mode not in tracker_profiler.PROFILE_MODES:
+        return jsonify({'message': f"mode must be one of {', '.join(tracker_profiler.PROFILE_MODES)}"}), 400
+    if output not in PROFILE_FORMATS:
+        return jsonify({'message': f"format must be one of {', '.join(PROFILE_FORMATS)}"}), 400
+    if output == 'collapsed' and mode != 'sampling' or output == 'pstats' and mode != 'cprofile':
+        return jsonify({'message': f"format {output} needs mode {'sampling' if output == 'collapsed' else 'cprofile'}"}), 400
+    if seconds is None or not 0 < seconds <= PROFILE_MAX_SECONDS:
+        return jsonify({'message': f"seconds must be more than 0 and at most {PROFILE_MAX_SECONDS:g}"}), 400
+    if not profile_lock.acquire(blocking=False):
+        return jsonify({'message': 'A profile is already running'}), 409
+    try:
+        with lifecycle.changed:
+            running = lifecycle.state == 'running'
+        if not running:
+            return jsonify({'message': 'Tracking is not running'}), 409
+        try:
+            result, window = profile_window(mode, seconds)
+        except ValueError as e:  # Another profiler or debugger holds the hook
+            return jsonify({'message': f"cProfile is unavailable: {e}"}), 409
+    finally:
+        profile_lock.release()
+
+    if mode == 'sampling':
+        profile = tracker_profiler.collapsed_text(result)
+        if output == 'collapsed':
+            return Response(profile, mimetype='text/plain')
     else:
-        return jsonify({'message': 'Tracking is not running'}), 400
+        if result is None:
+            return jsonify({'message': 'No tracker thread ran during the window', **window}), 409
+        if output == 'pstats':
+            return Response(
+                tracker_profiler.pstats_dump(result),
+                mimetype='application/octet-stream',
+                headers={'Content-Disposition': 'attachment; filename=tracker.prof'},
+            )
+        profile = tracker_profiler.pstats_text(result)
+    return jsonify({**window, 'profile': profile}), 200
 
 @app.route('/status', methods=['GET'])
 def get_status():
-    global tracking_enabled
-    return jsonify({'tracking_enabled': tracking_enabled}), 200
+    with lifecycle.changed:
+        state = lifecycle.snapshot()
+    return jsonify({
+        'tracking_enabled': state['state'] in ('starting', 'running'),
+        **state,
+        'pipeline': pipeline.stats(),
+        'telemetry': telemetry_hub.stats(),
+        'recorder': recorder.stats() if recorder else None,
+        'startup': startup,
+    }), 200
+
+def warm_up():
+    """
+    Import mediapipe and build the tracker's face_mesh in the background, so the API answers
+    straight away and the first /start finds the models loaded.
+    """
+    start = time.perf_counter()
+    pipeline.prepare()
+    finished = time.perf_counter()
+    startup['warmup_ms'] = round((finished - start) * 1000, 1)
+    startup['models_ready_ms'] = round((finished - import_started) * 1000, 1)
+    print(f"Tracker models ready {startup['models_ready_ms']:.0f} ms after startup")
+
+startup = {
+    'import_ms': round((time.perf_counter() - import_started) * 1000, 1),  # Loading this module, without mediapipe
+    'serving_ms': None,  # Until the server was started
+    'warmup_ms': None,  # The background mediapipe import and face_mesh build
+    'models_ready_ms': None,  # Until face_mesh was ready for the first /start
+}
 
 if __name__ == '__main__':
-    app.run(debug=True, threaded=True)
\ No newline at end of file
+    try:
+        from waitress import serve
+    except ImportError:
+        serve = None
+    create_service()
+    if WARMUP_ON_START:
+        threading.Thread(target=warm_up, name="iris-warmup", daemon=True).start()
+    startup['serving_ms'] = round((time.perf_counter() - import_started) * 1000, 1)
+    print(f"Control API loaded in {startup['import_ms']:.0f} ms, serving after {startup['serving_ms']:.0f} ms")
+    if serve:
+        serve(app, host=SERVER_HOST, port=SERVER_PORT, threads=SERVER_THREADS)
+    else:
+        print("waitress is not installed, falling back to Flask's development server")
+        app.run(host=SERVER_HOST, port=SERVER_PORT, threaded=True)
\ No newline at end of file
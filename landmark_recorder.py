@@ -0,0 +1,384 @@
+"""
+Always-on flight recorder of what the tracker saw and did.
+
+Every frame's timestamp and face mesh (as float16) and every gesture and desktop action are
+appended to rotating segment files with a fixed binary layout, so "it clicked by itself" can be
+replayed afterwards. The tracker only copies into an in-memory ring; a background thread moves
+the records into the memory-mapped segment. Readers map the same files and get NumPy views over
+a time range without loading whole segments.
+
+Segment layout: a 64-byte header, then frame_capacity frame timestamps (float64), then
+frame_capacity frame records, then event_capacity event records. The header's frame and event
+counts are only raised after the records they cover are written.
+
+Usage:
+    python landmark_recorder.py info [--dir recordings]
+    python landmark_recorder.py events [--dir recordings] [--start T] [--end T] [--last SECONDS]
+    python landmark_recorder.py export OUT.npz [--dir recordings] [--start T] [--end T] [--last SECONDS]
+
+Times are Unix timestamps. An exported .npz can be fed to gesture_analysis.py.
+"""
+import argparse
+import collections
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+NUM_LANDMARKS = 478
+SEGMENT_FRAMES = 9000  # Frames per segment file, five minutes at 30 fps (about 26 MB)
+SEGMENT_EVENTS = 3 * SEGMENT_FRAMES  # A frame can scroll, blink or click and have its actions performed
+MAX_SEGMENTS = 12  # Oldest segment files are deleted beyond this many
+RING_FRAMES = 256  # Frames the tracker can get ahead of the writer before frames are dropped
+RING_EVENTS = 1024
+FLUSH_INTERVAL = 0.5  # Seconds between writer passes
+SEGMENT_MAGIC = b'IRISREC1'
+SEGMENT_VERSION = 1
+SEGMENT_PATTERN = 'segment-{:06d}.bin'
+
+EVENT_KINDS = ('gesture_scroll', 'gesture_blink', 'gesture_click', 'action_scroll', 'action_move', 'action_click')
+EVENT_CODES = {kind: code for code, kind in enumerate(EVENT_KINDS)}
+
+HEADER = np.dtype([
+    ('magic', 'S8'),
+    ('version', '<u4'),
+    ('num_landmarks', '<u4'),
+    ('frame_capacity', '<u4'),
+    ('event_capacity', '<u4'),
+    ('frames', '<u4'),
+    ('events', '<u4'),
+    ('created', '<f8'),
+    ('reserved', 'V24'),
+])
+EVENT_RECORD = np.dtype([('time', '<f8'), ('kind', 'u1'), ('x', '<i4'), ('y', '<i4')])
+
+
+def frame_record(num_landmarks=NUM_LANDMARKS):
+    return np.dtype([('width', '<u2'), ('height', '<u2'), ('face', 'u1'), ('points', '<f2', (num_landmarks, 3))])
+
+
+def segment_layout(frame_capacity, event_capacity, num_landmarks=NUM_LANDMARKS):
+    return np.dtype([
+        ('header', HEADER),
+        ('frame_times', '<f8', (frame_capacity,)),
+        ('frames', frame_record(num_landmarks), (frame_capacity,)),
+        ('events', EVENT_RECORD, (event_capacity,)),
+    ])
+
+
+def open_segment(path, mode='r'):
+    """
+    Memory-map an existing segment file, taking its layout from the header.
+    """
+    header = np.fromfile(path, dtype=HEADER, count=1)
+    if len(header) != 1 or header['magic'][0] != SEGMENT_MAGIC or header['version'][0] != SEGMENT_VERSION:
+        raise ValueError(f"{path} is not a recorder segment")
+    layout = segment_layout(int(header['frame_capacity'][0]), int(header['event_capacity'][0]), int(header['num_landmarks'][0]))
+    return np.memmap(path, dtype=layout, mode=mode, shape=())
+
+
+def segment_paths(directory):
+    """
+    Segment files in recording order.
+    """
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    return [os.path.join(directory, name) for name in sorted(names) if name.startswith('segment-') and name.endswith('.bin')]
+
+
+class LandmarkRecorder:
+    """
+    Writes frames and events to rotating segments in `directory` from a background thread.
+    record_frame() and record_event() never block on disk: when the writer falls behind, the
+    newest records are dropped and counted instead.
+    """
+    def __init__(self, directory, segment_frames=SEGMENT_FRAMES, segment_events=SEGMENT_EVENTS, max_segments=MAX_SEGMENTS):
+        self.directory = directory
+        self.segment_frames = segment_frames
+        self.segment_events = segment_events
+        self.max_segments = max_segments
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.thread = None
+        self.running = False
+
+        # float32 in the ring: narrowing to float16 costs more than the copy, so the writer does it
+        self.ring_times = np.zeros(RING_FRAMES)
+        self.ring_shapes = np.zeros((RING_FRAMES, 2), dtype=np.uint16)  # height, width
+        self.ring_faces = np.zeros(RING_FRAMES, dtype=bool)
+        self.ring_points = np.zeros((RING_FRAMES, NUM_LANDMARKS, 3), dtype=np.float32)
+        self.head = 0  # Next ring slot the tracker writes
+        self.pending = 0  # Slots written but not yet moved to disk
+        self.events = collections.deque()
+
+        self.segment = None
+        self.segment_index = 0
+        self.frames_written = 0
+        self.events_written = 0
+        self.frames_dropped = 0
+        self.events_dropped = 0
+        self.error = None
+
+    def record_frame(self, now, points, frame_shape):
+        """
+        Queue one frame; points is the (478, 3) face mesh, or None when no face was found.
+        """
+        with self.lock:
+            if self.pending == RING_FRAMES:
+                self.frames_dropped += 1
+                return
+            slot = self.head
+            self.ring_times[slot] = now
+            self.ring_shapes[slot] = frame_shape[:2]
+            self.ring_faces[slot] = points is not None
+            if points is not None:
+                self.ring_points[slot] = points
+            self.head = (slot + 1) % RING_FRAMES
+            self.pending += 1
+        if self.thread is None:
+            self.start()
+
+    def record_event(self, now, kind, x=0, y=0):
+        if len(self.events) >= RING_EVENTS:
+            self.events_dropped += 1
+            return
+        self.events.append((now, EVENT_CODES[kind], x, y))
+
+    def start(self):
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.running = True
+            self.thread = threading.Thread(target=self.write_loop, name="landmark-recorder", daemon=True)
+            self.thread.start()
+
+    def write_loop(self):
+        while self.running:
+            self.wake.wait(FLUSH_INTERVAL)
+            self.wake.clear()
+            try:
+                self.write_pending()
+            except OSError as e:
+                self.error = str(e)  # A full disk stops the recording, never the tracker
+                self.running = False
+        self.close_segment()
+
+    def write_pending(self):
+        with self.lock:
+            count = self.pending
+            tail = (self.head - count) % RING_FRAMES
+        written = 0
+        while written < count:
+            # The tracker never touches pending slots, so they can be copied without the lock
+            if self.segment is None or self.segment['header']['frames'] == self.segment_frames:
+                self.rotate()
+            header = self.segment['header']
+            start = int(header['frames'])
+            chunk = min(count - written, self.segment_frames - start, RING_FRAMES - tail)
+            ring = slice(tail, tail + chunk)
+            frames = self.segment['frames'][start:start + chunk]
+            self.segment['frame_times'][start:start + chunk] = self.ring_times[ring]
+            frames['height'] = self.ring_shapes[ring, 0]
+            frames['width'] = self.ring_shapes[ring, 1]
+            frames['face'] = self.ring_faces[ring]
+            frames['points'] = self.ring_points[ring]
+            header['frames'] = start + chunk
+            with self.lock:
+                self.pending -= chunk
+            tail = (tail + chunk) % RING_FRAMES
+            written += chunk
+            self.frames_written += chunk
+
+        events = []
+        while self.events:
+            events.append(self.events.popleft())
+        while events:
+            if self.segment is None or self.segment['header']['events'] == self.segment_events:
+                self.rotate()
+            header = self.segment['header']
+            start = int(header['events'])
+            chunk = events[:self.segment_events - start]
+            del events[:len(chunk)]
+            self.segment['events'][start:start + len(chunk)] = chunk
+            header['events'] = start + len(chunk)
+            self.events_written += len(chunk)
+
+    def rotate(self):
+        """
+        Close the current segment, start the next one and delete the oldest beyond max_segments.
+        """
+        self.close_segment()
+        os.makedirs(self.directory, exist_ok=True)
+        existing = segment_paths(self.directory)
+        if existing and not self.segment_index:
+            self.segment_index = int(os.path.basename(existing[-1])[8:14]) + 1  # Carry on after an earlier run
+        path = os.path.join(self.directory, SEGMENT_PATTERN.format(self.segment_index))
+        self.segment_index += 1
+        segment = np.memmap(path, dtype=segment_layout(self.segment_frames, self.segment_events), mode='w+', shape=())
+        header = segment['header']
+        header['magic'] = SEGMENT_MAGIC
+        header['version'] = SEGMENT_VERSION
+        header['num_landmarks'] = NUM_LANDMARKS
+        header['frame_capacity'] = self.segment_frames
+        header['event_capacity'] = self.segment_events
+        header['created'] = time.time()
+        self.segment = segment
+        for old in (existing + [path])[:-self.max_segments]:
+            os.remove(old)
+
+    def close_segment(self):
+        if self.segment is not None:
+            self.segment.flush()
+            self.segment = None
+
+    def flush(self):
+        """
+        Write everything queued so far; for tests and shutdown.
+        """
+        if self.thread is not None and self.thread.is_alive():
+            self.wake.set()
+            while (self.pending or self.events) and self.thread.is_alive():
+                time.sleep(0.01)
+                self.wake.set()
+
+    def close(self):
+        if self.thread is None:
+            return
+        self.flush()
+        self.running = False
+        self.wake.set()
+        self.thread.join()
+        self.thread = None
+
+    def stats(self):
+        return {
+            'directory': self.directory,
+            'frames_written': self.frames_written,
+            'events_written': self.events_written,
+            'frames_dropped': self.frames_dropped,
+            'events_dropped': self.events_dropped,
+            'error': self.error,
+        }
+
+
+class RecordingReader:
+    """
+    Read access to a recording directory, including one that is still being written.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        self.segments = {}  # path -> memmap, reopened only when new segments appear
+
+    def open_segments(self):
+        paths = segment_paths(self.directory)
+        self.segments = {path: self.segments.get(path) or open_segment(path) for path in paths}
+        return list(self.segments.values())
+
+    def frames(self, start=None, end=None):
+        """
+        (timestamps, records) views of the frames with start <= time < end, one pair per segment
+        that has any. Only the timestamp column is read to find the range.
+        """
+        blocks = []
+        for segment in self.open_segments():
+            count = int(segment['header']['frames'])
+            times = segment['frame_times'][:count]
+            first = 0 if start is None else int(np.searchsorted(times, start))
+            last = count if end is None else int(np.searchsorted(times, end))
+            if last > first:
+                blocks.append((times[first:last], segment['frames'][first:last]))
+        return blocks
+
+    def events(self, start=None, end=None):
+        """
+        The events with start <= time < end as one EVENT_RECORD array.
+        """
+        chunks = []
+        for segment in self.open_segments():
+            events = segment['events'][:int(segment['header']['events'])]
+            keep = np.ones(len(events), dtype=bool)
+            if start is not None:
+                keep &= events['time'] >= start
+            if end is not None:
+                keep &= events['time'] < end
+            chunks.append(events[keep])
+        return np.concatenate(chunks) if chunks else np.zeros(0, dtype=EVENT_RECORD)
+
+    def time_range(self):
+        """
+        (first, last) frame timestamps, or None for an empty recording.
+        """
+        times = [segment['frame_times'][:int(segment['header']['frames'])] for segment in self.open_segments()]
+        times = [t for t in times if len(t)]
+        return (float(times[0][0]), float(times[-1][-1])) if times else None
+
+    def series(self, start=None, end=None):
+        """
+        (points, timestamps, frame_shape) over a time range in the form gesture_analysis reads:
+        float32 landmarks with NaN rows where no face was found, and the frame size of the
+        first frame with a face.
+        """
+        blocks = self.frames(start, end)
+        timestamps = np.concatenate([times for times, _ in blocks]) if blocks else np.zeros(0)
+        points = np.full((len(timestamps), NUM_LANDMARKS, 3), np.nan, dtype=np.float32)
+        frame_shape = None
+        offset = 0
+        for times, records in blocks:
+            face = records['face'].astype(bool)
+            points[offset:offset + len(times)][face] = records['points'][face]
+            if frame_shape is None and face.any():
+                first = records[np.argmax(face)]
+                frame_shape = (int(first['height']), int(first['width']))
+            offset += len(times)
+        return points, timestamps, frame_shape
+
+
+def time_window(reader, args):
+    if args.last is not None:
+        span = reader.time_range()
+        return (span[1] - args.last if span else None), None
+    return args.start, args.end
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    info = subparsers.add_parser('info', help='Time span, frame and event counts of a recording')
+    events = subparsers.add_parser('events', help='Print gestures and actions as JSON lines')
+    export = subparsers.add_parser('export', help='Save a time range as an .npz series for gesture_analysis.py')
+    export.add_argument('output')
+    for command in (info, events, export):
+        command.add_argument('--dir', default='recordings')
+    for command in (events, export):
+        command.add_argument('--start', type=float)
+        command.add_argument('--end', type=float)
+        command.add_argument('--last', type=float, help='Only the final SECONDS of the recording')
+    args = parser.parse_args()
+    reader = RecordingReader(args.dir)
+
+    if args.command == 'info':
+        span = reader.time_range()
+        frames = sum(len(times) for times, _ in reader.frames())
+        print(json.dumps({
+            'segments': len(reader.segments),
+            'frames': frames,
+            'events': len(reader.events()),
+            'start': span[0] if span else None,
+            'end': span[1] if span else None,
+        }, indent=2))
+    elif args.command == 'events':
+        for event in reader.events(*time_window(reader, args)).tolist():
+            print(json.dumps({'time': event[0], 'kind': EVENT_KINDS[event[1]], 'x': event[2], 'y': event[3]}))
+    else:
+        points, timestamps, frame_shape = reader.series(*time_window(reader, args))
+        extra = {'frame_shape': np.array(frame_shape)} if frame_shape else {}
+        np.savez(args.output, points=points, timestamps=timestamps, **extra)
+        print(f"Saved {len(timestamps)} frames to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""
+Out-of-process face_mesh inference over shared memory.
+
+Frames are written into a ring of multiprocessing.shared_memory slots and landmarks come back
+through a shared float32 array, so only slot numbers cross the process boundary and frames are
+never pickled. The worker has its own interpreter, so face_mesh no longer competes for the GIL
+with gesture math and Flask request threads.
+"""
+import multiprocessing
+import queue
+from multiprocessing import shared_memory
+
+import numpy as np
+
+RING_SLOTS = 3  # Frames that can be in flight at once
+WORKER_STOP_TIMEOUT = 5.0  # Seconds to wait for the worker to exit before terminating it
+
+
+def inference_worker(frames_name, points_name, slot_bytes, slots, num_landmarks, face_mesh_options, requests, replies):
+    """
+    Worker process entry point: runs face_mesh on each requested slot until it receives None.
+    A ('face_mesh', options) request swaps in a face_mesh built with new confidences.
+    """
+    import iris_api  # Loaded here so the parent never imports the ML stack twice
+
+    frames_memory = shared_memory.SharedMemory(name=frames_name)
+    points_memory = shared_memory.SharedMemory(name=points_name)
+    points = np.ndarray((slots, num_landmarks, 3), dtype=np.float32, buffer=points_memory.buf)
+    landmarks = np.zeros((num_landmarks, 3))
+    face_mesh = iris_api.create_face_mesh(*face_mesh_options)
+    try:
+        while True:
+            request = requests.get()
+            if request is None:
+                break
+            if request[0] == 'face_mesh':
+                face_mesh.close()
+                face_mesh = iris_api.create_face_mesh(*request[1])
+                continue
+            slot, height, width = request
+            rgb_frame = np.ndarray((height, width, 3), dtype=np.uint8, buffer=frames_memory.buf, offset=slot * slot_bytes)
+            result = face_mesh.process(rgb_frame)
+            found = bool(result.multi_face_landmarks)
+            if found:
+                points[slot] = iris_api.landmarks_to_array(result.multi_face_landmarks[0], landmarks)
+            del rgb_frame
+            replies.put((slot, found))
+    finally:
+        face_mesh.close()
+        del points
+        frames_memory.close()
+        points_memory.close()
+
+
+class InferenceProcess:
+    """
+    Parent-side handle on one inference worker and its shared frame and landmark rings.
+    A slot belongs to the parent until it is submitted and comes back to it with the reply.
+    """
+    def __init__(self, slot_bytes, num_landmarks, face_mesh_options=(), slots=RING_SLOTS):
+        context = multiprocessing.get_context('spawn')
+        self.slot_bytes = slot_bytes
+        self.slots = slots
+        self.face_mesh_options = tuple(face_mesh_options)  # create_face_mesh() arguments; empty for its defaults
+        self.frames_memory = self.points_memory = self.points = None
+        self.free_slots = list(range(slots))
+        try:
+            self.frames_memory = shared_memory.SharedMemory(create=True, size=slot_bytes * slots)
+            self.points_memory = shared_memory.SharedMemory(create=True, size=slots * num_landmarks * 3 * 4)
+            self.points = np.ndarray((slots, num_landmarks, 3), dtype=np.float32, buffer=self.points_memory.buf)
+            self.requests = context.Queue()
+            self.replies = context.Queue()
+            self.process = context.Process(
+                target=inference_worker,
+                args=(self.frames_memory.name, self.points_memory.name, slot_bytes, slots, num_landmarks, self.face_mesh_options, self.requests, self.replies),
+                name="iris-inference-worker",
+                daemon=True,
+            )
+            self.process.start()
+        except BaseException:
+            self.release_memory()  # Nothing else would ever unlink the segments
+            raise
+
+    def fits(self, height, width):
+        return height * width * 3 <= self.slot_bytes
+
+    def frame_buffer(self, slot, height, width):
+        """
+        A writable (height, width, 3) view of a slot, for converting a frame straight into shared memory.
+        """
+        return np.ndarray((height, width, 3), dtype=np.uint8, buffer=self.frames_memory.buf, offset=slot * self.slot_bytes)
+
+    def take_slot(self):
+        """
+        A free slot number, or None when every slot is in flight.
+        """
+        return self.free_slots.pop() if self.free_slots else None
+
+    def submit(self, slot, height, width):
+        self.requests.put((slot, height, width))
+
+    def configure(self, face_mesh_options):
+        """
+        Rebuild the worker's face_mesh with new create_face_mesh() arguments, after the frames already submitted.
+        """
+        self.face_mesh_options = tuple(face_mesh_options)
+        self.requests.put(('face_mesh', self.face_mesh_options))
+
+    def reply(self, timeout):
+        """
+        Returns (slot, face_found) for the oldest submitted frame, or None on timeout.
+        The slot stays reserved until release() so its landmarks can be read.
+        """
+        try:
+            return self.replies.get(timeout=timeout)
+        except queue.Empty:
+            if not self.process.is_alive():
+                raise RuntimeError("Inference worker exited unexpectedly")
+            return None
+
+    def release(self, slot):
+        self.free_slots.append(slot)
+
+    def close(self):
+        if self.process.is_alive():
+            self.requests.put(None)
+            self.process.join(WORKER_STOP_TIMEOUT)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.release_memory()
+
+    def release_memory(self):
+        self.points = None  # The array is a view of points_memory, which cannot close while it exists
+        for memory in (self.frames_memory, self.points_memory):
+            if memory is not None:
+                memory.close()
+                memory.unlink()
+        self.frames_memory = self.points_memory = None
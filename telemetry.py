@@ -0,0 +1,140 @@
+"""
+Live tracker telemetry pushed to streaming clients as Server-Sent Events.
+
+The tracker publishes small dicts; each one is encoded once and appended to every subscriber's
+own bounded buffer. Publishing never blocks the tracker: a subscriber whose buffer is full has
+fallen behind, so it is dropped and its stream ends, and the client reconnects when it can keep up.
+"""
+import collections
+import json
+import threading
+
+SUBSCRIBER_BUFFER = 64  # Events a subscriber may have waiting before it counts as too slow
+MAX_SUBSCRIBERS = 4  # Each open stream holds a server thread
+HEARTBEAT_INTERVAL = 5.0  # Seconds of silence before a keep-alive comment, so dead connections get noticed
+
+
+def encode_event(kind, data):
+    """
+    One SSE message: an event name and its data as a single line of JSON.
+    """
+    return f"event: {kind}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+
+class Subscription:
+    """
+    One client's bounded queue of encoded events.
+    """
+    def __init__(self, hub, buffer_size):
+        self.hub = hub
+        self.buffer_size = buffer_size
+        self.events = collections.deque()
+        self.condition = threading.Condition()
+        self.closed = False
+        self.dropped = False  # Closed because it fell behind, not because the client left
+
+    def push(self, event):
+        """
+        Queue an encoded event; returns False once the subscription is closed or just overflowed.
+        """
+        with self.condition:
+            if self.closed:
+                return False
+            if len(self.events) >= self.buffer_size:
+                self.closed = self.dropped = True
+                self.events.clear()
+                self.condition.notify()
+                return False
+            self.events.append(event)
+            self.condition.notify()
+            return True
+
+    def drain(self, timeout):
+        """
+        Every queued event, an empty list if none arrived within timeout, or None once closed.
+        """
+        with self.condition:
+            if not self.events and not self.closed:
+                self.condition.wait(timeout)
+            if self.closed:
+                return None
+            events = list(self.events)
+            self.events.clear()
+            return events
+
+    def stream(self, heartbeat=HEARTBEAT_INTERVAL):
+        """
+        The body of an SSE response. Unsubscribes when the client goes away or falls behind.
+        """
+        try:
+            yield b"retry: 1000\n\n"
+            while True:
+                events = self.drain(heartbeat)
+                if events is None:
+                    if self.dropped:
+                        yield encode_event('dropped', {'reason': 'client too slow'})
+                    return
+                yield b"".join(events) if events else b": keep-alive\n\n"
+        finally:
+            self.close()
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.hub.unsubscribe(self)
+
+
+class TelemetryHub:
+    """
+    Fans published events out to every current subscriber.
+    """
+    def __init__(self, buffer_size=SUBSCRIBER_BUFFER, max_subscribers=MAX_SUBSCRIBERS):
+        self.buffer_size = buffer_size
+        self.max_subscribers = max_subscribers
+        self.lock = threading.Lock()
+        self.subscribers = ()  # Replaced, never mutated, so publish() can iterate without the lock
+        self.published = 0
+        self.dropped = 0  # Subscribers cut off for falling behind
+
+    @property
+    def active(self):
+        """
+        Whether anyone is listening; publishers skip building events otherwise.
+        """
+        return bool(self.subscribers)
+
+    def subscribe(self):
+        """
+        A new Subscription, or None when MAX_SUBSCRIBERS streams are already open.
+        """
+        with self.lock:
+            if len(self.subscribers) >= self.max_subscribers:
+                return None
+            subscription = Subscription(self, self.buffer_size)
+            self.subscribers = self.subscribers + (subscription,)
+            return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            if subscription in self.subscribers:
+                self.subscribers = tuple(s for s in self.subscribers if s is not subscription)
+                if subscription.dropped:
+                    self.dropped += 1
+
+    def publish(self, kind, data):
+        subscribers = self.subscribers
+        if not subscribers:
+            return
+        event = encode_event(kind, data)
+        self.published += 1
+        for subscription in subscribers:
+            if not subscription.push(event):
+                self.unsubscribe(subscription)
+
+    def stats(self):
+        return {
+            'subscribers': len(self.subscribers),
+            'published': self.published,
+            'dropped_subscribers': self.dropped,
+        }
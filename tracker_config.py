@@ -0,0 +1,187 @@
+"""
+Tracker tuning values that can change while the tracker runs.
+
+A TrackerConfig is immutable: a change builds a new one and ConfigStore swaps it in with a single
+assignment, so the tracker reads `store.current` once per frame and always sees one consistent set
+of values without taking a lock. Named profiles (one per dashboard user) are saved as overrides of
+the defaults in a JSON file, so a default changed in code still reaches every value a profile leaves alone.
+"""
+import json
+import os
+import threading
+
+# name: (type, lowest, highest, changing it needs a new FaceMesh)
+FIELDS = {
+    'sensitivity_horizontal': (float, 0.0, 0.5, False),
+    'sensitivity_vertical': (float, 0.0, 0.5, False),
+    'blink_threshold': (float, 0.0, 1.0, False),
+    'close_eye_duration_click': (float, 0.0, 60.0, False),
+    'close_eye_duration_disable': (float, 0.0, 60.0, False),
+    'close_eye_duration_back': (float, 0.0, 60.0, False),
+    'stable_duration_click': (float, 0.0, 600.0, False),
+    'scroll_amount': (int, 0, 1000, False),
+    'blink_move': (int, 0, 1000, False),
+    'min_detection_confidence': (float, 0.0, 1.0, True),
+    'min_tracking_confidence': (float, 0.0, 1.0, True),
+}
+REBUILD_FIELDS = tuple(name for name, (_, _, _, rebuild) in FIELDS.items() if rebuild)
+
+
+def check_value(name, value):
+    """
+    The value converted to the setting's type; raises ValueError if it is unknown, mistyped or out of range.
+    """
+    if name not in FIELDS:
+        raise ValueError(f"unknown setting {name}")
+    kind, lowest, highest, _ = FIELDS[name]
+    # bool is an int subclass, but True is never a meaningful threshold
+    if isinstance(value, bool) or not isinstance(value, (int, float) if kind is float else int):
+        raise ValueError(f"{name} must be {'a number' if kind is float else 'an integer'}")
+    if not lowest <= value <= highest:
+        raise ValueError(f"{name} must be between {lowest:g} and {highest:g}")
+    return kind(value)
+
+
+class TrackerConfig:
+    """
+    One complete, validated set of tuning values.
+    """
+    __slots__ = tuple(FIELDS) + ('face_mesh_options', 'closed_eyes_limit')
+
+    def __init__(self, **values):
+        missing = set(FIELDS) - set(values)
+        if missing:
+            raise ValueError(f"missing settings: {', '.join(sorted(missing))}")
+        for name, value in values.items():
+            object.__setattr__(self, name, check_value(name, value))
+        # Derived once here instead of on every frame
+        object.__setattr__(self, 'face_mesh_options', tuple(getattr(self, name) for name in REBUILD_FIELDS))
+        object.__setattr__(self, 'closed_eyes_limit', max(
+            self.close_eye_duration_click, self.close_eye_duration_disable, self.close_eye_duration_back,
+        ))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("TrackerConfig is immutable, use replace()")
+
+    def replace(self, **changes):
+        return TrackerConfig(**{**self.as_dict(), **changes})
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in FIELDS}
+
+
+def check_overrides(overrides):
+    """
+    Validated copy of a {setting: value} dict; raises ValueError for anything that is not one.
+    """
+    if not isinstance(overrides, dict):
+        raise ValueError("settings must be a JSON object")
+    return {name: check_value(name, value) for name, value in overrides.items()}
+
+
+class ConfigStore:
+    """
+    The live TrackerConfig and the saved profiles. Updates are serialized by a lock; reads are not.
+    """
+    def __init__(self, defaults, profiles_path=None):
+        self.defaults = defaults
+        self.current = defaults
+        self.version = 0  # Goes up with every swap
+        self.profile = None  # Profile the live values were loaded from, if any
+        self.lock = threading.Lock()
+        self.profiles_path = profiles_path
+        self.profiles = self.load_profiles()
+
+    def load_profiles(self):
+        if not self.profiles_path or not os.path.exists(self.profiles_path):
+            return {}
+        try:
+            with open(self.profiles_path, "r") as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, OSError):
+            return {}  # A broken file just means starting with no profiles
+        profiles = {}
+        for name, overrides in data.items() if isinstance(data, dict) else ():
+            try:
+                profiles[name] = check_overrides(overrides)
+            except ValueError:
+                continue  # Written by a version with other settings; skip rather than fail to start
+        return profiles
+
+    def save_profiles(self):
+        if not self.profiles_path:
+            return
+        temporary = self.profiles_path + ".tmp"
+        with open(temporary, "w") as f:
+            json.dump(self.profiles, f, indent=2, sort_keys=True)
+        os.replace(temporary, self.profiles_path)  # Readers never see a half-written file
+
+    def swap(self, config, profile):
+        """
+        Make config the live one. Call with the lock held.
+        """
+        self.current = config
+        self.profile = profile
+        self.version += 1
+
+    def update(self, changes):
+        """
+        Apply changes on top of the live values and return the new config. Raises ValueError.
+        """
+        changes = check_overrides(changes)
+        with self.lock:
+            config = self.current.replace(**changes)
+            self.swap(config, self.profile)
+            return config
+
+    def apply_profile(self, name):
+        """
+        Load a saved profile over the defaults; returns the new config, or None for an unknown name.
+        """
+        with self.lock:
+            overrides = self.profiles.get(name)
+            if overrides is None:
+                return None
+            config = self.defaults.replace(**overrides)
+            self.swap(config, name)
+            return config
+
+    def reset(self):
+        with self.lock:
+            self.swap(self.defaults, None)
+            return self.defaults
+
+    def save_profile(self, name, overrides):
+        """
+        Store a profile, replacing any with the same name. The live values follow if it is the loaded profile.
+        """
+        overrides = check_overrides(overrides)
+        config = self.defaults.replace(**overrides)  # Same checks a later apply would make
+        with self.lock:
+            self.profiles[name] = overrides
+            self.save_profiles()
+            if self.profile == name:
+                self.swap(config, name)
+        return overrides
+
+    def delete_profile(self, name):
+        """
+        Remove a profile; returns False if there was none. The live values are left as they are.
+        """
+        with self.lock:
+            if self.profiles.pop(name, None) is None:
+                return False
+            self.save_profiles()
+            if self.profile == name:
+                self.profile = None
+            return True
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'version': self.version,
+                'profile': self.profile,
+                'config': self.current.as_dict(),
+                'defaults': self.defaults.as_dict(),
+                'rebuild_fields': list(REBUILD_FIELDS),
+            }
@@ -0,0 +1,194 @@
+"""
+Runs trackers in their own worker processes, each with its own FaceMesh and frame source,
+so several cameras (or synthetic sources in tests) can use several cores without sharing the GIL.
+"""
+import multiprocessing
+import queue
+import threading
+import time
+
+HEARTBEAT_INTERVAL = 1.0  # Seconds between status reports from a worker
+WORKER_STALE_AFTER = 5.0  # Seconds without a report before a worker counts as unhealthy
+WORKER_STOP_TIMEOUT = 5.0  # Seconds to wait for a worker to exit before terminating it
+ACTION_MODES = ('desktop', 'none')  # Send gestures to pyautogui, or drop them
+
+
+def tracker_worker(tracker_id, source, actions, capture_settings, commands, reports):
+    """
+    Worker process entry point: owns one TrackingPipeline and obeys start/stop/shutdown commands.
+    """
+    import iris_api  # Loaded here so only the worker pays for the ML stack
+
+    sink = iris_api.PyAutoGuiSink() if actions == 'desktop' else iris_api.NullSink()
+    pipeline = iris_api.TrackingPipeline(source, sink=sink, capture_settings=capture_settings)  # Builds its face_mesh on the first start
+    runner = None
+
+    while True:
+        try:
+            command = commands.get(timeout=HEARTBEAT_INTERVAL)
+        except queue.Empty:
+            command = None
+
+        if command == 'start' and not (runner and runner.is_alive()):
+            pipeline.arm()  # A stop that arrives before run() gets going still reaches it
+            runner = threading.Thread(target=pipeline.run, name=f"tracker-{tracker_id}", daemon=True)
+            runner.start()
+        elif command in ('stop', 'shutdown') and runner:
+            pipeline.stop()
+            runner.join()
+            runner = None
+
+        reports.put((tracker_id, time.time(), {
+            'running': bool(runner and runner.is_alive()),
+            'error': pipeline.capture_error,  # The source failed; the pipeline stopped itself
+            'pipeline': pipeline.stats(),
+        }))
+        if command == 'shutdown':
+            return
+
+
+class TrackerManager:
+    """
+    Starts, stops and monitors tracker worker processes by id.
+    """
+    def __init__(self):
+        self.context = multiprocessing.get_context('spawn')  # No forking a process that holds camera and model threads
+        self.reports = self.context.Queue()
+        self.collector = None  # Drains self.reports while any worker has been started
+        self.workers = {}
+        self.lock = threading.Lock()
+
+    def start(self, tracker_id, source=0, actions='desktop', capture_settings=None):
+        """
+        Start a tracker, launching its worker process first if it does not exist yet.
+        source and capture_settings should already be checked with iris_api.capture_options().
+        """
+        if actions not in ACTION_MODES:
+            raise ValueError(f"actions must be one of {', '.join(ACTION_MODES)}")
+        with self.lock:
+            if self.collector is None:
+                self.collector = threading.Thread(target=self.collect_reports, name="tracker-reports", daemon=True)
+                self.collector.start()
+            worker = self.workers.get(tracker_id)
+            if worker is None or not worker['process'].is_alive():
+                commands = self.context.Queue()
+                process = self.context.Process(
+                    target=tracker_worker,
+                    args=(tracker_id, source, actions, capture_settings, commands, self.reports),
+                    name=f"tracker-{tracker_id}",
+                    daemon=True,
+                )
+                process.start()
+                worker = {
+                    'process': process,
+                    'commands': commands,
+                    'source': source,
+                    'actions': actions,
+                    'started_at': time.time(),
+                    'report': None,
+                    'reported_at': None,
+                }
+                self.workers[tracker_id] = worker
+            worker['commands'].put('start')
+
+    def stop(self, tracker_id):
+        """
+        Stop a tracker's pipeline but keep its worker warm; returns False for an unknown id.
+        """
+        with self.lock:
+            worker = self.workers.get(tracker_id)
+            if worker is None:
+                return False
+            worker['commands'].put('stop')
+            return True
+
+    def remove(self, tracker_id):
+        """
+        Shut a worker process down and forget it; returns False for an unknown id.
+        """
+        with self.lock:
+            worker = self.workers.pop(tracker_id, None)
+        if worker is None:
+            return False
+        self.shutdown_worker(worker)
+        return True
+
+    def shutdown(self):
+        with self.lock:
+            workers = list(self.workers.values())
+            self.workers.clear()
+            collector, self.collector = self.collector, None
+        for worker in workers:
+            self.shutdown_worker(worker)
+        if collector is not None:
+            self.reports.put(None)
+            collector.join(WORKER_STOP_TIMEOUT)
+
+    def shutdown_worker(self, worker):
+        process = worker['process']
+        if process.is_alive():
+            worker['commands'].put('shutdown')
+            process.join(WORKER_STOP_TIMEOUT)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+
+    def collect_reports(self):
+        """
+        Keep each worker's latest report as it arrives, so the queue never backs up between
+        status requests. Runs on its own thread until shutdown() sends None.
+        """
+        while True:
+            message = self.reports.get()
+            if message is None:
+                return
+            tracker_id, reported_at, report = message
+            with self.lock:
+                worker = self.workers.get(tracker_id)
+                if worker is not None:
+                    worker['report'] = report
+                    worker['reported_at'] = reported_at
+
+    def describe(self, tracker_id, worker, now):
+        alive = worker['process'].is_alive()
+        reported_at = worker['reported_at']
+        heartbeat_age = None if reported_at is None else now - reported_at
+        report = worker['report'] or {}
+        error = report.get('error')
+        return {
+            'id': tracker_id,
+            'source': worker['source'],
+            'actions': worker['actions'],
+            'pid': worker['process'].pid,
+            'alive': alive,
+            'healthy': alive and error is None and heartbeat_age is not None and heartbeat_age < WORKER_STALE_AFTER,
+            'error': error,
+            'heartbeat_age': None if heartbeat_age is None else round(heartbeat_age, 2),
+            'running': report.get('running', False),
+            'pipeline': report.get('pipeline'),
+        }
+
+    def status(self, tracker_id):
+        """
+        The latest report of one tracker, or None for an unknown id.
+        """
+        with self.lock:
+            worker = self.workers.get(tracker_id)
+            if worker is None:
+                return None
+            return self.describe(tracker_id, worker, time.time())
+
+    def list(self):
+        """
+        Every tracker's latest report plus aggregate health counts.
+        """
+        with self.lock:
+            now = time.time()
+            trackers = [self.describe(tracker_id, worker, now) for tracker_id, worker in self.workers.items()]
+        return {
+            'trackers': trackers,
+            'total': len(trackers),
+            'running': sum(tracker['running'] for tracker in trackers),
+            'healthy': sum(tracker['healthy'] for tracker in trackers),
+            'failed': sum(tracker['error'] is not None for tracker in trackers),
+        }
@@ -0,0 +1,154 @@
+"""
+Prometheus text-format metrics for the tracker.
+
+Counters and histograms keep one shard per recording thread, so the frame loop
+never takes a lock to record a value; shards are only summed when /metrics is scraped.
+"""
+import bisect
+import threading
+
+# Upper bounds in seconds for per-stage latency histograms
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        """
+        All registered metrics in the Prometheus text exposition format.
+        """
+        lines = []
+        described = set()
+        for metric in self.metrics:
+            if metric.name not in described:
+                lines.append(f"# HELP {metric.name} {metric.help}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+                described.add(metric.name)
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def format_labels(labels, extra=None):
+    items = list(labels.items()) + list((extra or {}).items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in items) + "}"
+
+
+class ShardedMetric:
+    """
+    Base for metrics written from several threads: each thread gets its own list to add into.
+    """
+    def __init__(self, name, help, labels=None, registry=REGISTRY):
+        self.name = name
+        self.help = help
+        self.labels = labels or {}
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()  # Only taken the first time a thread records
+        registry.register(self)
+
+    def new_shard(self):
+        raise NotImplementedError
+
+    def shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self.new_shard()
+            self._local.shard = shard
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def shards(self):
+        with self._shards_lock:
+            return list(self._shards)
+
+
+class Counter(ShardedMetric):
+    kind = 'counter'
+
+    def new_shard(self):
+        return [0]
+
+    def inc(self, amount=1):
+        self.shard()[0] += amount
+
+    def value(self):
+        return sum(shard[0] for shard in self.shards())
+
+    def samples(self):
+        return [f"{self.name}{format_labels(self.labels)} {self.value()}"]
+
+
+class Histogram(ShardedMetric):
+    kind = 'histogram'
+
+    def __init__(self, name, help, buckets=STAGE_BUCKETS, labels=None, registry=REGISTRY):
+        self.buckets = tuple(buckets)
+        super().__init__(name, help, labels, registry)
+
+    def new_shard(self):
+        # One count per bucket plus +Inf, then the running sum
+        return [0] * (len(self.buckets) + 1) + [0.0]
+
+    def observe(self, value):
+        shard = self.shard()
+        shard[bisect.bisect_left(self.buckets, value)] += 1
+        shard[-1] += value
+
+    def snapshot(self):
+        """
+        Returns (bucket counts including +Inf, sum) added up over all threads.
+        """
+        counts = [0] * (len(self.buckets) + 1)
+        total = 0.0
+        for shard in self.shards():
+            for index in range(len(counts)):
+                counts[index] += shard[index]
+            total += shard[-1]
+        return counts, total
+
+    def samples(self):
+        counts, total = self.snapshot()
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), counts):
+            cumulative += count
+            lines.append(f"{self.name}_bucket{format_labels(self.labels, {'le': bound})} {cumulative}")
+        lines.append(f"{self.name}_sum{format_labels(self.labels)} {total}")
+        lines.append(f"{self.name}_count{format_labels(self.labels)} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """
+    A value that is simply overwritten, or read from a callback at scrape time.
+    """
+    kind = 'gauge'
+
+    def __init__(self, name, help, function=None, labels=None, registry=REGISTRY):
+        self.name = name
+        self.help = help
+        self.labels = labels or {}
+        self.function = function
+        self.current = 0.0
+        registry.register(self)
+
+    def set(self, value):
+        self.current = value
+
+    def value(self):
+        return self.function() if self.function else self.current
+
+    def samples(self):
+        return [f"{self.name}{format_labels(self.labels)} {self.value()}"]
@@ -0,0 +1,155 @@
+"""
+On-demand profiling of the tracker's running threads.
+
+Two modes, neither of which costs anything while no profile is being taken:
+- sampling: a loop on the requesting thread reads every tracker thread's Python stack at a fixed
+  interval and counts them as collapsed stacks, the input format of flamegraph.pl and speedscope.
+  The tracker threads are never paused or instrumented.
+- cprofile: each tracker thread turns a cProfile.Profile on for itself on its next loop iteration
+  and off again when the window closes, since cProfile can only follow the thread that enables it.
+  The results are merged into one pstats table. From Python 3.12 cProfile is built on
+  sys.monitoring, which follows every thread and allows only one profiler at a time, so a single
+  profile is switched on and off from the requesting thread instead.
+"""
+import collections
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+
+PROFILE_MODES = ('sampling', 'cprofile')
+SAMPLE_INTERVAL = 0.005  # Seconds between stack samples
+PROFILE_TOP_FUNCTIONS = 40  # Rows of the pstats report
+THREAD_STOP_WAIT = 1.0  # Seconds to wait for every thread to switch its cProfile off
+SHARED_PROFILE = sys.version_info >= (3, 12)  # One interpreter-wide cProfile instead of one per thread
+
+
+def frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def sample_stacks(seconds, thread_prefix, interval=SAMPLE_INTERVAL):
+    """
+    Sample the stacks of every thread whose name starts with thread_prefix for `seconds`.
+    Returns ({collapsed stack: samples}, number of sampling passes).
+    """
+    counts = collections.Counter()
+    own = threading.get_ident()
+    passes = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        names = {thread.ident: thread.name for thread in threading.enumerate() if thread.name.startswith(thread_prefix)}
+        for ident, frame in sys._current_frames().items():
+            name = names.get(ident)
+            if name is None or ident == own:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(frame_label(frame))
+                frame = frame.f_back
+            stack.append(name)
+            counts[';'.join(reversed(stack))] += 1
+        passes += 1
+        time.sleep(interval)
+    return counts, passes
+
+
+def collapsed_text(counts):
+    """
+    One "root;...;leaf count" line per distinct stack, hottest first.
+    """
+    return "\n".join(f"{stack} {count}" for stack, count in counts.most_common()) + "\n"
+
+
+class ThreadProfiles:
+    """
+    A cProfile window shared by several threads. Each thread calls poll() once per loop
+    iteration while this object is installed; finish() closes the window.
+    Raises ValueError when another profiler already holds the interpreter-wide hook.
+    """
+    def __init__(self, shared=SHARED_PROFILE):
+        self.active = True
+        self.lock = threading.Lock()
+        self.profiles = {}  # thread name -> cProfile.Profile
+        self.running = set()  # Threads whose profile is still on
+        self.errors = {}  # thread name -> why its profile could not be switched on or off
+        self.shared = None
+        if shared:
+            self.shared = cProfile.Profile()
+            self.shared.enable()
+            self.profiles[threading.current_thread().name] = self.shared
+
+    def poll(self):
+        """
+        Switch this thread's profile on or off as needed. Never raises: a profiler failure must
+        not take down the stage loop calling it.
+        """
+        if self.shared is not None:
+            return
+        name = threading.current_thread().name
+        try:
+            if self.active:
+                if name not in self.profiles and name not in self.errors:
+                    profile = cProfile.Profile()
+                    profile.enable()
+                    with self.lock:
+                        self.profiles[name] = profile
+                        self.running.add(name)
+            elif name in self.running:
+                with self.lock:
+                    self.running.discard(name)
+                self.profiles[name].disable()
+        except Exception as e:
+            with self.lock:
+                self.errors[name] = repr(e)
+                self.running.discard(name)
+                self.profiles.pop(name, None)
+
+    def finish(self, timeout=THREAD_STOP_WAIT):
+        """
+        Close the window and wait for the threads to switch their profiles off. Returns the
+        names of threads that did not poll again in time (they stopped or are stuck).
+        """
+        self.active = False
+        if self.shared is not None:
+            self.shared.disable()
+            return []
+        deadline = time.perf_counter() + timeout
+        while self.running and time.perf_counter() < deadline:
+            time.sleep(0.01)
+        with self.lock:
+            return sorted(self.running)
+
+    def stats(self):
+        """
+        The merged pstats.Stats of every thread that switched its profile off, or None if none did.
+        """
+        stats = None
+        for name, profile in self.profiles.items():
+            if name in self.running:
+                continue  # Still being written to by its thread
+            profile.create_stats()
+            if stats is None:
+                stats = pstats.Stats(profile)
+            else:
+                stats.add(profile)
+        return stats
+
+
+def pstats_text(stats, limit=PROFILE_TOP_FUNCTIONS):
+    stream = io.StringIO()
+    stats.stream = stream
+    stats.sort_stats('cumulative').print_stats(limit)
+    return stream.getvalue()
+
+
+def pstats_dump(stats):
+    """
+    The bytes pstats.Stats.dump_stats() would write, loadable with pstats.Stats(path) or snakeviz.
+    """
+    return marshal.dumps(stats.stats)
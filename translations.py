@@ -0,0 +1,54 @@
+"""
+Process-wide translation catalog for the dashboard.
+
+Streamlit re-executes app.py on every interaction, so the language database is parsed once
+and only parsed again when the file's modification time changes.
+"""
+import json
+import os
+import threading
+
+
+class TranslationCatalog:
+    """
+    Every language's strings from one JSON file of {language: {key: text}}.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.languages = {}
+        self.mtime = None
+        self.error = None
+        self.lock = threading.Lock()  # Several sessions may rerun at once
+
+    def refresh(self):
+        """
+        Reload the file if it changed since the last load. A file that fails to parse keeps the
+        previous catalog and sets self.error; a missing file empties the catalog.
+        """
+        try:
+            stat = os.stat(self.path)
+            mtime = stat.st_mtime_ns, stat.st_size  # Size too, for filesystems with coarse timestamps
+        except OSError:
+            mtime = None
+        if mtime == self.mtime:
+            return
+        with self.lock:
+            if mtime == self.mtime:
+                return
+            if mtime is None:
+                self.languages, self.error = {}, None
+            else:
+                try:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                    self.languages = data if isinstance(data, dict) else {}
+                    self.error = None
+                except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                    self.error = str(e)
+            self.mtime = mtime
+
+    def strings(self, language):
+        """
+        The {key: text} table of one language, empty for an unknown language.
+        """
+        return self.languages.get(language, {})
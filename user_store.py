@@ -0,0 +1,195 @@
+"""
+SQLite-backed account store for the dashboard.
+
+Accounts live in one table with a unique index on email, so signup and login are single
+indexed lookups instead of scans of every record. Writes are transactions, so concurrent
+Streamlit sessions cannot lose each other's signups. The account remembered on this device
+is kept in its own table instead of being mixed in with the user records.
+
+Usage:
+    python user_store.py import [--json user_data.json] [--db users.db]
+"""
+import argparse
+import contextlib
+import json
+import os
+import queue
+import sqlite3
+import time
+
+USER_DB_FILE = "users.db"
+LEGACY_USER_DATA_FILE = "user_data.json"
+BUSY_TIMEOUT_MS = 5000  # How long a write waits for another session's transaction to finish
+POOL_SIZE = 4  # Idle connections kept for reuse; busier moments open more and close them afterwards
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL UNIQUE,
+    password TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS device_login (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE
+);
+"""
+
+
+class UserStore:
+    """
+    Accounts and the device's remembered login. Safe to share between threads: every operation
+    borrows a connection from a small pool, so Streamlit's many short-lived script threads reuse
+    the same few instead of each leaving one open.
+    """
+    def __init__(self, path=USER_DB_FILE, pool_size=POOL_SIZE):
+        self.path = path
+        self.idle = queue.LifoQueue(pool_size)
+        with self.connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")  # Readers never wait on a writer; stored in the file
+            conn.executescript(SCHEMA)
+
+    def open_connection(self):
+        # Handed between threads, but only ever used by one at a time
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    @contextlib.contextmanager
+    def connection(self):
+        """
+        A connection for one operation: committed if the block succeeds, rolled back if it raises,
+        then returned to the pool, or closed if the pool is full.
+        """
+        try:
+            conn = self.idle.get_nowait()
+        except queue.Empty:
+            conn = self.open_connection()
+        try:
+            with conn:
+                yield conn
+        finally:
+            try:
+                self.idle.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    def create_user(self, name, email, password_hash):
+        """
+        Add an account and return it, or None if the email is already registered.
+        """
+        try:
+            with self.connection() as conn:
+                cursor = conn.execute(
+                    "INSERT INTO users (name, email, password, created_at) VALUES (?, ?, ?, ?)",
+                    (name, email, password_hash, time.time()),
+                )
+        except sqlite3.IntegrityError:
+            return None
+        return {'id': cursor.lastrowid, 'name': name, 'email': email}
+
+    def find_by_email(self, email):
+        with self.connection() as conn:
+            row = conn.execute("SELECT id, name, email FROM users WHERE email = ?", (email,)).fetchone()
+        return dict(row) if row else None
+
+    def authenticate(self, email, password_hash):
+        """
+        The account matching both email and password hash, or None.
+        """
+        with self.connection() as conn:
+            row = conn.execute(
+                "SELECT id, name, email FROM users WHERE email = ? AND password = ?", (email, password_hash)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def count_users(self):
+        with self.connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def remember(self, user_id):
+        """
+        Log this device in as user_id on future visits.
+        """
+        with self.connection() as conn:
+            conn.execute("INSERT OR REPLACE INTO device_login (id, user_id) VALUES (1, ?)", (user_id,))
+
+    def forget(self):
+        with self.connection() as conn:
+            conn.execute("DELETE FROM device_login")
+
+    def remembered_user(self):
+        with self.connection() as conn:
+            row = conn.execute(
+                "SELECT users.id, users.name, users.email FROM device_login JOIN users ON users.id = device_login.user_id"
+            ).fetchone()
+        return dict(row) if row else None
+
+    def import_json(self, path=LEGACY_USER_DATA_FILE):
+        """
+        Copy accounts from the old user_data.json; emails already in the store are skipped.
+        Returns how many accounts were added.
+        """
+        with open(path, "r") as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            return 0
+        records = [
+            (name, info['email'], info['password'], time.time())
+            for name, info in data.items()
+            if isinstance(info, dict) and info.get('email') and info.get('password')
+        ]
+        with self.connection() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO users (name, email, password, created_at) VALUES (?, ?, ?, ?)", records
+            )
+            added = conn.total_changes - before
+            # The old file kept the device's login as top-level logged_in/name/email keys
+            if data.get('logged_in') and data.get('email'):
+                row = conn.execute("SELECT id FROM users WHERE email = ?", (data['email'],)).fetchone()
+                if row:
+                    conn.execute("INSERT OR REPLACE INTO device_login (id, user_id) VALUES (1, ?)", (row[0],))
+        return added
+
+    def close(self):
+        """
+        Close the pooled connections. The store stays usable and opens new ones as needed.
+        """
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def open_user_store(path=USER_DB_FILE, legacy_path=LEGACY_USER_DATA_FILE):
+    """
+    Open the store, importing the old JSON file the first time the database is created.
+    """
+    store = UserStore(path)
+    if store.count_users() == 0 and os.path.exists(legacy_path):
+        try:
+            store.import_json(legacy_path)
+        except (json.JSONDecodeError, OSError):
+            pass  # A broken legacy file just means starting with no accounts, as before
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    importer = subparsers.add_parser('import', help='Copy accounts from user_data.json into the database')
+    importer.add_argument('--json', default=LEGACY_USER_DATA_FILE)
+    importer.add_argument('--db', default=USER_DB_FILE)
+    args = parser.parse_args()
+
+    store = UserStore(args.db)
+    added = store.import_json(args.json)
+    print(f"Imported {added} accounts into {args.db} ({store.count_users()} total)")
+
+
+if __name__ == '__main__':
+    main()